@@ -0,0 +1,75 @@
+from collections import OrderedDict
+import bisect
+
+# sentinel returned by BalanceCache.get when a query has no cached result
+# (None is a valid cached result because get_balance returns None for accounts that did not exist at time_at)
+MISSING = object()
+
+class BalanceCache:
+    def __init__(self, maxsize=4096):
+        # maximum number of (account_id, time_at) results kept in the cache, 0 disables caching
+        self.maxsize = maxsize
+        # (account_id, time_at) -> cached get_balance result, ordered from least to most recently used
+        self.entries = OrderedDict()
+        # account_id -> sorted list of time_at values cached for that account, used to invalidate by time range
+        self.cached_times = {}
+        # number of lookups answered from / missing from the cache
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, account_id: str, time_at: int):
+        # returns the cached result for (account_id, time_at), or MISSING if it is not cached
+        key = (account_id, time_at)
+        result = self.entries.get(key, MISSING)
+        if result is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            # mark entry as most recently used
+            self.entries.move_to_end(key)
+        return result
+
+    def put(self, account_id: str, time_at: int, result):
+        if self.maxsize <= 0:
+            return
+        key = (account_id, time_at)
+        if key not in self.entries:
+            bisect.insort(self.cached_times.setdefault(account_id, []), time_at)
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        # evict least recently used entries until the cache is back within its bound
+        while len(self.entries) > self.maxsize:
+            (evicted_account_id, evicted_time_at), _ = self.entries.popitem(last=False)
+            self._forget_time(evicted_account_id, evicted_time_at)
+
+    def invalidate(self, account_id: str, timestamp: int):
+        # a balance change at timestamp can only affect queries for account_id with time_at >= timestamp
+        times = self.cached_times.get(account_id)
+        if not times:
+            return
+        # writes usually happen at the latest timestamp, so this range is normally empty
+        start = bisect.bisect_left(times, timestamp)
+        for time_at in times[start:]:
+            del self.entries[(account_id, time_at)]
+        del times[start:]
+        if not times:
+            del self.cached_times[account_id]
+
+    def invalidate_account(self, account_id: str):
+        # drops every cached result for account_id, e.g. when the ID is (re)created
+        for time_at in self.cached_times.pop(account_id, []):
+            del self.entries[(account_id, time_at)]
+
+    def clear(self):
+        self.entries.clear()
+        self.cached_times.clear()
+
+    def info(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.maxsize}
+
+    def _forget_time(self, account_id: str, time_at: int):
+        # removes time_at from the per-account index after an LRU eviction
+        times = self.cached_times[account_id]
+        del times[bisect.bisect_left(times, time_at)]
+        if not times:
+            del self.cached_times[account_id]
@@ -1,6 +1,29 @@
 from banking_system import BankingSystem
+from balance_cache import BalanceCache, MISSING
+from change_stream import ChangeEvent, ChangeStream
+from contextlib import contextmanager
+from copy_on_write import fork_log, fork_map
+from idempotency import IdempotencyCache, idempotent
+from leaderboards import Leaderboard
+from ledger_audit import AuditResult, LedgerAuditor, verify_ledger
+from memory_introspection import sized_items
+from merged_history import MergedHistoryView
+from quantile_sketch import QuantileSketch
+from space_saving import SpaceSaving
+from tiered_storage import TieredAccountStore
+from timing_wheel import ScheduledJob, TimingWheel
+from transaction_journal import Transaction, family_journals, page_transactions, record_transaction
+from velocity_limits import SlidingWindow, VelocityLimiter
+import bisect
+import copy
+import gc
 import heapq
+import itertools
 import math
+import sys
+
+# journal kinds that add money to an account, all other kinds take money out
+INCOMING_KINDS = {"deposit", "transfer_in", "cashback", "merge_in"}
 
 class Account:
     def __init__(self, timestamp, id, balance=0, total_outgoing=0): 
@@ -12,15 +35,27 @@ class Account:
         self.balance = balance
         # account balances for past timestamps
         self.balance_history = {timestamp: balance}
+        # keys of balance_history in ascending order, for binary search in balance_at
+        self.history_times = [timestamp]
         # total amount withdrawn from account
         self.total_outgoing = total_outgoing
+        # total amount received by account (deposits, incoming transfers and cashbacks)
+        self.total_incoming = 0
+        # transactions that changed the balance, sorted by (timestamp, seq)
+        self.journal = []
+        # accounts merged into this one, whose journals are inherited without being copied
+        self.merged_journal_sources = []
+        # timestamp the account was merged into another account at, None while it is valid
+        self.merge_timestamp = None
         
     # add amount if transferred or deposited to account, including account merges
     def deposit(self, timestamp: int, amount: int):
         # increments account balance by deposited amount
         self.balance += amount
+        # increments total incoming by deposited amount
+        self.total_incoming += amount
         # adds timestamp with balance to record account balance change
-        self.balance_history[timestamp] = self.balance
+        self._record_balance(timestamp)
         return self.balance
 
     # decrease amount if withdrawn from account
@@ -28,15 +63,47 @@ class Account:
         # decrements account balance by withdrawn amount
         self.balance -= amount
         # adds timestamp with balance to record account balance change
-        self.balance_history[timestamp] = self.balance
+        self._record_balance(timestamp)
         # increments total outgoing by withdrawn amount
         self.total_outgoing += amount
         return self.balance     
 
+    # independent copy for a forked ledger: the containers are copied, the entries they hold (Transactions and
+    # merged accounts, which never change again) are shared
+    def copy(self):
+        account = copy.copy(self)
+        account.balance_history = dict(self.balance_history)
+        account.history_times = list(self.history_times)
+        account.journal = list(self.journal)
+        account.merged_journal_sources = list(self.merged_journal_sources)
+        return account
+
+    # balance after the last change at or before time_at (time_at must not precede account creation)
+    def balance_at(self, time_at: int) -> int:
+        return self.balance_history[self.history_times[bisect.bisect_right(self.history_times, time_at) - 1]]
+
+    def _record_balance(self, timestamp: int):
+        if timestamp not in self.balance_history:
+            # changes almost always arrive in timestamp order; settling a cashback late can insert an earlier time
+            if timestamp > self.history_times[-1]:
+                self.history_times.append(timestamp)
+            else:
+                bisect.insort(self.history_times, timestamp)
+        self.balance_history[timestamp] = self.balance
+
 class BankingSystemImpl(BankingSystem):
-    def __init__(self): 
+    def __init__(self, balance_cache_size=4096, tiered_storage_path=None, hot_account_capacity=10000,
+                 idempotency_ttl=86400000, idempotency_max_keys=100000, quantile_accuracy=0.01,
+                 approximate_top_spenders_capacity=None, change_stream_capacity=65536, velocity_limit=None,
+                 velocity_window=86400000): 
         # dictionary of valid accounts in banking system
-        self.accounts = {}
+        # with tiered_storage_path set, only the hot_account_capacity most recently active accounts stay in memory
+        # and the rest are spilled to a SQLite file at that path (merged accounts, the payment index and the cashback
+        # queues below always stay in memory, see TieredAccountStore)
+        if tiered_storage_path is None:
+            self.accounts = {}
+        else:
+            self.accounts = TieredAccountStore(tiered_storage_path, hot_account_capacity)
         # dictionary of invalid accounts that have been merged with other valid accounts
         # values are stored in (account, merge_timestamp) tuples
         self.merged_accounts = {}
@@ -46,8 +113,57 @@ class BankingSystemImpl(BankingSystem):
         self.pending_cashbacks = [] 
         # nested list to keep track of processed cashbacks
         self.completed_cashbacks = []
+        # payment ID -> [account_id, cashback_received]; account_id is the payment's current owner,
+        # which follows the payment through account merges
+        self.payments = {}
+        # account ID -> IDs of the payments it owns, so a merge re-owns only the merged account's payments
+        self.account_payments = {}
+        # bounded LRU cache of historical get_balance results, keyed on (account_id, time_at)
+        self.balance_cache = BalanceCache(balance_cache_size)
+        # counter of journal entries across all accounts, orders transactions recorded at the same timestamp
+        self.num_transactions = 0
+        # results of mutations called with an idempotency_key, replayed when a client retries the call
+        self.idempotency_cache = IdempotencyCache(idempotency_ttl, idempotency_max_keys)
+        # scheduled (and recurring) transfers and payments, fired by process_cashbacks when they fall due
+        self.scheduler = TimingWheel()
+        # counter of scheduled jobs to generate job IDs
+        self.num_scheduled = 1
+        # job ID -> final status of the jobs that left the scheduler (fired, cancelled or dropped), see
+        # get_scheduled_status
+        self.finished_jobs = {}
+        # set while a scheduled job runs, so the operation it calls does not fire further jobs re-entrantly
+        self.running_scheduled_job = False
+        # Account attribute -> Leaderboard ranking valid accounts by it, built on first query and then kept up to date
+        self.leaderboards = {}
+        # streaming distributions of the current balances of valid accounts and of payment amounts,
+        # with quantile estimates within a relative error of quantile_accuracy
+        self.balance_sketch = QuantileSketch(quantile_accuracy)
+        self.payment_size_sketch = QuantileSketch(quantile_accuracy)
+        # opt-in approximate top_spenders: a Space-Saving summary of at most approximate_top_spenders_capacity
+        # counters replaces the exact ranking, with counts overestimated by at most total outgoing / capacity
+        self.spender_sketch = None
+        if approximate_top_spenders_capacity is not None:
+            self.spender_sketch = SpaceSaving(approximate_top_spenders_capacity)
+        # change-data-capture stream of balance changes (including payments, cashbacks and merges) for subscribers,
+        # keeping the last change_stream_capacity events; nothing is published while there are no subscribers
+        self.change_stream = ChangeStream(change_stream_capacity)
+        # account ID -> MergedHistoryView of the account's merged family, built on first query
+        self.merged_history_views = {}
+        # spending velocity limits: pay and transfer are rejected when they would take an account's withdrawals
+        # within the trailing velocity_window milliseconds above its limit (velocity_limit for every account,
+        # adjustable per account with set_velocity_limit); None until a limit is configured, so unlimited
+        # systems do not track withdrawals
+        self.velocity_limiter = None
+        if velocity_limit is not None:
+            self.velocity_limiter = VelocityLimiter(velocity_limit, velocity_window)
+        self.velocity_window = velocity_window
+        # running totals of balances, money flows and cashback liability, so audit can check that money is
+        # conserved in O(1) instead of scanning every account and cashback
+        self.ledger_auditor = LedgerAuditor()
 
+    @idempotent
     def create_account(self, timestamp: int, account_id: str):
+        self.process_cashbacks(timestamp)
         # does not create account if account ID already exists
         if account_id in self.accounts.keys(): 
             return False
@@ -55,19 +171,313 @@ class BankingSystemImpl(BankingSystem):
         # creates account with unique id and adds account to accounts dictionary
         else:
             self.accounts[account_id] = Account(timestamp, account_id)            
+            for leaderboard in self.leaderboards.values():
+                leaderboard.update(self.accounts[account_id])
+            self.balance_sketch.add(0)
+            # a re-created ID must not be answered from balances cached for the account merged away under it
+            self.balance_cache.invalidate_account(account_id)
             return True
 
+    @idempotent
+    def create_accounts(self, timestamp: int, account_ids: list[str]) -> list[bool]:
+        # creates the accounts in account_ids, with the same per-ID results and final state as calling
+        # create_account(timestamp, account_id) for each ID in order (an ID listed twice is only created once)
+        # the IDs are validated in one pass and the bookkeeping (balance sketch, cache invalidation, leaderboards)
+        # is done once for the whole batch
+        self.process_cashbacks(timestamp)
+        accounts = self.accounts
+        results = [False] * len(account_ids)
+        # account ID -> new Account, in creation order
+        created = {}
+        # like bulk_load, cyclic garbage collection is suspended while the Accounts are constructed: each one
+        # allocates four containers, which would otherwise trigger collections traversing all of them
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for i, account_id in enumerate(account_ids):
+                if account_id not in created and account_id not in accounts:
+                    created[account_id] = Account(timestamp, account_id)
+                    results[i] = True
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        accounts.update(created)
+        for leaderboard in self.leaderboards.values():
+            for account in created.values():
+                leaderboard.update(account)
+        self.balance_sketch.add(0, len(created))
+        # re-created IDs drop the balances cached for the accounts merged away under them, see create_account
+        for account_id in created.keys() & self.balance_cache.cached_times.keys():
+            self.balance_cache.invalidate_account(account_id)
+        return results
+
+    @contextmanager
+    def bulk_load(self):
+        # context for restoring large ledgers through create_account/deposit/... calls:
+        # cyclic garbage collection is suspended while loading (Accounts are never part of reference cycles that
+        # need collecting, but every allocation would count towards triggering full passes over all of them),
+        # and once the load succeeds the loaded objects are frozen into the permanent generation, so later
+        # collections do not traverse them either; freezing is process-wide, so garbage left over is collected
+        # first rather than frozen with them, and a failed load freezes nothing
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            yield self
+            gc.collect()
+            gc.freeze()
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def fork(self) -> "BankingSystemImpl":
+        # independent, mutable copy of the ledger for what-if simulations, without copying the ledger:
+        # the account, merged account and payment maps, the completed cashbacks, the finished scheduled jobs and
+        # the velocity windows and limits become frozen state shared by this system and the fork (see CopyOnWriteMap and CopyOnWriteLog),
+        # and each side copies an account, payment record or window the first time it looks it up, so both only
+        # pay for what they touch afterwards
+        # what fork does copy: the pending cashbacks (payments of the last 24 hours), the scheduled jobs, the
+        # idempotency keys (at most idempotency_max_keys) and the fixed-size sketches, plus the map entries
+        # changed since their frozen state was last compacted (see CopyOnWriteMap.fork); caches, leaderboards
+        # and merged history views start empty in the fork and are rebuilt on demand, and change stream
+        # subscribers stay with this system
+        if isinstance(self.accounts, TieredAccountStore):
+            raise ValueError("fork is not supported with tiered storage")
+        forked = copy.copy(self)
+        self.accounts, forked.accounts = fork_map(self.accounts, Account.copy)
+        self.merged_accounts, forked.merged_accounts = fork_map(self.merged_accounts)
+        self.payments, forked.payments = fork_map(self.payments, list)
+        self.account_payments, forked.account_payments = fork_map(self.account_payments, list)
+        self.completed_cashbacks, forked.completed_cashbacks = fork_log(self.completed_cashbacks)
+        self.finished_jobs, forked.finished_jobs = fork_map(self.finished_jobs)
+        # views hold the Account objects they were built from, which are now frozen
+        self.merged_history_views = {}
+        forked.merged_history_views = {}
+        forked.pending_cashbacks = list(self.pending_cashbacks)
+        forked.balance_cache = BalanceCache(self.balance_cache.maxsize)
+        forked.idempotency_cache = copy.copy(self.idempotency_cache)
+        forked.idempotency_cache.entries = self.idempotency_cache.entries.copy()
+        if self.scheduler.jobs:
+            forked.scheduler = copy.deepcopy(self.scheduler)
+        else:
+            # cancelled jobs left in the wheel's slots would only be dropped again
+            forked.scheduler = TimingWheel(self.scheduler.now, self.scheduler.slot_bits, self.scheduler.levels)
+        forked.leaderboards = {}
+        forked.balance_sketch = copy.deepcopy(self.balance_sketch)
+        forked.payment_size_sketch = copy.deepcopy(self.payment_size_sketch)
+        forked.spender_sketch = copy.deepcopy(self.spender_sketch)
+        forked.change_stream = ChangeStream(self.change_stream.capacity)
+        if self.velocity_limiter is not None:
+            limiter = forked.velocity_limiter = copy.copy(self.velocity_limiter)
+            self.velocity_limiter.limits, limiter.limits = fork_map(self.velocity_limiter.limits)
+            self.velocity_limiter.windows, limiter.windows = fork_map(self.velocity_limiter.windows, SlidingWindow.copy)
+        forked.ledger_auditor = copy.copy(self.ledger_auditor)
+        return forked
+
+    def balance_cache_info(self) -> dict:
+        # hit/miss counters and current size of the historical get_balance cache
+        return self.balance_cache.info()
+
+    def memory_report(self, top_n: int = 10, sample_size=None) -> dict:
+        # deep byte and element counts for each ledger structure
+        # structures are measured independently, so objects they share (e.g. account IDs) count towards each of them,
+        # and "accounts" / "merged_accounts" include the balance histories that "balance_history" breaks out
+        # with sample_size set, structures larger than sample_size elements are estimated from a strided sample
+        report = {}
+        # with tiered storage only the resident accounts occupy memory
+        resident_accounts = self.accounts.hot if isinstance(self.accounts, TieredAccountStore) else self.accounts
+        report["accounts"] = sized_items(resident_accounts.items(), len(resident_accounts), sample_size, pairs=True)
+        report["accounts"]["bytes"] += sys.getsizeof(resident_accounts)
+        report["merged_accounts"] = sized_items(self.merged_accounts.items(), len(self.merged_accounts), sample_size, pairs=True)
+        report["merged_accounts"]["bytes"] += sys.getsizeof(self.merged_accounts)
+
+        # balance histories of both valid and merged accounts, measured per account and reported per history entry
+        all_accounts = itertools.chain(resident_accounts.values(), (account for account, _ in self.merged_accounts.values()))
+        histories = (account.balance_history for account in all_accounts)
+        report["balance_history"] = sized_items(histories, len(resident_accounts) + len(self.merged_accounts), sample_size)
+        report["balance_history"]["elements"] = sum(len(account.balance_history) for account in resident_accounts.values()) + \
+            sum(len(account.balance_history) for account, _ in self.merged_accounts.values())
+
+        for name in ("pending_cashbacks", "completed_cashbacks"):
+            cashbacks = getattr(self, name)
+            report[name] = sized_items(cashbacks, len(cashbacks), sample_size)
+            report[name]["bytes"] += sys.getsizeof(cashbacks)
+        # payment index: owner and status of every payment, and the payments owned by each account
+        for name in ("payments", "account_payments"):
+            index = getattr(self, name)
+            report[name] = sized_items(index.items(), len(index), sample_size, pairs=True)
+            report[name]["bytes"] += sys.getsizeof(index)
+
+        report["balance_cache"] = sized_items(self.balance_cache.entries.items(), len(self.balance_cache.entries), sample_size, pairs=True)
+        report["balance_cache"]["bytes"] += sys.getsizeof(self.balance_cache.entries)
+
+        # valid accounts with the longest balance histories, as (account_id, number of history entries)
+        largest = heapq.nlargest(top_n, resident_accounts.values(), key=lambda account: len(account.balance_history))
+        report["top_accounts_by_history"] = [(account.id, len(account.balance_history)) for account in largest]
+        return report
+
+    def audit(self, timestamp: int) -> AuditResult:
+        # O(1) money conservation check on the running totals, see LedgerAuditor
+        # (after settling the cashbacks due by now, like the other queries)
+        self.process_cashbacks(timestamp)
+        return self.ledger_auditor.audit(len(self.pending_cashbacks))
+
+    def verify_ledger(self, timestamp: int) -> AuditResult:
+        # full scan of every account, journal and cashback against the running totals, for periodic deep checks
+        self.process_cashbacks(timestamp)
+        return verify_ledger(self)
+
+    def top_balances(self, timestamp: int, n: int) -> list[str]:
+        # top n valid accounts by current balance, formatted and tie-broken like top_spenders
+        # process cashbacks at or before timestamp so refunds due by now are reflected in the balances
+        self.process_cashbacks(timestamp)
+        return [f"{account_id}({balance})" for account_id, balance in self._leaderboard("balance").top(n)]
+
+    def top_receivers(self, timestamp: int, n: int) -> list[str]:
+        # top n valid accounts by total incoming money (deposits, incoming transfers and cashbacks),
+        # formatted and tie-broken like top_spenders; merged accounts combine the incoming totals of both accounts
+        self.process_cashbacks(timestamp)
+        return [f"{account_id}({total_incoming})" for account_id, total_incoming in self._leaderboard("total_incoming").top(n)]
+
+    def balance_quantiles(self, timestamp: int, qs=(0.5, 0.9, 0.99)) -> dict:
+        # estimated quantiles of the current balances across all valid accounts, as {q: balance}
+        self.process_cashbacks(timestamp)
+        return self.balance_sketch.quantiles(qs)
+
+    def payment_size_quantiles(self, timestamp: int, qs=(0.5, 0.9, 0.99)) -> dict:
+        # estimated quantiles of the amounts of all successful payments so far, as {q: amount}
+        self.process_cashbacks(timestamp)
+        return self.payment_size_sketch.quantiles(qs)
+
+    def set_velocity_limit(self, timestamp: int, account_id: str, limit) -> bool:
+        # sets account_id's spending limit over the velocity window (None for unlimited), overriding the default;
+        # withdrawals made before the first limit was configured on the system are not counted
+        if account_id not in self.accounts.keys():
+            return False
+        self.process_cashbacks(timestamp)
+        if self.velocity_limiter is None:
+            self.velocity_limiter = VelocityLimiter(None, self.velocity_window)
+        self.velocity_limiter.limits[account_id] = limit
+        return True
+
+    def get_velocity_headroom(self, timestamp: int, account_id: str) -> int | None:
+        # amount account_id can still withdraw at timestamp without exceeding its limit, None if it has no limit
+        if account_id not in self.accounts.keys():
+            return None
+        self.process_cashbacks(timestamp)
+        if self.velocity_limiter is None:
+            return None
+        limit = self.velocity_limiter.limit(account_id)
+        if limit is None:
+            return None
+        return max(0, limit - self.velocity_limiter.spent(account_id, timestamp))
+
+    def _leaderboard(self, attribute: str) -> Leaderboard:
+        # the first query builds the index in one sort, later balance changes update it in O(log N)
+        if attribute not in self.leaderboards:
+            self.leaderboards[attribute] = Leaderboard(attribute, self.accounts.values())
+        return self.leaderboards[attribute]
+
+    def get_transactions(self, timestamp: int, account_id: str, since: int = 0, limit: int = 50, cursor=None):
+        # newest-first page of at most limit transactions of account_id with timestamp >= since,
+        # returned as (transactions, next_cursor); pass next_cursor back to fetch the following page,
+        # it is None once there are no more entries
+        # merged accounts include the entries of the accounts merged into them
+        if account_id in self.accounts.keys():
+            # settle cashbacks so the statement includes every refund due at timestamp
+            self.process_cashbacks(timestamp)
+            account = self.accounts[account_id]
+        elif account_id in self.merged_accounts.keys():
+            account, _ = self.merged_accounts[account_id]
+        else:
+            return None
+        return page_transactions(family_journals(account), since, limit, cursor)
+
+    def subscribe_changes(self, timestamp: int) -> str:
+        # registers a change stream subscriber, which receives every balance change from now on; returns its ID
+        # (changes due by timestamp happen before the subscription)
+        self.process_cashbacks(timestamp)
+        return self.change_stream.subscribe()
+
+    def read_changes(self, timestamp: int, subscriber_id: str, limit: int = 100) -> list[ChangeEvent] | None:
+        # next (at most limit) ChangeEvents for subscriber_id in the order they happened, None for unknown subscribers
+        # raises SubscriberOverrun if the subscriber fell more than the stream capacity behind
+        if subscriber_id not in self.change_stream.subscribers.keys():
+            return None
+        # settle cashbacks so refunds due at timestamp are published before reading
+        self.process_cashbacks(timestamp)
+        return self.change_stream.read(subscriber_id, limit)
+
+    def unsubscribe_changes(self, timestamp: int, subscriber_id: str) -> bool:
+        return self.change_stream.unsubscribe(subscriber_id)
+
+    def get_merged_balance(self, timestamp: int, account_id: str, time_at: int) -> int | None:
+        # combined balance at time_at of valid account account_id and the accounts merged into it, counting each
+        # absorbed account's own balance until its merge; None if account_id is not valid or no member existed yet
+        if account_id not in self.accounts.keys():
+            return None
+        # process cashbacks at or before time_at before evaluating the history, like get_balance
+        self.process_cashbacks(time_at)
+        return self._merged_history_view(account_id).balance_at(time_at)
+
+    def get_merged_history(self, timestamp: int, account_id: str, since: int = 0, until=None) -> list[tuple[int, int]] | None:
+        # (timestamp, combined balance) changes of account_id's merged family with since <= timestamp <= until
+        # (until defaults to timestamp), see get_merged_balance
+        if account_id not in self.accounts.keys():
+            return None
+        self.process_cashbacks(timestamp)
+        return self._merged_history_view(account_id).history(since, timestamp if until is None else until)
+
+    def _merged_history_view(self, account_id: str) -> MergedHistoryView:
+        account = self.accounts[account_id]
+        view = self.merged_history_views.get(account_id)
+        # with tiered storage a paged-in account is a new object, so a view over the old one is rebuilt
+        if view is None or view.account() is not account:
+            view = self.merged_history_views[account_id] = MergedHistoryView(account)
+        return view
+
+    def _balance_changed(self, account_id: str, timestamp: int, kind: str, amount: int, counterparty=None, payment_id=None):
+        # called after every balance change so the journal and derived state stay consistent with the ledger
+        account = self.accounts[account_id]
+        self.balance_cache.invalidate(account_id, timestamp)
+        self.num_transactions += 1
+        transaction = Transaction(self.num_transactions, timestamp, kind, amount, counterparty, payment_id)
+        record_transaction(account.journal, transaction)
+        for leaderboard in self.leaderboards.values():
+            leaderboard.update(account)
+        # move the account from its previous balance to its new one in the balance distribution
+        self.balance_sketch.remove(account.balance - amount if kind in INCOMING_KINDS else account.balance + amount)
+        self.balance_sketch.add(account.balance)
+        self.ledger_auditor.balance_changed(kind, amount, kind in INCOMING_KINDS)
+        # withdrawals (outgoing transfers and payments) feed the approximate top_spenders summary
+        if self.spender_sketch is not None and kind not in INCOMING_KINDS:
+            self.spender_sketch.add(account_id, amount)
+        if self.velocity_limiter is not None and kind not in INCOMING_KINDS:
+            self.velocity_limiter.record(account_id, timestamp, amount)
+        view = self.merged_history_views.get(account_id)
+        if view is not None:
+            view.invalidate(timestamp)
+        if self.change_stream.subscribers:
+            self.change_stream.publish(ChangeEvent(
+                self.change_stream.next_position, timestamp, kind, account_id, amount, account.balance, counterparty, payment_id
+            ))
+
+    @idempotent
     def deposit(self, timestamp: int, account_id: str, amount: int) -> int | None:
         # if account exists, adds amount to account balance
         if account_id in self.accounts.keys():
             # process cashbacks at or before timestamp before calculating balance
             self.process_cashbacks(timestamp)
-            balance = self.accounts[account_id].deposit(timestamp, amount)
-            return(balance)
+            return self._apply_deposit(timestamp, account_id, amount)
         # does nothing if account does not exist
         else: 
             return None
         
+    def _apply_deposit(self, timestamp: int, account_id: str, amount: int) -> int:
+        balance = self.accounts[account_id].deposit(timestamp, amount)
+        self._balance_changed(account_id, timestamp, "deposit", amount)
+        return balance
+
+    @idempotent
     def transfer(self, timestamp: int, source_account_id: str, target_account_id: str, amount: int) -> int | None:
         # checks that source and target accounts exist
         if (source_account_id not in self.accounts.keys()) or (target_account_id not in self.accounts.keys()):
@@ -81,11 +491,27 @@ class BankingSystemImpl(BankingSystem):
         # if all the checks above are passed, the transfer is successful -> withdraw from source and deposit to target account
         # process cashbacks before depositing, withdrawing, and reporting balance
         self.process_cashbacks(timestamp)
+        # checks that the transfer keeps the source account within its spending velocity limit
+        if self.velocity_limiter is not None and not self.velocity_limiter.allows(source_account_id, timestamp, amount):
+            return None
+        return self._apply_transfer(timestamp, source_account_id, target_account_id, amount)
+
+    def _apply_transfer(self, timestamp: int, source_account_id: str, target_account_id: str, amount: int) -> int:
+        # moves amount between two valid accounts once every check has passed, returns the source balance
         self.accounts[target_account_id].deposit(timestamp, amount)
         source_balance = self.accounts[source_account_id].withdraw(timestamp, amount)
+        self._balance_changed(target_account_id, timestamp, "transfer_in", amount, source_account_id)
+        self._balance_changed(source_account_id, timestamp, "transfer_out", amount, target_account_id)
         return source_balance
     
     def top_spenders(self, timestamp: int, n: int) -> list[str]:
+        self.process_cashbacks(timestamp)
+        # approximate mode only reports accounts tracked by the summary, i.e. accounts with outgoing money
+        if self.spender_sketch is not None:
+            return [f"{account_id}({total_outgoing})" for account_id, total_outgoing in self.spender_sketch.top(n)]
+        # tiered storage ranks cold accounts through its persisted index instead of loading every account
+        if isinstance(self.accounts, TieredAccountStore):
+            return [f"{account_id}({total_outgoing})" for account_id, total_outgoing in self.accounts.top_spenders(n)]
         # sorts accounts by decreasing total_outgoing amount
         # if there is a tie, sorts by ascending account id
         sorted_accounts = sorted(
@@ -97,6 +523,7 @@ class BankingSystemImpl(BankingSystem):
         # returning top n spenders
         return [f"{account.id}({account.total_outgoing})" for account in sorted_accounts[:n]]
         
+    @idempotent
     def pay(self, timestamp: int, account_id: str, amount: int) -> str | None: 
         # checks that account_id is valid (in self.accounts)           
         if account_id not in self.accounts.keys():
@@ -108,26 +535,126 @@ class BankingSystemImpl(BankingSystem):
         # make sure that account has enough balance to make payment
         if self.accounts[account_id].balance < amount:
             return None
-        
+        # make sure that the payment keeps the account within its spending velocity limit
+        if self.velocity_limiter is not None and not self.velocity_limiter.allows(account_id, timestamp, amount):
+            return None
+        return self._apply_payment(timestamp, account_id, amount)
+
+    def _apply_payment(self, timestamp: int, account_id: str, amount: int) -> str:
+        # records a payment from a valid account once every check has passed, returns its payment ID
         # withdraw amount from account from which payment is being made
         self.accounts[account_id].withdraw(timestamp, amount)
         # generate payment ID from total number of withdrawals
         payment_id = f"payment{self.num_withdraws}"
+        self._balance_changed(account_id, timestamp, "payment", amount, payment_id=payment_id)
+        self.payment_size_sketch.add(amount)
 
         # 2% cashback needs to be deposited to account after payment, we add future cashbacks to pending_cashbacks priority queue
         # push (timestamp + 24 hrs, account_id, payment_id, cashback amount) to pending_cashbacks
         heapq.heappush(self.pending_cashbacks, (timestamp + 86400000, account_id, payment_id, math.floor(amount*0.02)))
+        self.ledger_auditor.cashback_added(math.floor(amount*0.02))
+        self.payments[payment_id] = [account_id, False]
+        self.account_payments.setdefault(account_id, []).append(payment_id)
         
         # increment total number of withdrawals after payment
         self.num_withdraws += 1
         return payment_id
 
+    def schedule_transfer(self, timestamp: int, execute_at: int, source_account_id: str, target_account_id: str,
+                          amount: int, interval=None) -> str | None:
+        # schedules transfer(execute_at, source_account_id, target_account_id, amount), repeated every interval
+        # milliseconds if interval is given; returns the job ID, or None if execute_at is not in the future
+        return self._schedule(timestamp, execute_at, ("transfer", (source_account_id, target_account_id, amount)), interval)
+
+    def schedule_payment(self, timestamp: int, execute_at: int, account_id: str, amount: int, interval=None) -> str | None:
+        # schedules pay(execute_at, account_id, amount), see schedule_transfer
+        return self._schedule(timestamp, execute_at, ("pay", (account_id, amount)), interval)
+
+    def cancel_scheduled(self, timestamp: int, job_id: str) -> bool:
+        # cancels a scheduled job (all remaining firings of a recurring one); False if it is unknown or already fired
+        self.process_cashbacks(timestamp)
+        if not self.scheduler.cancel(job_id):
+            return False
+        self.finished_jobs[job_id] = "CANCELLED"
+        return True
+
+    def get_scheduled_status(self, timestamp: int, job_id: str) -> str | None:
+        # "SCHEDULED" until the job first fires, then the outcome of its latest firing: "COMPLETED", "FAILED" if the
+        # operation was rejected (e.g. insufficient funds), or "ACCOUNT_INVALID" if an account it names was merged
+        # away or never existed (the job is then not repeated); "CANCELLED" once cancelled, None for unknown jobs
+        self.process_cashbacks(timestamp)
+        job = self.scheduler.jobs.get(job_id)
+        if job is not None:
+            return job.status
+        return self.finished_jobs.get(job_id)
+
+    def _schedule(self, timestamp: int, execute_at: int, action: tuple, interval) -> str | None:
+        self.process_cashbacks(timestamp)
+        if execute_at <= timestamp or (interval is not None and interval <= 0):
+            return None
+        job_id = f"scheduled{self.num_scheduled}"
+        self.scheduler.schedule(ScheduledJob(job_id, execute_at, self.num_scheduled, action, interval))
+        self.num_scheduled += 1
+        return job_id
+
     def process_cashbacks(self, timestamp: int):
+        # fires all deferred work due at or before timestamp in timestamp order: cashback refunds and scheduled jobs,
+        # with cashbacks first when both fall on the same timestamp
+        # every public operation calls it (or, for merges, _run_due_jobs) first, so due jobs run before it
+        # a scheduled job runs through the regular operation, whose own process_cashbacks call only settles cashbacks
+        # nothing is due: skip the scheduler and cashback machinery (most calls during a restore or bulk load)
+        if not self.scheduler.jobs and (not self.pending_cashbacks or self.pending_cashbacks[0][0] > timestamp):
+            return
+        self._run_due_jobs(timestamp)
+        self._settle_cashbacks(timestamp)
+
+    def _run_due_jobs(self, timestamp: int):
+        # fires the scheduled jobs due at or before timestamp, each after the cashbacks due by its firing time;
+        # cashbacks due after the last job stay pending, so merges (which call this instead of process_cashbacks)
+        # still re-own them to the merged account like any other pending cashback
+        if not self.scheduler.jobs or self.running_scheduled_job:
+            return
+        while True:
+            job_time = self.scheduler.next_due(timestamp)
+            if job_time is None:
+                return
+            self._settle_cashbacks(job_time)
+            self.running_scheduled_job = True
+            try:
+                for job in self.scheduler.pop_due(timestamp):
+                    self._run_scheduled_job(job)
+            finally:
+                self.running_scheduled_job = False
+
+    def _run_scheduled_job(self, job: ScheduledJob):
+        method_name, args = job.action
+        # transfers name the source and target account, payments the paying account
+        account_ids = args[:2] if method_name == "transfer" else args[:1]
+        if any(account_id not in self.accounts.keys() for account_id in account_ids):
+            # the operation could never succeed again, so the job is reported and dropped instead of retried
+            job.last_result = None
+            self.finished_jobs[job.id] = job.status = "ACCOUNT_INVALID"
+            return
+        job.last_result = getattr(self, method_name)(job.time, *args)
+        job.status = "FAILED" if job.last_result is None else "COMPLETED"
+        # recurring jobs keep their ID and are put back on the wheel for their next firing
+        if job.interval is not None:
+            job.time += job.interval
+            self.scheduler.schedule(job)
+        else:
+            self.finished_jobs[job.id] = job.status
+
+    def _settle_cashbacks(self, timestamp: int):
         # check whether first timestamp in priority queue is before current timestamp
         while self.pending_cashbacks and self.pending_cashbacks[0][0] <= timestamp:
             # deposit the cashback and take the cashback off of the pending_cashbacks priority queue
-            cashback_time, cashback_account_id, payment_id, cashback_amount = heapq.heappop(self.pending_cashbacks)
+            cashback_time, _, payment_id, cashback_amount = heapq.heappop(self.pending_cashbacks)
+            # the cashback goes to the payment's current owner, which differs from the payer after a merge
+            payment = self.payments[payment_id]
+            cashback_account_id = payment[0]
+            payment[1] = True
             self.accounts[cashback_account_id].deposit(cashback_time, cashback_amount)   
+            self._balance_changed(cashback_account_id, cashback_time, "cashback", cashback_amount, payment_id=payment_id)
             # append the processed cashback to completed_cashbacks
             self.completed_cashbacks.append([cashback_time, cashback_account_id, payment_id, cashback_amount])
         
@@ -138,46 +665,34 @@ class BankingSystemImpl(BankingSystem):
         # process pending cashbacks before evaluating cashback payment status
         self.process_cashbacks(timestamp)
 
-        # iterate over pending cashbacks to find if there is a matching account/payment id for cashbacks in progress        
-        for cashback in self.pending_cashbacks: 
-            cashback_time, cashback_account_id, cashback_payment_id, cashback_amount = cashback 
-            if account_id == cashback_account_id and payment == cashback_payment_id:
-                if cashback_time > timestamp:
-                    return "IN_PROGRESS"
-        
-        # iterate over completed cashbacks to find if there is a matching account/payment id for cashbacks received
-        for cashback in self.completed_cashbacks:
-            cashback_time, cashback_account_id, cashback_payment_id, cashback_amount = cashback
-            if account_id == cashback_account_id and payment == cashback_payment_id:
-                return "CASHBACK_RECEIVED"
-            
-        # return None if given payment id does not exist for specified account
-        # return None if payment transaction was for a different account_id
-        return None
+        # look the payment up in the payment index: None if it does not exist or belongs to another account
+        # (payments of merged accounts belong to the account they were merged into)
+        payment_record = self.payments.get(payment)
+        if payment_record is None or payment_record[0] != account_id:
+            return None
+        # cashbacks due at or before timestamp have been processed, so a payment still waiting is in progress
+        return "CASHBACK_RECEIVED" if payment_record[1] else "IN_PROGRESS"
     
     def merge_cashbacks(self, timestamp: int, account_id_1: str, account_id_2: str):
-
         # after merging accounts (merge acct2 with acct1), all pending cashbacks for acct2 need to be paid to acct1
-        # all cashbacks for acct2 in pending_cashbacks is replaced with acct1
-        for i, cashback in enumerate(self.pending_cashbacks): 
-            cashback_time, cashback_account_id, cashback_payment_id, cashback_amount = cashback 
-            if cashback_account_id == account_id_2:
-                updated_cashback = (cashback_time, account_id_1, cashback_payment_id, cashback_amount)
-                self.pending_cashbacks[i] = updated_cashback
-                heapq.heapify(self.pending_cashbacks)
-
-        # all completed cashbacks for acct2 need to be marked as paid to acct1 for future status calculations
-        # all cashbacks for acct2 in completed_cashbacks is replaced with acct1
-        for i, cashback in enumerate(self.completed_cashbacks): 
-            cashback_time, cashback_account_id, cashback_payment_id, cashback_amount = cashback 
-            if cashback_account_id == account_id_2:
-                updated_cashback = (cashback_time, account_id_1, cashback_payment_id, cashback_amount)
-                self.completed_cashbacks[i] = updated_cashback
-                heapq.heapify(self.completed_cashbacks)            
-        
+        # and all completed cashbacks for acct2 need to be marked as paid to acct1 for future status calculations
+        self._reown_cashbacks(account_id_1, {account_id_2})
+
+    def _reown_cashbacks(self, account_id: str, merged_account_ids: set):
+        # makes account_id the owner of every payment of the accounts in merged_account_ids, so their pending cashbacks
+        # are paid to account_id and their statuses are reported for account_id
+        # only the merged accounts' own payments are touched, not every pending and completed cashback
+        owned_payments = self.account_payments.setdefault(account_id, [])
+        for merged_account_id in merged_account_ids:
+            for payment_id in self.account_payments.pop(merged_account_id, ()):
+                self.payments[payment_id][0] = account_id
+                owned_payments.append(payment_id)
     
+    @idempotent
     def merge_accounts(self, timestamp: int, account_id_1: str, account_id_2: str) -> bool:
         
+        # run the jobs due by now against the accounts as they are before the merge
+        self._run_due_jobs(timestamp)
         # checks that accounts being merged are unique
         if account_id_1 == account_id_2:
             return False
@@ -185,21 +700,68 @@ class BankingSystemImpl(BankingSystem):
         if (account_id_1 not in self.accounts.keys()) or (account_id_2 not in self.accounts.keys()):
             return False
         
+        self._absorb_account(timestamp, account_id_1, account_id_2)
+        # call to function for making acct1 the owner of acct2's payments and their cashbacks
+        self.merge_cashbacks(timestamp, account_id_1, account_id_2)
+        
+        # merging accounts was successful
+        return True
+
+    @idempotent
+    def merge_many(self, timestamp: int, target_id: str, source_ids: list[str]) -> list[bool]:
+        # merges every account in source_ids into target_id, with the same per-source results and final state as
+        # calling merge_accounts(timestamp, target_id, source_id) for each source in order, with the payments of all
+        # sources re-owned together at the end
+        self._run_due_jobs(timestamp)
+        results = []
+        merged_account_ids = set()
+        for source_id in source_ids:
+            # same checks as merge_accounts; a source listed twice is no longer valid the second time
+            if source_id == target_id or target_id not in self.accounts.keys() or source_id not in self.accounts.keys():
+                results.append(False)
+                continue
+            self._absorb_account(timestamp, target_id, source_id)
+            merged_account_ids.add(source_id)
+            results.append(True)
+        if merged_account_ids:
+            self._reown_cashbacks(target_id, merged_account_ids)
+        return results
+
+    def _absorb_account(self, timestamp: int, account_id_1: str, account_id_2: str):
+        # moves acct2's balance and totals into acct1 and retires acct2 (everything but its cashbacks)
         # update balance of acct1 to include acct2 balance
         # calling the deposit function updates self.balance and self.balance_history
-        self.accounts[account_id_1].deposit(timestamp, self.accounts[account_id_2].balance)        
+        merged_balance = self.accounts[account_id_2].balance
+        self.accounts[account_id_1].deposit(timestamp, merged_balance)        
+        self._balance_changed(account_id_1, timestamp, "merge_in", merged_balance, account_id_2)
         # update total outgoing of acct1 to include acct2 total outgoing
         self.accounts[account_id_1].total_outgoing += self.accounts[account_id_2].total_outgoing
+        # the merged balance is not new incoming money: acct1 inherits acct2's total incoming instead
+        self.accounts[account_id_1].total_incoming += self.accounts[account_id_2].total_incoming - merged_balance
+        for leaderboard in self.leaderboards.values():
+            leaderboard.update(self.accounts[account_id_1])
+            leaderboard.discard(account_id_2)
+        # acct2's balance now counts towards acct1, which _balance_changed already moved
+        self.balance_sketch.remove(merged_balance)
+        self.ledger_auditor.account_retired(merged_balance)
+        if self.spender_sketch is not None:
+            self.spender_sketch.merge_key(account_id_1, account_id_2)
+        if self.velocity_limiter is not None:
+            self.velocity_limiter.merge(account_id_1, account_id_2, timestamp)
+        # acct1 inherits acct2's transaction journal by reference
+        self.accounts[account_id_1].merged_journal_sources.append(self.accounts[account_id_2])
+        self.accounts[account_id_2].merge_timestamp = timestamp
+        # acct1's family gained members, and acct2 is no longer a valid account to query
+        self.merged_history_views.pop(account_id_1, None)
+        self.merged_history_views.pop(account_id_2, None)
                 
-        # call to function for updating pending_cashbacks and completed_cashbacks to replace acct2 with acct1
-        self.merge_cashbacks(timestamp, account_id_1, account_id_2)
         # removing acct2 from being a valid account ID, removing acct2 from self.accounts
         self.merged_accounts[account_id_2] = (self.accounts.pop(account_id_2), timestamp)       
-        
-        # merging accounts was successful
-        return True
+        # acct2 no longer exists from the merge timestamp onwards
+        self.balance_cache.invalidate(account_id_2, timestamp)
 
     def get_balance(self, timestamp: int, account_id: str, time_at: int) -> int | None: 
+        self.process_cashbacks(timestamp)
 
         # we can get balance of account IDs that are currently valid or have been merged
         # checking whether account_id is currently valid
@@ -222,14 +784,68 @@ class BankingSystemImpl(BankingSystem):
         # given that account is valid at time_at, process cashbacks and get balance for account at time_at
         else:
             # if pending queries exist at same time_at, process queries then get_balance
+            # (settling a cashback at or before time_at invalidates any stale cached result)
             self.process_cashbacks(time_at)
+            # settling cashbacks can page accounts in and out of tiered storage, so look a valid account up again
+            if account_id in self.accounts.keys():
+                account = self.accounts[account_id]
+            cached_balance = self.balance_cache.get(account_id, time_at)
+            if cached_balance is not MISSING:
+                return cached_balance
             # if time_at is not a valid key in balance_history, it means that there was not change in balance at time_at
-            # we calculate the greatest timestamp key that is less than time_at if time_at is not a valid key in balance_history
-            greatest_time_at_key = None                
-            for key in account.balance_history.keys():
-                if key <= time_at:
-                    if greatest_time_at_key is None or greatest_time_at_key <= key:
-                        greatest_time_at_key = key
-            
-            # return the balance at calculated timestamp
-            return account.balance_history[greatest_time_at_key]
+            # balance_at binary searches for the greatest timestamp key that is less than time_at
+            balance = account.balance_at(time_at)
+            self.balance_cache.put(account_id, time_at, balance)
+            return balance
+
+    def get_balances_bulk(self, timestamp: int, queries: list[tuple[str, int]]) -> list[int | None]:
+        # answers many (account_id, time_at) get_balance queries at once, results are returned in query order
+        # queries are grouped by account and each account's queries are answered in ascending time_at order with a
+        # single forward sweep over its sorted history, so every account is looked up once and its history
+        # is searched from where the previous query stopped
+        # results bypass the balance cache, so a large statement run does not evict the interactive working set
+        self.process_cashbacks(timestamp)
+        results = [None] * len(queries)
+        # account ID -> [(time_at, query index)]
+        queries_by_account = {}
+        for index, (account_id, time_at) in enumerate(queries):
+            account_queries = queries_by_account.get(account_id)
+            if account_queries is None:
+                queries_by_account[account_id] = [(time_at, index)]
+            else:
+                account_queries.append((time_at, index))
+
+        # same validity rules as get_balance: (account ID, whether it is valid, answerable queries sorted by time_at)
+        answerable = []
+        latest_time_at = None
+        for account_id, account_queries in queries_by_account.items():
+            if account_id in self.accounts.keys():
+                account, merge_timestamp = self.accounts[account_id], None
+            elif account_id in self.merged_accounts.keys():
+                account, merge_timestamp = self.merged_accounts[account_id]
+            else:
+                continue
+            account_queries.sort()
+            # drop queries before the account was created and, for merged accounts, from the merge onwards
+            low = bisect.bisect_left(account_queries, (account.creation_timestamp, -1))
+            high = len(account_queries) if merge_timestamp is None else bisect.bisect_left(account_queries, (merge_timestamp, -1))
+            if low < high:
+                answerable.append((account_id, merge_timestamp is None, account_queries[low:high]))
+                if latest_time_at is None or account_queries[high - 1][0] > latest_time_at:
+                    latest_time_at = account_queries[high - 1][0]
+        if latest_time_at is None:
+            return results
+
+        # get_balance processes cashbacks up to each query's time_at; processing once up to the latest covers them all
+        self.process_cashbacks(latest_time_at)
+        bisect_right = bisect.bisect_right
+        for account_id, is_valid, account_queries in answerable:
+            # settling cashbacks can page accounts in and out of tiered storage, so look valid accounts up again
+            account = self.accounts[account_id] if is_valid else self.merged_accounts[account_id][0]
+            history_times = account.history_times
+            balance_history = account.balance_history
+            position = 0
+            for time_at, index in account_queries:
+                position = bisect_right(history_times, time_at, position)
+                results[index] = balance_history[history_times[position - 1]]
+        return results
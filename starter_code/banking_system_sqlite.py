@@ -0,0 +1,253 @@
+from banking_system import BankingSystem
+from contextlib import contextmanager
+import math
+import sqlite3
+
+# all SQL is kept in module constants: sqlite3 caches one prepared statement per distinct SQL string,
+# so every operation below reuses its compiled statements instead of re-parsing them
+SCHEMA = [
+    # one row per account instance; merged_at is NULL while the account is valid
+    # (an ID can be re-created after it was merged away, so rows are keyed on a surrogate key)
+    """CREATE TABLE IF NOT EXISTS accounts (
+        key INTEGER PRIMARY KEY,
+        id TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        balance INTEGER NOT NULL,
+        total_outgoing INTEGER NOT NULL,
+        merged_at INTEGER
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS accounts_valid_id ON accounts (id) WHERE merged_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS accounts_merged_id ON accounts (id, merged_at) WHERE merged_at IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS accounts_ranking ON accounts (total_outgoing DESC, id ASC) WHERE merged_at IS NULL",
+    # balance of an account after the last change at each timestamp
+    """CREATE TABLE IF NOT EXISTS history (
+        account_key INTEGER NOT NULL,
+        timestamp INTEGER NOT NULL,
+        balance INTEGER NOT NULL,
+        PRIMARY KEY (account_key, timestamp)
+    ) WITHOUT ROWID""",
+    # payments are keyed on their ordinal number; account_key follows the payment through merges
+    """CREATE TABLE IF NOT EXISTS payments (
+        number INTEGER PRIMARY KEY,
+        account_key INTEGER NOT NULL,
+        cashback_at INTEGER NOT NULL,
+        cashback_amount INTEGER NOT NULL,
+        cashback_received INTEGER NOT NULL DEFAULT 0
+    )""",
+    "CREATE INDEX IF NOT EXISTS payments_account ON payments (account_key)",
+    "CREATE INDEX IF NOT EXISTS payments_pending ON payments (cashback_at, number) WHERE cashback_received = 0",
+]
+
+SELECT_VALID_ACCOUNT = "SELECT key, balance, created_at FROM accounts WHERE id = ? AND merged_at IS NULL"
+SELECT_MERGED_ACCOUNT = (
+    "SELECT key, created_at, merged_at FROM accounts WHERE id = ? AND merged_at IS NOT NULL "
+    "ORDER BY merged_at DESC, key DESC LIMIT 1"
+)
+SELECT_BALANCE = "SELECT balance FROM accounts WHERE key = ?"
+INSERT_ACCOUNT = "INSERT INTO accounts (id, created_at, balance, total_outgoing) VALUES (?, ?, 0, 0)"
+ADD_BALANCE = "UPDATE accounts SET balance = balance + ? WHERE key = ?"
+ADD_OUTGOING = "UPDATE accounts SET balance = balance - ?, total_outgoing = total_outgoing + ? WHERE key = ?"
+MERGE_ACCOUNT = "UPDATE accounts SET merged_at = ? WHERE key = ?"
+SELECT_MERGE_TOTALS = "SELECT balance, total_outgoing FROM accounts WHERE key = ?"
+ADD_MERGED_TOTALS = "UPDATE accounts SET balance = balance + ?, total_outgoing = total_outgoing + ? WHERE key = ?"
+TOP_SPENDERS = (
+    "SELECT id, total_outgoing FROM accounts WHERE merged_at IS NULL "
+    "ORDER BY total_outgoing DESC, id ASC LIMIT ?"
+)
+UPSERT_HISTORY = (
+    "INSERT INTO history (account_key, timestamp, balance) VALUES (?, ?, ?) "
+    "ON CONFLICT (account_key, timestamp) DO UPDATE SET balance = excluded.balance"
+)
+SELECT_HISTORY_AT = (
+    "SELECT balance FROM history WHERE account_key = ? AND timestamp <= ? ORDER BY timestamp DESC LIMIT 1"
+)
+SELECT_PAYMENT_COUNT = "SELECT COALESCE(MAX(number), 0) FROM payments"
+INSERT_PAYMENT = "INSERT INTO payments (number, account_key, cashback_at, cashback_amount) VALUES (?, ?, ?, ?)"
+SELECT_DUE_CASHBACKS = (
+    "SELECT number, account_key, cashback_at, cashback_amount FROM payments "
+    "WHERE cashback_received = 0 AND cashback_at <= ? ORDER BY cashback_at, number"
+)
+MARK_CASHBACK_RECEIVED = "UPDATE payments SET cashback_received = 1 WHERE number = ?"
+SELECT_PAYMENT = "SELECT account_key, cashback_received FROM payments WHERE number = ?"
+REOWN_PAYMENTS = "UPDATE payments SET account_key = ? WHERE account_key = ?"
+
+# waiting period for cashback refunds, 24 hours in milliseconds
+CASHBACK_DELAY = 86400000
+
+class BankingSystemSqlite(BankingSystem):
+    def __init__(self, path: str = ":memory:"):
+        # autocommit mode: transactions are opened and committed explicitly in _transaction
+        self.connection = sqlite3.connect(path, isolation_level=None, cached_statements=64)
+        # write-ahead logging lets readers proceed while a write transaction is open
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        # number of operations nested inside the current transaction (see batch)
+        self.transaction_depth = 0
+        # continue payment numbering when re-opening an existing database
+        self.num_withdraws = self.connection.execute(SELECT_PAYMENT_COUNT).fetchone()[0] + 1
+
+    @contextmanager
+    def batch(self):
+        # groups every operation performed inside the block into a single transaction
+        with self._transaction():
+            yield self
+
+    def close(self):
+        self.connection.close()
+
+    def create_account(self, timestamp: int, account_id: str) -> bool:
+        with self._transaction():
+            if self._valid_account(account_id) is not None:
+                return False
+            key = self.connection.execute(INSERT_ACCOUNT, (account_id, timestamp)).lastrowid
+            self.connection.execute(UPSERT_HISTORY, (key, timestamp, 0))
+            return True
+
+    def deposit(self, timestamp: int, account_id: str, amount: int) -> int | None:
+        with self._transaction():
+            if self._valid_account(account_id) is None:
+                return None
+            # process cashbacks at or before timestamp before calculating balance
+            self.process_cashbacks(timestamp)
+            key = self._valid_account(account_id)[0]
+            return self._deposit(key, timestamp, amount)
+
+    def transfer(self, timestamp: int, source_account_id: str, target_account_id: str, amount: int) -> int | None:
+        with self._transaction():
+            source = self._valid_account(source_account_id)
+            target = self._valid_account(target_account_id)
+            if source is None or target is None:
+                return None
+            if source_account_id == target_account_id:
+                return None
+            # funds are checked before due cashbacks are processed, matching BankingSystemImpl
+            if source[1] < amount:
+                return None
+            self.process_cashbacks(timestamp)
+            self._deposit(target[0], timestamp, amount)
+            return self._withdraw(source[0], timestamp, amount)
+
+    def top_spenders(self, timestamp: int, n: int) -> list[str]:
+        rows = self.connection.execute(TOP_SPENDERS, (n,)).fetchall()
+        return [f"{account_id}({total_outgoing})" for account_id, total_outgoing in rows]
+
+    def pay(self, timestamp: int, account_id: str, amount: int) -> str | None:
+        with self._transaction():
+            if self._valid_account(account_id) is None:
+                return None
+            self.process_cashbacks(timestamp)
+            key, balance, _ = self._valid_account(account_id)
+            if balance < amount:
+                return None
+            self._withdraw(key, timestamp, amount)
+            payment_number = self.num_withdraws
+            self.connection.execute(
+                INSERT_PAYMENT, (payment_number, key, timestamp + CASHBACK_DELAY, math.floor(amount * 0.02))
+            )
+            self.num_withdraws += 1
+            return f"payment{payment_number}"
+
+    def process_cashbacks(self, timestamp: int):
+        with self._transaction():
+            due = self.connection.execute(SELECT_DUE_CASHBACKS, (timestamp,)).fetchall()
+            for payment_number, key, cashback_at, cashback_amount in due:
+                self._deposit(key, cashback_at, cashback_amount)
+                self.connection.execute(MARK_CASHBACK_RECEIVED, (payment_number,))
+
+    def get_payment_status(self, timestamp: int, account_id: str, payment: str) -> str | None:
+        with self._transaction():
+            account = self._valid_account(account_id)
+            if account is None:
+                return None
+            self.process_cashbacks(timestamp)
+            payment_number = self._payment_number(payment)
+            if payment_number is None:
+                return None
+            row = self.connection.execute(SELECT_PAYMENT, (payment_number,)).fetchone()
+            # payments of merged accounts have been re-owned by the account they were merged into
+            if row is None or row[0] != account[0]:
+                return None
+            return "CASHBACK_RECEIVED" if row[1] else "IN_PROGRESS"
+
+    def _payment_number(self, payment: str) -> int | None:
+        # number of a payment ID, None unless the ID is exactly f"payment{number}" like the in-memory engine's
+        # payment index keys ("payment01" or non-ASCII digits do not name a payment there either)
+        if not payment.startswith("payment"):
+            return None
+        digits = payment[len("payment"):]
+        if not digits.isascii() or not digits.isdigit():
+            return None
+        if digits != str(int(digits)):
+            return None
+        return int(digits)
+
+    def merge_accounts(self, timestamp: int, account_id_1: str, account_id_2: str) -> bool:
+        with self._transaction():
+            if account_id_1 == account_id_2:
+                return False
+            account_1 = self._valid_account(account_id_1)
+            account_2 = self._valid_account(account_id_2)
+            if account_1 is None or account_2 is None:
+                return False
+            balance_2, total_outgoing_2 = self.connection.execute(SELECT_MERGE_TOTALS, (account_2[0],)).fetchone()
+            self.connection.execute(ADD_MERGED_TOTALS, (balance_2, total_outgoing_2, account_1[0]))
+            self._record_history(account_1[0], timestamp)
+            # pending and received cashbacks of acct2 now belong to acct1
+            self.connection.execute(REOWN_PAYMENTS, (account_1[0], account_2[0]))
+            self.connection.execute(MERGE_ACCOUNT, (timestamp, account_2[0]))
+            return True
+
+    def get_balance(self, timestamp: int, account_id: str, time_at: int) -> int | None:
+        with self._transaction():
+            account = self._valid_account(account_id)
+            if account is not None:
+                key, _, created_at = account
+            else:
+                merged = self.connection.execute(SELECT_MERGED_ACCOUNT, (account_id,)).fetchone()
+                if merged is None:
+                    return None
+                key, created_at, merged_at = merged
+                # a merged account does not exist from its merge timestamp onwards
+                if merged_at <= time_at:
+                    return None
+            if created_at > time_at:
+                return None
+            self.process_cashbacks(time_at)
+            return self.connection.execute(SELECT_HISTORY_AT, (key, time_at)).fetchone()[0]
+
+    @contextmanager
+    def _transaction(self):
+        # the outermost operation opens and commits the transaction, nested operations join it
+        if self.transaction_depth == 0:
+            self.connection.execute("BEGIN")
+        self.transaction_depth += 1
+        try:
+            yield
+        except BaseException:
+            self.transaction_depth -= 1
+            if self.transaction_depth == 0:
+                self.connection.execute("ROLLBACK")
+            raise
+        self.transaction_depth -= 1
+        if self.transaction_depth == 0:
+            self.connection.execute("COMMIT")
+
+    def _valid_account(self, account_id: str):
+        # (key, balance, created_at) of the valid account with this ID, or None
+        return self.connection.execute(SELECT_VALID_ACCOUNT, (account_id,)).fetchone()
+
+    def _deposit(self, key: int, timestamp: int, amount: int) -> int:
+        self.connection.execute(ADD_BALANCE, (amount, key))
+        return self._record_history(key, timestamp)
+
+    def _withdraw(self, key: int, timestamp: int, amount: int) -> int:
+        self.connection.execute(ADD_OUTGOING, (amount, amount, key))
+        return self._record_history(key, timestamp)
+
+    def _record_history(self, key: int, timestamp: int) -> int:
+        # records the account's current balance as its balance at timestamp and returns it
+        balance = self.connection.execute(SELECT_BALANCE, (key,)).fetchone()[0]
+        self.connection.execute(UPSERT_HISTORY, (key, timestamp, balance))
+        return balance
@@ -0,0 +1,58 @@
+import argparse
+import random
+import time
+
+# importing workloads puts the project directory on sys.path
+import workloads
+from banking_system_impl import BankingSystemImpl
+from memory_introspection import deep_sizeof
+
+# compares exact top_spenders with the approximate Space-Saving mode on a skewed spending workload:
+# reports query time, memory of the ranking state, recall of the exact top-k and the worst count error
+# usage: python benchmarks/bench_approx_top_spenders.py --accounts 100000 --payments 500000 --capacity 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark approximate top_spenders")
+    parser.add_argument("--accounts", type=int, default=100000)
+    parser.add_argument("--payments", type=int, default=300000)
+    parser.add_argument("--capacity", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    account_ids = [f"account{i}" for i in range(args.accounts)]
+    # Pareto-distributed spenders: a few accounts account for most of the outgoing money
+    payments = [(account_ids[min(int(rng.paretovariate(1.1)) - 1, args.accounts - 1)], rng.randint(1, 1000))
+                for _ in range(args.payments)]
+
+    exact = BankingSystemImpl()
+    approximate = {capacity: BankingSystemImpl(approximate_top_spenders_capacity=capacity) for capacity in args.capacity}
+    for system in [exact, *approximate.values()]:
+        for timestamp, account_id in enumerate(account_ids):
+            system.create_account(timestamp, account_id)
+            system.deposit(timestamp, account_id, 10 ** 9)
+        for timestamp, (account_id, amount) in enumerate(payments, start=args.accounts):
+            system.pay(timestamp, account_id, amount)
+
+    query_time = args.accounts + args.payments
+    start = time.perf_counter()
+    exact_top = exact.top_spenders(query_time, args.top)
+    exact_seconds = time.perf_counter() - start
+    exact_totals = {account.id: account.total_outgoing for account in exact.accounts.values()}
+    print(f"exact: {exact_seconds * 1000:.2f} ms/query over {args.accounts} accounts")
+    exact_ids = {entry.split("(")[0] for entry in exact_top}
+
+    print(f"{'capacity':>9} {'ms/query':>9} {'MB':>8} {'recall@k':>9} {'max err':>9} {'bound':>10}")
+    for capacity, system in approximate.items():
+        start = time.perf_counter()
+        approximate_top = system.top_spenders(query_time, args.top)
+        seconds = time.perf_counter() - start
+        sketch = system.spender_sketch
+        approximate_ids = {entry.split("(")[0] for entry in approximate_top}
+        recall = len(exact_ids & approximate_ids) / max(1, len(exact_ids))
+        max_error = max(count - exact_totals[account_id] for account_id, count in sketch.counts.items())
+        print(f"{capacity:>9} {seconds * 1000:>9.2f} {deep_sizeof(sketch) / 1e6:>8.2f} {recall:>9.2f} "
+              f"{max_error:>9} {sketch.error_bound():>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import random
+import time
+
+# importing workloads puts the project directory on sys.path
+import workloads
+from banking_system_impl import BankingSystemImpl
+
+# compares answering statement queries with a get_balance loop against one get_balances_bulk call
+# queries are (account_id, time_at) pairs at random points in the workload's history, as a month-end statement run
+# would issue; both runs start from the same state with every cashback already settled
+# usage: python benchmarks/bench_bulk_balances.py --accounts 1000 --operations 200000 --queries 1000000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark get_balances_bulk against a get_balance loop")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--operations", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    operations = workloads.generate_operations(args.accounts, args.operations, args.seed)
+    end = operations[-1][1][0] + 1
+    rng = random.Random(args.seed)
+    queries = [(f"account{rng.randrange(args.accounts)}", rng.randint(1, end)) for _ in range(args.queries)]
+
+    timings = {}
+    results = {}
+    for name in ("loop", "bulk"):
+        system = BankingSystemImpl()
+        workloads.run_operations(system, operations)
+        system.process_cashbacks(end + 86400000)
+        start = time.perf_counter()
+        if name == "loop":
+            results[name] = [system.get_balance(end, account_id, time_at) for account_id, time_at in queries]
+        else:
+            results[name] = system.get_balances_bulk(end, queries)
+        timings[name] = time.perf_counter() - start
+    assert results["loop"] == results["bulk"]
+
+    for name, seconds in timings.items():
+        print(f"{name:>5} {seconds:>8.2f} s {args.queries / seconds:>12,.0f} queries/s")
+    print(f"speedup {timings['loop'] / timings['bulk']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import gc
+import time
+
+# importing workloads puts the project directory on sys.path
+import workloads
+from banking_system_impl import BankingSystemImpl
+
+# restores N accounts (create_account, then a deposit and a payment each) with and without bulk_load,
+# then times a full gc.collect() afterwards, which frozen objects no longer take part in
+# usage: python benchmarks/bench_bulk_load.py --accounts 1000000 3000000
+
+def restore(system, num_accounts):
+    timestamp = 1
+    for i in range(num_accounts):
+        system.create_account(timestamp, f"account{i}")
+        timestamp += 1
+    for i in range(num_accounts):
+        system.deposit(timestamp, f"account{i}", 1000)
+        system.pay(timestamp + 1, f"account{i}", 10)
+        timestamp += 2
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark restoring a ledger with and without bulk_load")
+    parser.add_argument("--accounts", type=int, nargs="+", default=[200000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'accounts':>10} {'mode':>10} {'load s':>9} {'gc.collect s':>13}")
+    for num_accounts in args.accounts:
+        for mode in ("plain", "bulk_load"):
+            system = BankingSystemImpl()
+            start = time.perf_counter()
+            if mode == "plain":
+                restore(system, num_accounts)
+            else:
+                with system.bulk_load():
+                    restore(system, num_accounts)
+            load_s = time.perf_counter() - start
+            start = time.perf_counter()
+            gc.collect()
+            collect_s = time.perf_counter() - start
+            print(f"{num_accounts:>10} {mode:>10} {load_s:>9.2f} {collect_s:>13.3f}")
+            # release the ledger before the next run, including objects a previous bulk_load froze
+            del system
+            gc.unfreeze()
+            gc.collect()
+
+if __name__ == "__main__":
+    main()
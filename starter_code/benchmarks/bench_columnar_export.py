@@ -0,0 +1,65 @@
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+# importing workloads puts the project directory on sys.path
+import workloads
+from banking_system_impl import BankingSystemImpl
+from columnar_export import export_ledger, load_ledger
+
+# compares copying a ledger by pickling BankingSystemImpl with the columnar .npy export:
+# write time, size on disk, time to open the copy, and time to answer balance queries from it
+# usage: python benchmarks/bench_columnar_export.py --accounts 10000 --operations 1000000
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar ledger export against pickle")
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--operations", type=int, default=300000)
+    parser.add_argument("--queries", type=int, default=10000)
+    args = parser.parse_args()
+
+    operations = workloads.generate_operations(args.accounts, args.operations)
+    end = operations[-1][1][0]
+    system = BankingSystemImpl()
+    workloads.run_operations(system, operations)
+    queries = [(f"account{i % args.accounts}", end - i) for i in range(args.queries)]
+    sys.setrecursionlimit(100000)
+
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, "ledger.pickle")
+        start = time.perf_counter()
+        with open(pickle_path, "wb") as file:
+            pickle.dump(system, file, pickle.HIGHEST_PROTOCOL)
+        write_s = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(pickle_path, "rb") as file:
+            copy = pickle.load(file)
+        open_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for account_id, time_at in queries:
+            copy.get_balance(end, account_id, time_at)
+        query_s = time.perf_counter() - start
+        print(f"{'format':>8} {'write s':>9} {'MB':>9} {'open s':>9} {'query s':>9}")
+        print(f"{'pickle':>8} {write_s:>9.2f} {os.path.getsize(pickle_path) / 1e6:>9.1f} {open_s:>9.3f} {query_s:>9.3f}")
+
+        export_path = os.path.join(directory, "columns")
+        start = time.perf_counter()
+        export_ledger(system, export_path)
+        write_s = time.perf_counter() - start
+        start = time.perf_counter()
+        ledger = load_ledger(export_path)
+        open_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for account_id, time_at in queries:
+            ledger.get_balance(account_id, time_at)
+        query_s = time.perf_counter() - start
+        print(f"{'npy':>8} {write_s:>9.2f} {directory_size(export_path) / 1e6:>9.1f} {open_s:>9.3f} {query_s:>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import gc
+import time
+
+# importing workloads puts the project directory on sys.path
+import workloads
+from banking_system_impl import BankingSystemImpl
+
+# compares onboarding accounts with a create_account loop against one create_accounts call, on an empty system
+# and on one already holding existing accounts; a tenth of the imported IDs are duplicates or already exist
+# usage: python benchmarks/bench_create_accounts.py --accounts 300000 --existing 100000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark create_accounts against a create_account loop")
+    parser.add_argument("--accounts", type=int, default=300000)
+    parser.add_argument("--existing", type=int, default=100000)
+    args = parser.parse_args()
+
+    existing_ids = [f"existing{i}" for i in range(args.existing)]
+    account_ids = [f"account{i}" for i in range(args.accounts)]
+    # every tenth ID repeats an existing or an already imported one
+    for i in range(0, args.accounts, 10):
+        account_ids[i] = existing_ids[i % len(existing_ids)] if existing_ids and i % 20 else account_ids[i // 2]
+
+    timings = {}
+    results = {}
+    for name in ("loop", "bulk"):
+        system = BankingSystemImpl()
+        for account_id in existing_ids:
+            system.create_account(1, account_id)
+        gc.collect()
+        start = time.perf_counter()
+        if name == "loop":
+            results[name] = [system.create_account(2, account_id) for account_id in account_ids]
+        else:
+            results[name] = system.create_accounts(2, account_ids)
+        timings[name] = time.perf_counter() - start
+    assert results["loop"] == results["bulk"]
+
+    for name, seconds in timings.items():
+        print(f"{name:>5} {seconds:>8.3f} s {args.accounts / seconds:>12,.0f} accounts/s")
+    print(f"speedup {timings['loop'] / timings['bulk']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import copy
+import time
+import tracemalloc
+
+# importing workloads puts the project directory on sys.path
+import workloads
+from banking_system_impl import BankingSystemImpl
+
+# compares copying a loaded ledger with copy.deepcopy against BankingSystemImpl.fork, then runs the same what-if
+# operations on both copies: fork time and memory should not depend on the ledger size, only on what the
+# simulation touches afterwards; finally the what-if operations run on a fork taken after --forks earlier forks
+# (each following a few operations on the parent), which should cost the same as on the first fork
+# usage: python benchmarks/bench_fork.py --accounts 20000 --operations 200000 --simulated 10000 --forks 50
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BankingSystemImpl.fork against copy.deepcopy")
+    parser.add_argument("--accounts", type=int, default=20000)
+    parser.add_argument("--operations", type=int, default=200000)
+    parser.add_argument("--simulated", type=int, default=10000, help="operations run on each copy")
+    parser.add_argument("--forks", type=int, default=50, help="earlier forks before the last measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    operations = workloads.generate_operations(args.accounts, args.operations, args.seed)
+    system = BankingSystemImpl()
+    workloads.run_operations(system, operations)
+    start = operations[-1][1][0] + 1
+    # the what-if operations: the mutations of a second workload over the same accounts, after the first one
+    simulated = [
+        (method_name, (call_args[0] + start, *call_args[1:]))
+        for method_name, call_args in workloads.generate_operations(args.accounts, args.simulated, args.seed + 1)[args.accounts * 2:]
+        if method_name != "get_balance"
+    ]
+
+    results = {}
+    for name, make_copy in (("deepcopy", copy.deepcopy), ("fork", BankingSystemImpl.fork)):
+        copy_start = time.perf_counter()
+        copied = make_copy(system)
+        copy_seconds = time.perf_counter() - copy_start
+        run_seconds = workloads.run_operations(copied, simulated)
+        results[name] = copied.top_spenders(start + 10 ** 12, 10)
+        del copied
+        # memory is measured on a second copy, tracemalloc would distort the timings
+        tracemalloc.start()
+        copied = make_copy(system)
+        copy_bytes = tracemalloc.get_traced_memory()[0]
+        workloads.run_operations(copied, simulated)
+        total_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del copied
+        print(f"{name:>8} copy {copy_seconds * 1e3:>9.1f} ms {copy_bytes / 2 ** 20:>8.1f} MiB   "
+              f"then {len(simulated)} operations {run_seconds * 1e3:>8.1f} ms, {total_bytes / 2 ** 20:>8.1f} MiB in total")
+    assert results["deepcopy"] == results["fork"]
+
+    forks = []
+    fork_seconds = 0.0
+    for i in range(args.forks):
+        workloads.run_operations(system, [("deposit", (start, f"account{i}", 1))])
+        fork_start = time.perf_counter()
+        forks.append(system.fork())
+        fork_seconds += time.perf_counter() - fork_start
+    copied = system.fork()
+    run_seconds = workloads.run_operations(copied, simulated)
+    print(f"{args.forks} earlier forks {fork_seconds / max(1, args.forks) * 1e3:>6.2f} ms per fork, "
+          f"then {len(simulated)} operations {run_seconds * 1e3:>8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import random
+import time
+
+from workloads import generate_operations, run_operations
+from banking_system_impl import BankingSystemImpl
+from shared_memory_readers import AnalyticsReadPool
+
+# measures bulk get_balance throughput of the shared-memory read pool at increasing worker counts,
+# against answering the same queries with get_balance in the writer process
+# usage: python benchmarks/bench_read_workers.py --accounts 10000 --queries 200000 --workers 1 2 4 8
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared-memory read workers")
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--operations", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    operations = generate_operations(args.accounts, args.operations)
+    system = BankingSystemImpl()
+    run_operations(system, operations)
+    last_timestamp = operations[-1][1][0]
+    rng = random.Random(1)
+    account_ids = list(system.accounts.keys())
+    queries = [(rng.choice(account_ids), rng.randint(1, last_timestamp)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    for account_id, time_at in queries:
+        system.get_balance(last_timestamp, account_id, time_at)
+    elapsed = time.perf_counter() - start
+    print(f"{'in-process':>12} {elapsed:>8.2f}s {len(queries) / elapsed:>12.0f} queries/s")
+
+    for workers in args.workers:
+        with AnalyticsReadPool(system, workers=workers, chunk_size=max(1, len(queries) // (workers * 8))) as pool:
+            pool.publish(last_timestamp)
+            # first call attaches every worker to the snapshot
+            pool.get_balances(queries[:workers * 8])
+            start = time.perf_counter()
+            pool.get_balances(queries)
+            elapsed = time.perf_counter() - start
+        print(f"{f'{workers} workers':>12} {elapsed:>8.2f}s {len(queries) / elapsed:>12.0f} queries/s")
+
+if __name__ == "__main__":
+    main()
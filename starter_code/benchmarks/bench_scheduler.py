@@ -0,0 +1,70 @@
+import argparse
+import heapq
+import random
+import time
+
+# importing workloads puts the project directory on sys.path
+import workloads
+from timing_wheel import ScheduledJob, TimingWheel
+
+# compares the timing wheel with a binary heap (the structure behind pending_cashbacks) on the scheduler workload:
+# insert N jobs at random future timestamps, cancel a fraction of them, then fire everything in timestamp order
+# (the heap cancels lazily by marking, which is the best it can do without an O(n) removal)
+# usage: python benchmarks/bench_scheduler.py --jobs 100000 1000000 3000000
+
+def bench_heap(jobs, cancelled):
+    start = time.perf_counter()
+    heap = []
+    for job in jobs:
+        heapq.heappush(heap, (job.time, job.seq, job))
+    insert_done = time.perf_counter()
+    for job in cancelled:
+        job.cancelled = True
+    cancel_done = time.perf_counter()
+    fired = 0
+    while heap:
+        _, _, job = heapq.heappop(heap)
+        if not job.cancelled:
+            fired += 1
+    end = time.perf_counter()
+    return insert_done - start, cancel_done - insert_done, end - cancel_done, fired
+
+def bench_wheel(jobs, cancelled):
+    start = time.perf_counter()
+    wheel = TimingWheel()
+    for job in jobs:
+        wheel.schedule(job)
+    insert_done = time.perf_counter()
+    for job in cancelled:
+        wheel.cancel(job.id)
+    cancel_done = time.perf_counter()
+    fired = 0
+    due = wheel.pop_due(2 ** 62)
+    while due:
+        fired += len(due)
+        due = wheel.pop_due(2 ** 62)
+    end = time.perf_counter()
+    return insert_done - start, cancel_done - insert_done, end - cancel_done, fired
+
+def make_jobs(count, horizon, seed):
+    rng = random.Random(seed)
+    return [ScheduledJob(f"scheduled{i}", rng.randint(1, horizon), i, None) for i in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the timing wheel against a heap")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[100000, 1000000])
+    # default horizon: 30 days of millisecond timestamps
+    parser.add_argument("--horizon", type=int, default=30 * 86400000)
+    parser.add_argument("--cancel-fraction", type=float, default=0.25)
+    args = parser.parse_args()
+
+    print(f"{'jobs':>10} {'structure':>10} {'insert s':>9} {'cancel s':>9} {'fire s':>9} {'fired':>10}")
+    for count in args.jobs:
+        for name, bench in (("heap", bench_heap), ("wheel", bench_wheel)):
+            jobs = make_jobs(count, args.horizon, count)
+            cancelled = jobs[:int(count * args.cancel_fraction)]
+            insert_s, cancel_s, fire_s, fired = bench(jobs, cancelled)
+            print(f"{count:>10} {name:>10} {insert_s:>9.2f} {cancel_s:>9.2f} {fire_s:>9.2f} {fired:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import argparse
+import os
+import tempfile
+
+from workloads import generate_operations, run_operations
+from banking_system_impl import BankingSystemImpl
+from banking_system_sqlite import BankingSystemSqlite
+
+# compares the in-memory engine with the SQLite engine on the same generated workload
+# usage: python benchmarks/bench_sqlite_engine.py --accounts 1000 10000 100000 --operations 200000
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the in-memory and SQLite engines")
+    parser.add_argument("--accounts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--operations", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'accounts':>10} {'engine':>16} {'seconds':>10} {'ops/s':>12}")
+    for num_accounts in args.accounts:
+        operations = generate_operations(num_accounts, args.operations, args.seed)
+        with tempfile.TemporaryDirectory() as directory:
+            sqlite_system = BankingSystemSqlite(os.path.join(directory, "ledger.db"))
+            engines = [
+                ("in-memory", BankingSystemImpl()),
+                ("sqlite", sqlite_system),
+            ]
+            for name, system in engines:
+                elapsed = run_operations(system, operations)
+                print(f"{num_accounts:>10} {name:>16} {elapsed:>10.2f} {len(operations) / elapsed:>12.0f}")
+            # the same workload again with all operations grouped into one transaction
+            batched_system = BankingSystemSqlite(os.path.join(directory, "batched.db"))
+            with batched_system.batch():
+                elapsed = run_operations(batched_system, operations)
+            print(f"{num_accounts:>10} {'sqlite (batch)':>16} {elapsed:>10.2f} {len(operations) / elapsed:>12.0f}")
+            sqlite_system.close()
+            batched_system.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+
+# importing workloads puts the project directory on sys.path
+import workloads
+from banking_system_impl import BankingSystemImpl
+from operation_profile import CpuProfile, MemoryProfile
+from operation_trace import read_trace, read_trace_options
+
+# profiles a synthetic workload or a recorded trace against BankingSystemImpl and writes into the output directory:
+#   report.txt        CPU time per BankingSystemImpl method and the hottest functions (plus allocations with --memory)
+#   cpu.collapsed     collapsed stacks in microseconds, for flamegraph.pl or speedscope
+#   cpu.pstats        raw cProfile statistics, for pstats or snakeviz
+#   memory.collapsed  collapsed allocation tracebacks in bytes still allocated at the end (with --memory)
+# the memory run replays the workload a second time on a fresh system, so tracemalloc does not distort the timings
+# usage:
+#   python benchmarks/profile_operations.py profile/ --accounts 1000 --operations 100000 [--memory]
+#   python benchmarks/profile_operations.py profile/ --trace workload.trace [--memory]
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile BankingSystemImpl per method under cProfile and tracemalloc")
+    parser.add_argument("output", help="directory to write the report and collapsed stacks into")
+    parser.add_argument("--trace", help="replay this operation trace instead of a synthetic workload")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--operations", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", action="store_true", help="also profile allocations with tracemalloc")
+    parser.add_argument("--top", type=int, default=15, help="number of hotspots and allocation sites to report")
+    args = parser.parse_args()
+
+    # a trace is profiled against a system constructed like the recorded one
+    options = {}
+    if args.trace:
+        operations = [(entry.method, entry.args, entry.kwargs) for entry in read_trace(args.trace)]
+        options = read_trace_options(args.trace)
+    else:
+        operations = workloads.generate_operations(args.accounts, args.operations, args.seed)
+    os.makedirs(args.output, exist_ok=True)
+
+    cpu = CpuProfile(BankingSystemImpl(**options), operations)
+    cpu.write_collapsed(os.path.join(args.output, "cpu.collapsed"))
+    cpu.profiler.dump_stats(os.path.join(args.output, "cpu.pstats"))
+    sections = [cpu.format(args.top)]
+    if args.memory:
+        memory = MemoryProfile(BankingSystemImpl(**options), operations)
+        memory.write_collapsed(os.path.join(args.output, "memory.collapsed"))
+        sections.append(memory.format(args.top))
+    report = "\n\n".join(sections)
+    with open(os.path.join(args.output, "report.txt"), "w") as file:
+        file.write(report + "\n")
+    print(report)
+
+if __name__ == "__main__":
+    main()
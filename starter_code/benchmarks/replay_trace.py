@@ -0,0 +1,85 @@
+import argparse
+import ast
+import os
+import unittest
+
+# importing workloads puts the project directory on sys.path
+import workloads
+from banking_system_impl import BankingSystemImpl
+from operation_trace import TraceRecorder, read_trace, read_trace_options, record_test_case, replay_trace
+
+# records and replays operation traces against BankingSystemImpl
+# usage:
+#   python benchmarks/replay_trace.py seed traces/                  one trace per level_*_tests.py test case
+#   python benchmarks/replay_trace.py record workload.trace --operations 100000 [--option velocity_limit=5000]
+#   python benchmarks/replay_trace.py replay workload.trace traces/*.trace [--paced --speed 10] [--no-verify]
+
+def seed(args):
+    # converts the level test scenarios into seed traces, named after the test case
+    os.makedirs(args.output, exist_ok=True)
+    tests_dir = os.path.join(os.path.dirname(workloads.parent_dir + os.sep), "tests")
+    suite = unittest.defaultTestLoader.discover(tests_dir, pattern="level_*_tests.py", top_level_dir=tests_dir)
+    for test in _test_cases(suite):
+        path = os.path.join(args.output, f"{test.id()}.trace")
+        passed = record_test_case(test, path)
+        print(f"{path}{'' if passed else ' (test failed, trace is partial)'}")
+
+def _test_cases(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from _test_cases(test)
+        else:
+            yield test
+
+def record(args):
+    # records a synthetic workload (see workloads.generate_operations) as a trace
+    operations = workloads.generate_operations(args.accounts, args.operations, args.seed)
+    # NAME=VALUE constructor options, VALUE is a Python literal
+    options = {name: ast.literal_eval(value) for name, value in (option.split("=", 1) for option in args.option)}
+    with TraceRecorder(BankingSystemImpl(**options), args.output, options) as recorder:
+        workloads.run_operations(recorder, operations)
+    print(f"{len(operations)} operations recorded into {args.output} ({os.path.getsize(args.output):,} bytes)")
+
+def replay(args):
+    failed = False
+    for path in args.traces:
+        entries = list(read_trace(path))
+        # replay against a system constructed like the recorded one
+        report = replay_trace(BankingSystemImpl(**read_trace_options(path)), entries, paced=args.paced, speed=args.speed, verify=not args.no_verify)
+        print(path)
+        print(report.format())
+        for index, entry, result in report.mismatches[:args.show_mismatches]:
+            print(f"  #{index} {entry.method}{entry.args}: recorded {entry.result!r}, replayed {result!r}")
+        failed = failed or bool(report.mismatches)
+    return 1 if failed else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay BankingSystemImpl operation traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="convert tests/level_*_tests.py into traces")
+    seed_parser.add_argument("output", help="directory to write the traces into")
+    seed_parser.set_defaults(run=seed)
+
+    record_parser = commands.add_parser("record", help="record a synthetic workload")
+    record_parser.add_argument("output")
+    record_parser.add_argument("--accounts", type=int, default=1000)
+    record_parser.add_argument("--operations", type=int, default=100000)
+    record_parser.add_argument("--seed", type=int, default=0)
+    record_parser.add_argument("--option", action="append", default=[], metavar="NAME=VALUE",
+                               help="BankingSystemImpl constructor option, may be repeated")
+    record_parser.set_defaults(run=record)
+
+    replay_parser = commands.add_parser("replay", help="replay traces and verify their results")
+    replay_parser.add_argument("traces", nargs="+")
+    replay_parser.add_argument("--paced", action="store_true", help="keep the recorded spacing between calls")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="pacing speed-up factor")
+    replay_parser.add_argument("--no-verify", action="store_true", help="skip comparing results")
+    replay_parser.add_argument("--show-mismatches", type=int, default=10)
+    replay_parser.set_defaults(run=replay)
+
+    args = parser.parse_args()
+    raise SystemExit(args.run(args) or 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import inspect, os, sys
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import random
+import time
+
+def generate_operations(num_accounts: int, num_operations: int, seed: int = 0) -> list[tuple]:
+    # a reproducible mix of BankingSystem calls as (method_name, args) tuples:
+    # all accounts are created and funded first, then deposits, transfers, payments and queries are interleaved
+    rng = random.Random(seed)
+    account_ids = [f"account{i}" for i in range(num_accounts)]
+    operations = []
+    timestamp = 1
+    for account_id in account_ids:
+        operations.append(("create_account", (timestamp, account_id)))
+        timestamp += 1
+    for account_id in account_ids:
+        operations.append(("deposit", (timestamp, account_id, rng.randint(1000, 100000))))
+        timestamp += 1
+    for _ in range(num_operations):
+        kind = rng.random()
+        account_id = rng.choice(account_ids)
+        if kind < 0.3:
+            operations.append(("deposit", (timestamp, account_id, rng.randint(1, 1000))))
+        elif kind < 0.6:
+            operations.append(("transfer", (timestamp, account_id, rng.choice(account_ids), rng.randint(1, 1000))))
+        elif kind < 0.8:
+            operations.append(("pay", (timestamp, account_id, rng.randint(1, 1000))))
+        elif kind < 0.99:
+            operations.append(("get_balance", (timestamp, account_id, rng.randint(1, timestamp))))
+        else:
+            operations.append(("top_spenders", (timestamp, 10)))
+        # spread operations over several days so cashbacks become due while the workload runs
+        timestamp += rng.randint(1, 20000)
+    return operations
+
+def run_operations(system, operations) -> float:
+    # executes operations against system and returns the elapsed wall-clock seconds
+    start = time.perf_counter()
+    for method_name, args in operations:
+        getattr(system, method_name)(*args)
+    return time.perf_counter() - start
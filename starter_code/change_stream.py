@@ -0,0 +1,70 @@
+from typing import NamedTuple
+
+class ChangeEvent(NamedTuple):
+    # position of the event in the stream, consecutive across all events
+    position: int
+    timestamp: int
+    # journal kind of the balance change: "deposit", "transfer_in", "transfer_out", "payment", "cashback" or "merge_in"
+    kind: str
+    account_id: str
+    amount: int
+    # account balance after the change
+    balance: int
+    # other account of a transfer, or the account absorbed by a merge
+    counterparty: str | None = None
+    # payment the event belongs to, for payments and their cashback settlements
+    payment_id: str | None = None
+
+class SubscriberOverrun(Exception):
+    # raised by ChangeStream.read when events a subscriber had not read yet were overwritten
+    # the subscriber's cursor is moved to the oldest retained event, so it can resynchronise and keep reading
+    def __init__(self, subscriber_id: str, missed: int):
+        super().__init__(f"{subscriber_id} missed {missed} events")
+        self.subscriber_id = subscriber_id
+        self.missed = missed
+
+class ChangeStream:
+    # bounded ring buffer of ChangeEvents with one read cursor per subscriber
+    # the buffer keeps the last capacity events whatever the subscribers do, so a slow subscriber loses events
+    # (and is told so) instead of making the stream grow
+
+    def __init__(self, capacity: int = 65536):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.buffer = [None] * capacity
+        # position the next published event gets
+        self.next_position = 0
+        # subscriber ID -> position of the next event it reads
+        self.subscribers = {}
+        # counter of subscriptions to generate subscriber IDs
+        self.num_subscriptions = 1
+
+    def publish(self, event: ChangeEvent):
+        self.buffer[event.position % self.capacity] = event
+        self.next_position = event.position + 1
+
+    def subscribe(self) -> str:
+        # new subscribers start at the next event published
+        subscriber_id = f"subscriber{self.num_subscriptions}"
+        self.num_subscriptions += 1
+        self.subscribers[subscriber_id] = self.next_position
+        return subscriber_id
+
+    def unsubscribe(self, subscriber_id: str) -> bool:
+        return self.subscribers.pop(subscriber_id, None) is not None
+
+    def read(self, subscriber_id: str, limit: int) -> list[ChangeEvent]:
+        # the next (at most limit) events for subscriber_id, advancing its cursor past them
+        cursor = self.subscribers[subscriber_id]
+        oldest = max(0, self.next_position - self.capacity)
+        if cursor < oldest:
+            self.subscribers[subscriber_id] = oldest
+            raise SubscriberOverrun(subscriber_id, oldest - cursor)
+        end = min(self.next_position, cursor + limit)
+        self.subscribers[subscriber_id] = end
+        return [self.buffer[position % self.capacity] for position in range(cursor, end)]
+
+    def lag(self, subscriber_id: str) -> int:
+        # number of published events subscriber_id has not read yet, including any it has missed
+        return self.next_position - self.subscribers[subscriber_id]
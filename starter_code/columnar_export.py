@@ -0,0 +1,135 @@
+import json
+import os
+
+# numpy is only needed by the export and the loader, the ledger itself does not depend on it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# an export directory holds one .npy file per column plus a manifest (MANIFEST, written last) which lists the columns
+# with their dtypes and shapes; columns of the same table have one entry per row:
+#   accounts    account_id, created_at, balance, total_outgoing, merged_at (NOT_MERGED while valid),
+#               history_offsets (one extra entry: account i's history is history rows offsets[i]:offsets[i + 1])
+#   history     history_timestamp, history_balance, each account's rows sorted by timestamp
+#   payments    payment_id, payment_account (current owner), cashback_at, cashback_amount, cashback_received
+#   merges      merge_target, merge_source (account rows), merge_timestamp
+# valid accounts come first, followed by merged accounts, like in shared_memory_readers
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+NOT_MERGED = 2 ** 63 - 1
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("columnar export requires numpy")
+
+def export_ledger(system, directory: str) -> dict:
+    # writes the ledger of a BankingSystemImpl as columnar .npy files into directory and returns the manifest
+    # cashbacks due by now are not settled first; pending ones are exported with cashback_received = False
+    _require_numpy()
+    os.makedirs(directory, exist_ok=True)
+    entries = [(account, NOT_MERGED) for account in system.accounts.values()]
+    # merged accounts include earlier instances of re-created IDs, reached through their families
+    rows = {id(account): i for i, (account, _) in enumerate(entries)}
+    merges = []
+    stack = [account for account, _ in entries]
+    while stack:
+        target = stack.pop()
+        for source in target.merged_journal_sources:
+            if id(source) not in rows:
+                rows[id(source)] = len(entries)
+                entries.append((source, source.merge_timestamp))
+                stack.append(source)
+            merges.append((rows[id(target)], rows[id(source)], source.merge_timestamp))
+    num_accounts = len(entries)
+
+    offsets = np.zeros(num_accounts + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.fromiter((len(account.history_times) for account, _ in entries), np.int64, num_accounts))
+    num_history = int(offsets[-1])
+    payments = sorted(system.payments.items(), key=lambda item: int(item[0][len("payment"):]))
+    cashbacks = {payment_id: (cashback_time, amount) for cashback_time, _, payment_id, amount in system.pending_cashbacks}
+    cashbacks.update((payment_id, (cashback_time, amount)) for cashback_time, _, payment_id, amount in system.completed_cashbacks)
+
+    columns = {
+        "account_id": np.array([account.id for account, _ in entries], dtype=str),
+        "created_at": np.fromiter((account.creation_timestamp for account, _ in entries), np.int64, num_accounts),
+        "balance": np.fromiter((account.balance for account, _ in entries), np.int64, num_accounts),
+        "total_outgoing": np.fromiter((account.total_outgoing for account, _ in entries), np.int64, num_accounts),
+        "merged_at": np.fromiter((merged_at for _, merged_at in entries), np.int64, num_accounts),
+        "history_offsets": offsets,
+        "history_timestamp": np.fromiter(
+            (timestamp for account, _ in entries for timestamp in account.history_times), np.int64, num_history
+        ),
+        "history_balance": np.fromiter(
+            (account.balance_history[timestamp] for account, _ in entries for timestamp in account.history_times),
+            np.int64, num_history,
+        ),
+        "payment_id": np.array([payment_id for payment_id, _ in payments], dtype=str),
+        "payment_account": np.array([owner for _, (owner, _) in payments], dtype=str),
+        "cashback_at": np.fromiter((cashbacks[payment_id][0] for payment_id, _ in payments), np.int64, len(payments)),
+        "cashback_amount": np.fromiter((cashbacks[payment_id][1] for payment_id, _ in payments), np.int64, len(payments)),
+        "cashback_received": np.fromiter((received for _, (_, received) in payments), np.bool_, len(payments)),
+        "merge_target": np.fromiter((target for target, _, _ in merges), np.int64, len(merges)),
+        "merge_source": np.fromiter((source for _, source, _ in merges), np.int64, len(merges)),
+        "merge_timestamp": np.fromiter((timestamp for _, _, timestamp in merges), np.int64, len(merges)),
+    }
+    manifest = {"format_version": FORMAT_VERSION, "num_valid_accounts": len(system.accounts), "columns": {}}
+    for name, column in columns.items():
+        np.save(os.path.join(directory, f"{name}.npy"), column, allow_pickle=False)
+        manifest["columns"][name] = {"file": f"{name}.npy", "dtype": column.dtype.str, "shape": list(column.shape)}
+    # the manifest is written last and atomically, so an interrupted export is never loaded
+    temporary_path = os.path.join(directory, MANIFEST + ".tmp")
+    with open(temporary_path, "w") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(temporary_path, os.path.join(directory, MANIFEST))
+    return manifest
+
+class LedgerColumns:
+    # read-only view of an exported ledger: every column is a numpy array memory-mapped from its .npy file,
+    # so opening is independent of the ledger size and pages are read from disk only as they are accessed
+
+    def __init__(self, directory: str):
+        _require_numpy()
+        with open(os.path.join(directory, MANIFEST)) as file:
+            self.manifest = json.load(file)
+        if self.manifest["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"unsupported ledger export version {self.manifest['format_version']}")
+        self.num_valid_accounts = self.manifest["num_valid_accounts"]
+        self.columns = {}
+        for name, column in self.manifest["columns"].items():
+            # empty arrays cannot be memory-mapped
+            mmap_mode = "r" if column["shape"][0] else None
+            self.columns[name] = np.load(os.path.join(directory, column["file"]), mmap_mode=mmap_mode, allow_pickle=False)
+        # account ID -> row, built on the first lookup by ID
+        self.rows = None
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    def account_row(self, account_id: str) -> int | None:
+        # row of the valid account with this ID or, if there is none, of the most recently merged one
+        if self.rows is None:
+            self.rows = {}
+            # later merges overwrite earlier ones, and valid accounts (merged_at NOT_MERGED) overwrite all of them
+            for row in np.argsort(self.merged_at, kind="stable").tolist():
+                self.rows[str(self.account_id[row])] = row
+        return self.rows.get(account_id)
+
+    def history(self, row: int):
+        # (timestamps, balances) arrays of the account in row
+        start, end = int(self.history_offsets[row]), int(self.history_offsets[row + 1])
+        return self.history_timestamp[start:end], self.history_balance[start:end]
+
+    def get_balance(self, account_id: str, time_at: int) -> int | None:
+        # same rules as BankingSystemImpl.get_balance, evaluated against the exported state
+        row = self.account_row(account_id)
+        if row is None or self.merged_at[row] <= time_at or self.created_at[row] > time_at:
+            return None
+        timestamps, balances = self.history(row)
+        return int(balances[np.searchsorted(timestamps, time_at, side="right") - 1])
+
+def load_ledger(directory: str) -> LedgerColumns:
+    return LedgerColumns(directory)
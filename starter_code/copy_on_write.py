@@ -0,0 +1,169 @@
+from collections.abc import MutableMapping
+import itertools
+
+# marks keys a layer does not have
+MISSING = object()
+# entries per chunk of a CopyOnWriteLog
+CHUNK_SIZE = 1024
+
+class CopyOnWriteMap(MutableMapping):
+    # dictionary layered over frozen state shared with other layers, so forking a ledger does not copy it:
+    # the frozen state is a base dict plus an overlay of the sets (overlay) and deletions (overlay_deleted) of
+    # earlier layers, which fork folds together instead of nesting layers, so a lookup checks at most three
+    # dictionaries however many times the map was forked
+    # sets and deletions stay in this layer, and a value is copied from the frozen state into the layer (with
+    # copy_value, or shared if copy_value is None) the first time it is looked up, since callers mutate the
+    # values they look up (e.g. self.accounts[account_id].deposit(...))
+    # values() and items() return frozen values without copying them, for read-only scans like top_spenders
+
+    def __init__(self, base: dict, copy_value=None, overlay=None, overlay_deleted=frozenset(), size=None):
+        self.base = base
+        self.copy_value = copy_value
+        self.overlay = {} if overlay is None else overlay
+        self.overlay_deleted = overlay_deleted
+        # keys set or copied in this layer -> their values
+        self.local = {}
+        # keys of the frozen state deleted in this layer
+        self.deleted = set()
+        self.size = len(base) if size is None else size
+
+    def fork(self) -> "CopyOnWriteMap":
+        # new layer with this map's contents; this layer is folded into the frozen state and starts over empty
+        # too, so its values are copied again the next time it looks them up
+        # folding copies the overlay, O(entries changed since the last compaction); once the overlay outgrows an
+        # eighth of the base, the base is rebuilt with everything folded in, so that cost stays bounded
+        if self.local or self.deleted:
+            overlay = dict(self.overlay)
+            overlay.update(self.local)
+            for key in self.deleted:
+                overlay.pop(key, None)
+            overlay_deleted = self.overlay_deleted.union(key for key in self.deleted if key in self.base)
+            if len(overlay) + len(overlay_deleted) > len(self.base) // 8:
+                base = dict(self.base)
+                for key in overlay_deleted:
+                    base.pop(key, None)
+                base.update(overlay)
+                self.base, overlay, overlay_deleted = base, {}, frozenset()
+            self.overlay, self.overlay_deleted = overlay, overlay_deleted
+            self.local, self.deleted = {}, set()
+        return CopyOnWriteMap(self.base, self.copy_value, self.overlay, self.overlay_deleted, self.size)
+
+    def peek(self, key, default=None):
+        # value of key without copying it into the layer
+        value = self.local.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        if key in self.deleted:
+            return default
+        value = self._peek_frozen(key)
+        return default if value is MISSING else value
+
+    def __getitem__(self, key):
+        value = self.local.get(key, MISSING)
+        if value is MISSING:
+            value = MISSING if key in self.deleted else self._peek_frozen(key)
+            if value is MISSING:
+                raise KeyError(key)
+            if self.copy_value is not None:
+                value = self.copy_value(value)
+            self.local[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self.size += 1
+        self.local[key] = value
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.local.pop(key, None)
+        if self._peek_frozen(key) is not MISSING:
+            self.deleted.add(key)
+        self.size -= 1
+
+    def __contains__(self, key) -> bool:
+        return self.peek(key, MISSING) is not MISSING
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        hidden, hidden_base = self._hidden()
+        return itertools.chain(
+            self.local,
+            (key for key in self.overlay if key not in hidden) if hidden else self.overlay,
+            (key for key in self.base if key not in hidden_base) if hidden_base else self.base,
+        )
+
+    def values(self):
+        hidden, hidden_base = self._hidden()
+        return itertools.chain(
+            self.local.values(),
+            (value for key, value in self.overlay.items() if key not in hidden) if hidden else self.overlay.values(),
+            (value for key, value in self.base.items() if key not in hidden_base) if hidden_base else self.base.values(),
+        )
+
+    def items(self):
+        hidden, hidden_base = self._hidden()
+        return itertools.chain(
+            self.local.items(),
+            (item for item in self.overlay.items() if item[0] not in hidden) if hidden else self.overlay.items(),
+            (item for item in self.base.items() if item[0] not in hidden_base) if hidden_base else self.base.items(),
+        )
+
+    def _peek_frozen(self, key):
+        value = self.overlay.get(key, MISSING)
+        if value is not MISSING or key in self.overlay_deleted:
+            return value
+        return self.base.get(key, MISSING)
+
+    def _hidden(self) -> tuple[set, set]:
+        # keys of the overlay and of the base that iteration skips, since this layer (and, for the base, the
+        # overlay) replaced or deleted them; each generator then does a single set lookup per key
+        hidden = self.local.keys() | self.deleted
+        return hidden, hidden | self.overlay.keys() | self.overlay_deleted
+
+class CopyOnWriteLog:
+    # append-only list whose entries are shared between forks: entries are appended to chunks of at most
+    # CHUNK_SIZE, every chunk but the last is never changed again, so fork shares them and only copies the list
+    # of chunks and the last chunk (one pointer per CHUNK_SIZE entries, plus fewer than CHUNK_SIZE entries)
+    # a list the log is created from becomes its first (frozen) chunk without being copied
+
+    def __init__(self, entries=None):
+        self.chunks = [[]] if entries is None else [entries, []]
+        self.size = sum(len(chunk) for chunk in self.chunks)
+
+    def fork(self) -> "CopyOnWriteLog":
+        forked = CopyOnWriteLog()
+        forked.chunks = self.chunks[:-1] + [list(self.chunks[-1])]
+        forked.size = self.size
+        return forked
+
+    def append(self, entry):
+        last = self.chunks[-1]
+        if len(last) >= CHUNK_SIZE:
+            last = []
+            self.chunks.append(last)
+        last.append(entry)
+        self.size += 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.chunks)
+
+def fork_map(mapping, copy_value=None) -> tuple[CopyOnWriteMap, CopyOnWriteMap]:
+    # (CopyOnWriteMap to replace mapping with, CopyOnWriteMap for the fork), both holding the contents of
+    # mapping, a dict (which must not be changed afterwards) or a CopyOnWriteMap
+    if not isinstance(mapping, CopyOnWriteMap):
+        mapping = CopyOnWriteMap(mapping, copy_value)
+    return mapping, mapping.fork()
+
+def fork_log(entries) -> tuple[CopyOnWriteLog, CopyOnWriteLog]:
+    # like fork_map, for an append-only list or CopyOnWriteLog
+    if not isinstance(entries, CopyOnWriteLog):
+        entries = CopyOnWriteLog(entries)
+    return entries, entries.fork()
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+import functools
+
+# sentinel returned by IdempotencyCache.get for keys without a recorded result
+MISSING = object()
+
+class IdempotencyCache:
+    def __init__(self, ttl: int = 86400000, max_entries: int = 100000):
+        # results are kept for ttl milliseconds of operation time after the original call (24 hours by default)
+        self.ttl = ttl
+        # hard bound on the number of remembered keys, so memory stays bounded under any request rate
+        self.max_entries = max_entries
+        # key -> (timestamp of the original call, result), oldest first
+        # operations arrive in timestamp order, so insertion order is also expiry order
+        self.entries = OrderedDict()
+
+    def get(self, key, timestamp: int):
+        self._expire(timestamp)
+        entry = self.entries.get(key)
+        return MISSING if entry is None else entry[1]
+
+    def put(self, key, timestamp: int, result):
+        self.entries[key] = (timestamp, result)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _expire(self, timestamp: int):
+        # drops keys whose original call is more than ttl before timestamp, oldest first (amortised O(1))
+        cutoff = timestamp - self.ttl
+        while self.entries:
+            key, (original_timestamp, _) = next(iter(self.entries.items()))
+            if original_timestamp >= cutoff:
+                break
+            del self.entries[key]
+
+def idempotent(method):
+    # lets a BankingSystemImpl mutation accept an optional idempotency_key keyword:
+    # a retried call with the same key (for the same method) returns the original result without re-executing
+    @functools.wraps(method)
+    def wrapper(self, timestamp, *args, idempotency_key=None, **kwargs):
+        if idempotency_key is None:
+            return method(self, timestamp, *args, **kwargs)
+        key = (method.__name__, idempotency_key)
+        result = self.idempotency_cache.get(key, timestamp)
+        if result is MISSING:
+            result = method(self, timestamp, *args, **kwargs)
+            self.idempotency_cache.put(key, timestamp, result)
+        return result
+    return wrapper
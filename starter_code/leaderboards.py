@@ -0,0 +1,30 @@
+from ordered_index import OrderedIndex
+
+class Leaderboard:
+    # accounts ranked by one numeric Account attribute, in decreasing order, ties by ascending account ID
+    # the index is kept up to date by calling update whenever the attribute of an account may have changed
+
+    def __init__(self, attribute: str, accounts=()):
+        self.attribute = attribute
+        # account ID -> negated attribute value currently stored in the index
+        self.keys = {account.id: -getattr(account, attribute) for account in accounts}
+        self.index = OrderedIndex((key, account_id) for account_id, key in self.keys.items())
+
+    def update(self, account):
+        key = -getattr(account, self.attribute)
+        old_key = self.keys.get(account.id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self.index.remove((old_key, account.id))
+        self.index.add((key, account.id))
+        self.keys[account.id] = key
+
+    def discard(self, account_id: str):
+        old_key = self.keys.pop(account_id, None)
+        if old_key is not None:
+            self.index.remove((old_key, account_id))
+
+    def top(self, n: int) -> list[tuple[str, int]]:
+        # top n (account_id, value) pairs
+        return [(account_id, -key) for key, account_id in self.index.first(n)]
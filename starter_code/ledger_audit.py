@@ -0,0 +1,127 @@
+from typing import NamedTuple
+
+class AuditResult(NamedTuple):
+    # invariants that do not hold, empty when the ledger is consistent
+    problems: list[str]
+    # sum of the balances of valid accounts
+    balance_total: int
+    # money that entered the ledger through deposits
+    deposited: int
+    # money that left the ledger through payments
+    paid: int
+    # cashback refunds settled so far
+    cashback_paid: int
+    # cashback refunds scheduled but not settled yet
+    cashback_liability: int
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+class LedgerAuditor:
+    # running totals of the money in the ledger, updated in O(1) on every balance change, so money conservation
+    # can be checked without scanning accounts and cashbacks:
+    #   balance_total == deposited - paid + cashback_paid    (transfers and merges only move money around)
+    #   cashback_liability == cashback_scheduled - cashback_paid, owed by exactly num_pending cashbacks
+    # balance_total follows the balance changes account by account (a merge adds the absorbed balance to the
+    # surviving account and retires the absorbed account), the flow totals follow the kinds of money movements,
+    # so a change that reaches one side but not the other breaks the first invariant
+
+    def __init__(self):
+        self.balance_total = 0
+        self.deposited = 0
+        self.paid = 0
+        self.cashback_scheduled = 0
+        self.cashback_paid = 0
+        self.num_pending = 0
+
+    def balance_changed(self, kind: str, amount: int, incoming: bool):
+        self.balance_total += amount if incoming else -amount
+        if kind == "deposit":
+            self.deposited += amount
+        elif kind == "payment":
+            self.paid += amount
+        elif kind == "cashback":
+            self.cashback_paid += amount
+            self.num_pending -= 1
+
+    def cashback_added(self, amount: int):
+        self.cashback_scheduled += amount
+        self.num_pending += 1
+
+    def account_retired(self, balance: int):
+        # a merged account's balance leaves the valid accounts, having moved into the account it was merged into
+        self.balance_total -= balance
+
+    def audit(self, num_pending: int) -> AuditResult:
+        # checks the invariants between the running totals; num_pending is the actual number of pending cashbacks
+        problems = []
+        if self.balance_total != self.deposited - self.paid + self.cashback_paid:
+            problems.append(
+                f"balances total {self.balance_total}, but deposits - payments + cashbacks is "
+                f"{self.deposited - self.paid + self.cashback_paid}"
+            )
+        if self.balance_total < 0:
+            problems.append(f"balances total {self.balance_total} is negative")
+        if self.num_pending != num_pending:
+            problems.append(f"{num_pending} cashbacks pending, {self.num_pending} expected")
+        if self.cashback_liability < 0:
+            problems.append(f"cashback liability {self.cashback_liability} is negative")
+        return self.result(problems)
+
+    @property
+    def cashback_liability(self) -> int:
+        return self.cashback_scheduled - self.cashback_paid
+
+    def result(self, problems: list[str]) -> AuditResult:
+        return AuditResult(problems, self.balance_total, self.deposited, self.paid, self.cashback_paid, self.cashback_liability)
+
+def verify_ledger(system) -> AuditResult:
+    # full scan of a BankingSystemImpl against its running totals: recomputes the balances total, the flows from
+    # the transaction journals of every account (merged ones included) and the cashback liability from the queue,
+    # and checks every account and payment on the way; cost is proportional to the whole ledger
+    auditor = system.ledger_auditor
+    problems = list(auditor.audit(len(system.pending_cashbacks)).problems)
+
+    balance_total = 0
+    flows = {"deposit": 0, "payment": 0, "cashback": 0}
+    # every account ever created: the valid ones and, through them, the accounts merged into them
+    accounts = list(system.accounts.values())
+    stack = list(accounts)
+    while stack:
+        account = stack.pop()
+        for source in account.merged_journal_sources:
+            accounts.append(source)
+            stack.append(source)
+    for account in accounts:
+        if account.merge_timestamp is None:
+            balance_total += account.balance
+            if account.balance < 0:
+                problems.append(f"{account.id} has a negative balance {account.balance}")
+        if account.history_times != sorted(account.balance_history):
+            problems.append(f"{account.id} history index does not match its balance history")
+        for transaction in account.journal:
+            if transaction.kind in flows:
+                flows[transaction.kind] += transaction.amount
+    if balance_total != auditor.balance_total:
+        problems.append(f"accounts hold {balance_total}, running total is {auditor.balance_total}")
+    for name, kind in (("deposited", "deposit"), ("paid", "payment"), ("cashback_paid", "cashback")):
+        if flows[kind] != getattr(auditor, name):
+            problems.append(f"journals record {flows[kind]} {name}, running total is {getattr(auditor, name)}")
+
+    liability = 0
+    for _, _, payment_id, amount in system.pending_cashbacks:
+        liability += amount
+        if system.payments[payment_id][1]:
+            problems.append(f"{payment_id} is pending but marked as received")
+    if liability != auditor.cashback_liability:
+        problems.append(f"pending cashbacks owe {liability}, running liability is {auditor.cashback_liability}")
+    settled = sum(amount for _, _, _, amount in system.completed_cashbacks)
+    if settled != auditor.cashback_paid:
+        problems.append(f"completed cashbacks paid {settled}, running total is {auditor.cashback_paid}")
+    if len(system.pending_cashbacks) + len(system.completed_cashbacks) != len(system.payments):
+        problems.append(
+            f"{len(system.payments)} payments, but {len(system.pending_cashbacks)} pending and "
+            f"{len(system.completed_cashbacks)} completed cashbacks"
+        )
+    return auditor.result(problems)
@@ -0,0 +1,55 @@
+import itertools
+import sys
+
+# leaf types whose sys.getsizeof already includes everything they own
+ATOMIC_TYPES = (int, float, complex, bool, str, bytes, type(None))
+
+def deep_sizeof(obj, seen=None) -> int:
+    # total bytes of obj and everything reachable from it through containers and instance attributes
+    # objects in seen (by id) are skipped, so shared objects are only counted once per walk
+    if seen is None:
+        seen = set()
+    total = 0
+    # iterative walk, so deeply nested structures cannot hit the recursion limit
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, ATOMIC_TYPES):
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        else:
+            # plain objects (e.g. Account) own their attribute dict and/or slot values
+            if hasattr(current, "__dict__"):
+                stack.append(vars(current))
+            for slot in getattr(type(current), "__slots__", ()):
+                if hasattr(current, slot):
+                    stack.append(getattr(current, slot))
+    return total
+
+def sized_items(items, count: int, sample_size=None, pairs=False, seen=None) -> dict:
+    # reports the deep size of the count elements yielded by items (dict items when pairs is True)
+    # with sample_size set and count above it, only every k-th element is measured and the total is extrapolated
+    if seen is None:
+        seen = set()
+    estimated = sample_size is not None and count > sample_size
+    if estimated:
+        items = itertools.islice(items, 0, None, max(1, count // max(1, sample_size)))
+    measured_bytes = 0
+    measured_count = 0
+    for item in items:
+        if pairs:
+            measured_bytes += deep_sizeof(item[0], seen) + deep_sizeof(item[1], seen)
+        else:
+            measured_bytes += deep_sizeof(item, seen)
+        measured_count += 1
+    if estimated and measured_count:
+        measured_bytes = int(measured_bytes * count / measured_count)
+    return {"bytes": measured_bytes, "elements": count, "estimated": estimated}
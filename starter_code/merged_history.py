@@ -0,0 +1,100 @@
+import bisect
+import heapq
+
+def family_components(account) -> list[tuple]:
+    # (account, merge_timestamp) for account and every account merged into it, directly or through earlier merges;
+    # merge_timestamp is None for account itself, which still exists
+    components = [(account, None)]
+    stack = list(account.merged_journal_sources)
+    while stack:
+        source = stack.pop()
+        components.append((source, source.merge_timestamp))
+        stack.extend(source.merged_journal_sources)
+    return components
+
+class MergedHistoryView:
+    # combined balance history of a merged family: at each time, the surviving account's balance plus the balances
+    # of the accounts that had not yet been merged into it (each absorbed account counts until its merge timestamp,
+    # from which its balance is part of the account it was merged into)
+    # nothing is copied at merge time: the component histories are k-way merged on demand, and the merged prefix
+    # computed so far is cached and only extended (or, after a change, truncated) by later queries
+
+    def __init__(self, account):
+        self.components = family_components(account)
+        # cached prefix of the combined history: every change of the combined balance before complete_until
+        self.times = []
+        self.balances = []
+        self.complete_until = None
+
+    def account(self):
+        # the surviving account the view was built for
+        return self.components[0][0]
+
+    def invalidate(self, timestamp: int):
+        # the surviving account changed at timestamp: cached entries from timestamp onwards may be stale
+        # (absorbed accounts never change after their merge, so only the surviving account calls for this)
+        if self.complete_until is not None and timestamp < self.complete_until:
+            end = bisect.bisect_left(self.times, timestamp)
+            del self.times[end:]
+            del self.balances[end:]
+            self.complete_until = timestamp
+
+    def balance_at(self, time_at: int) -> int | None:
+        # combined balance of the family at time_at, None before any of its accounts existed
+        self._extend(time_at)
+        position = bisect.bisect_right(self.times, time_at)
+        return self.balances[position - 1] if position else None
+
+    def history(self, since: int, until: int) -> list[tuple[int, int]]:
+        # (timestamp, combined balance) for every change with since <= timestamp <= until
+        self._extend(until)
+        low = bisect.bisect_left(self.times, since)
+        high = bisect.bisect_right(self.times, until)
+        return list(zip(self.times[low:high], self.balances[low:high]))
+
+    def _extend(self, until: int):
+        # merges the component histories from complete_until up to and including until into the cached prefix
+        start = self.complete_until
+        if start is not None and until < start:
+            return
+        # per component: its balance just before start, and a heap of its next event: the next history entry
+        # (before its merge timestamp) or, after its last one, the merge itself, where its balance drops to 0
+        current = []
+        heap = []
+        for i, (account, merge_timestamp) in enumerate(self.components):
+            times = account.history_times
+            position = 0 if start is None else bisect.bisect_left(times, start)
+            if position == 0 or (merge_timestamp is not None and merge_timestamp < start):
+                current.append(0)
+            else:
+                current.append(account.balance_history[times[position - 1]])
+            self._push_next(heap, i, position, start)
+        total = sum(current)
+
+        while heap and heap[0][0] <= until:
+            timestamp = heap[0][0]
+            # apply every component event at this timestamp before recording the combined balance
+            while heap and heap[0][0] == timestamp:
+                _, i, position = heapq.heappop(heap)
+                account = self.components[i][0]
+                balance = 0 if position is None else account.balance_history[account.history_times[position]]
+                total += balance - current[i]
+                current[i] = balance
+                if position is not None:
+                    self._push_next(heap, i, position + 1, timestamp + 1)
+            # creations and merges move balances between components without changing the combined balance
+            if not self.balances or self.balances[-1] != total:
+                self.times.append(timestamp)
+                self.balances.append(total)
+        self.complete_until = until + 1
+
+    def _push_next(self, heap, i: int, position: int, start):
+        # pushes component i's event at or after start, beginning the search at history position
+        account, merge_timestamp = self.components[i]
+        times = account.history_times
+        if merge_timestamp is None or (position < len(times) and times[position] < merge_timestamp):
+            if position < len(times):
+                heapq.heappush(heap, (times[position], i, position))
+        elif start is None or merge_timestamp >= start:
+            # None marks the merge event
+            heapq.heappush(heap, (merge_timestamp, i, None))
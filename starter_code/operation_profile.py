@@ -0,0 +1,211 @@
+from banking_system_impl import BankingSystemImpl
+from typing import NamedTuple
+import cProfile
+import inspect
+import os
+import pstats
+import time
+import tracemalloc
+
+# profiles a workload against BankingSystemImpl and attributes the cost to its methods
+# operations are (method_name, args) or (method_name, args, kwargs) tuples, like workloads.generate_operations
+# returns or the calls of a trace; calls that raise are profiled like any other (traces record failing calls too),
+# and counted per method so a workload that mostly fails does not go unnoticed in the report
+
+class MethodStats(NamedTuple):
+    calls: int
+    # seconds spent in the method's own body, excluding the functions it called
+    own_time: float
+    # seconds from entering the method to returning from it, including everything it called
+    total_time: float
+
+def run_operations(system, operations, failures=None) -> dict:
+    # runs the operations and returns failures, method name -> [calls that raised, first exception raised]
+    # an unknown method name is a broken workload rather than a failing call, and raises AttributeError
+    failures = {} if failures is None else failures
+    for method_name, args, *kwargs in operations:
+        method = getattr(system, method_name)
+        try:
+            method(*args, **(kwargs[0] if kwargs else {}))
+        except Exception as error:
+            entry = failures.setdefault(method_name, [0, error])
+            entry[0] += 1
+    return failures
+
+def format_failures(failures: dict) -> list[str]:
+    # report lines warning about the calls that raised, empty if none did
+    if not failures:
+        return []
+    lines = [f"warning: {sum(count for count, _ in failures.values())} calls raised"]
+    for name, (count, error) in sorted(failures.items(), key=lambda item: -item[1][0]):
+        lines.append(f"{name:>28} {count:>9}  first: {type(error).__name__}: {error}")
+    return lines
+
+def method_functions(cls=BankingSystemImpl) -> dict:
+    # method name -> function of every method defined on cls, unwrapped from decorators such as idempotent
+    # so that cProfile and tracemalloc attribute the method's body rather than the decorator's wrapper
+    return {name: inspect.unwrap(member) for name, member in vars(cls).items() if inspect.isfunction(member)}
+
+def _label(function_key: tuple) -> str:
+    # flame graph frame name of a cProfile function key (filename, first line, name)
+    filename, _, name = function_key
+    # built-in functions have no file, their name already reads like "<method 'append' of 'list' objects>"
+    return name if filename == "~" else f"{os.path.basename(filename)}:{name}"
+
+class CpuProfile:
+    # cProfile run of a workload
+
+    def __init__(self, system, operations: list):
+        self.operations = len(operations)
+        self.profiler = cProfile.Profile()
+        start = time.perf_counter()
+        # method name -> [calls that raised, first exception raised]
+        self.failures = self.profiler.runcall(run_operations, system, operations)
+        self.elapsed = time.perf_counter() - start
+        # function key -> (primitive calls, calls, own time, total time, callers), see pstats
+        self.stats = pstats.Stats(self.profiler).stats
+
+    def methods(self) -> dict[str, MethodStats]:
+        # MethodStats of every BankingSystemImpl method called during the run, nested calls included
+        # (process_cashbacks is mostly called by deposit, pay, transfer and get_balance, and is reported on its own)
+        keys = {
+            (function.__code__.co_filename, function.__code__.co_firstlineno, function.__code__.co_name): name
+            for name, function in method_functions().items()
+        }
+        return {
+            keys[key]: MethodStats(calls, own_time, total_time)
+            for key, (_, calls, own_time, total_time, _) in self.stats.items() if key in keys
+        }
+
+    def hotspots(self, n: int) -> list[tuple[str, MethodStats]]:
+        # the n functions with the most own time, from any module
+        entries = sorted(self.stats.items(), key=lambda item: -item[1][2])[:n]
+        return [(_label(key), MethodStats(calls, own_time, total_time)) for key, (_, calls, own_time, total_time, _) in entries]
+
+    def collapsed_stacks(self, min_time: float = 1e-6) -> dict[str, float]:
+        # "frame;frame;frame" call stack -> own seconds spent at its top frame, for flamegraph.pl and speedscope
+        # cProfile only keeps caller -> callee edges, so a function's time is apportioned between the stacks
+        # reaching it in proportion to the time each caller spent calling it (like gprof); paths below min_time
+        # seconds are dropped and recursive calls are folded into the outermost frame
+        callees = {}
+        for key, (_, _, _, _, callers) in self.stats.items():
+            for caller, edge in callers.items():
+                callees.setdefault(caller, []).append((key, edge[3]))
+        stacks = {}
+        pending = [((key, ), entry[3]) for key, entry in self.stats.items() if not entry[4]]
+        while pending:
+            path, path_time = pending.pop()
+            _, _, own_time, total_time, _ = self.stats[path[-1]]
+            if total_time <= 0:
+                continue
+            # fraction of the function's time spent under this path
+            share = path_time / total_time
+            stack = ";".join(_label(key) for key in path)
+            stacks[stack] = stacks.get(stack, 0.0) + own_time * share
+            for callee, edge_time in callees.get(path[-1], ()):
+                if callee not in path and edge_time * share >= min_time:
+                    pending.append((path + (callee, ), edge_time * share))
+        return stacks
+
+    def write_collapsed(self, path: str):
+        # one "stack microseconds" line per stack
+        with open(path, "w") as file:
+            for stack, seconds in sorted(self.collapsed_stacks().items()):
+                if round(seconds * 1e6):
+                    file.write(f"{stack} {round(seconds * 1e6)}\n")
+
+    def format(self, top: int = 15) -> str:
+        methods = sorted(self.methods().items(), key=lambda item: -item[1].total_time)
+        lines = [
+            f"{self.operations} operations in {self.elapsed:.3f} s under cProfile",
+            *format_failures(self.failures),
+            f"{'method':>28} {'calls':>9} {'own ms':>10} {'total ms':>10} {'us/call':>9} {'% run':>6}",
+        ]
+        for name, stats in methods:
+            lines.append(
+                f"{name:>28} {stats.calls:>9} {stats.own_time * 1e3:>10.1f} {stats.total_time * 1e3:>10.1f} "
+                f"{stats.total_time / stats.calls * 1e6:>9.2f} {stats.total_time / self.elapsed * 100:>6.1f}"
+            )
+        lines += ["", f"top {top} functions by own time", f"{'calls':>9} {'own ms':>10} {'total ms':>10}  function"]
+        for label, stats in self.hotspots(top):
+            lines.append(f"{stats.calls:>9} {stats.own_time * 1e3:>10.1f} {stats.total_time * 1e3:>10.1f}  {label}")
+        return "\n".join(lines)
+
+class MemoryProfile:
+    # tracemalloc run of a workload: memory allocated by each top-level call, and where the memory still held at
+    # the end of the run was allocated
+    # run separately from CpuProfile, tracemalloc slows every allocation down and would distort the timings
+
+    def __init__(self, system, operations: list, frames: int = 32):
+        self.operations = len(operations)
+        # method name -> [calls, net bytes allocated by its calls, largest peak of a single call above its start]
+        self.calls = {}
+        # method name -> [calls that raised, first exception raised]
+        self.failures = {}
+        tracemalloc.start(frames)
+        try:
+            for operation in operations:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                run_operations(system, (operation, ), self.failures)
+                current, peak = tracemalloc.get_traced_memory()
+                entry = self.calls.setdefault(operation[0], [0, 0, 0])
+                entry[0] += 1
+                entry[1] += current - before
+                entry[2] = max(entry[2], peak - before)
+            self.snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+            ])
+        finally:
+            tracemalloc.stop()
+
+    def retained_by_method(self) -> dict[str, list[int]]:
+        # BankingSystemImpl method -> [bytes, blocks] still allocated at the end of the run, each block attributed
+        # to the innermost method on its allocation traceback (blocks allocated by helpers such as Account or the
+        # sketches count towards the method that called them)
+        ranges = {}
+        for name, function in method_functions().items():
+            source_lines, first_line = inspect.getsourcelines(function)
+            ranges.setdefault(function.__code__.co_filename, []).append((first_line, first_line + len(source_lines), name))
+        retained = {}
+        for trace in self.snapshot.traces:
+            # frames are ordered from the oldest to the most recent call
+            for frame in reversed(trace.traceback):
+                name = next((name for start, end, name in ranges.get(frame.filename, ()) if start <= frame.lineno < end), None)
+                if name is not None:
+                    entry = retained.setdefault(name, [0, 0])
+                    entry[0] += trace.size
+                    entry[1] += 1
+                    break
+        return retained
+
+    def collapsed_stacks(self) -> dict[str, int]:
+        # "frame;frame;frame" allocation traceback -> bytes still allocated by it, for memory flame graphs
+        stacks = {}
+        for trace in self.snapshot.traces:
+            stack = ";".join(f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in trace.traceback)
+            stacks[stack] = stacks.get(stack, 0) + trace.size
+        return stacks
+
+    def write_collapsed(self, path: str):
+        # one "stack bytes" line per allocation traceback
+        with open(path, "w") as file:
+            for stack, size in sorted(self.collapsed_stacks().items()):
+                file.write(f"{stack} {size}\n")
+
+    def format(self, top: int = 15) -> str:
+        lines = [
+            f"{self.operations} operations under tracemalloc",
+            *format_failures(self.failures),
+            f"{'method':>28} {'calls':>9} {'net KiB':>10} {'B/call':>9} {'peak B':>9}",
+        ]
+        for name, (calls, net, peak) in sorted(self.calls.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:>28} {calls:>9} {net / 1024:>10.1f} {net / calls:>9.0f} {peak:>9}")
+        lines += ["", "retained at the end of the run, by allocating method", f"{'method':>28} {'KiB':>10} {'blocks':>9}"]
+        for name, (size, blocks) in sorted(self.retained_by_method().items(), key=lambda item: -item[1][0]):
+            lines.append(f"{name:>28} {size / 1024:>10.1f} {blocks:>9}")
+        lines += ["", f"top {top} allocation sites", f"{'KiB':>10} {'blocks':>9}  line"]
+        for statistic in self.snapshot.statistics("lineno")[:top]:
+            frame = statistic.traceback[0]
+            lines.append(f"{statistic.size / 1024:>10.1f} {statistic.count:>9}  {os.path.basename(frame.filename)}:{frame.lineno}")
+        return "\n".join(lines)
@@ -0,0 +1,208 @@
+from typing import NamedTuple
+import pickle
+import struct
+import time
+
+# a trace file is MAGIC and an OPTIONS record followed by records, each a fixed RECORD header and a payload:
+#   kind        OPTIONS (payload is the pickled keyword arguments the recorded system was constructed with),
+#               DEFINE (payload is a method name, given the next free method index), CALL or RAISE
+#   method      index of the method called, as numbered by the DEFINE records before it
+#   offset      nanoseconds between the start of recording and the start of the call
+#   size        payload length in bytes
+# CALL payloads are pickled (arguments, result) and RAISE payloads (arguments, exception class name), where
+# arguments is the pickled (args, kwargs), serialized before the call so a call whose arguments cannot be pickled
+# fails before it changes the system; results that are not plain values are recorded as an OpaqueResult
+# method names are written once per file, so a record costs the header plus the pickled arguments and result
+MAGIC = b"BKTRACE2"
+RECORD = struct.Struct("<BHqI")
+DEFINE = 0
+CALL = 1
+RAISE = 2
+OPTIONS = 3
+# types results are recorded as is; containers must only hold these too (NamedTuples like AuditResult are tuples)
+VALUE_TYPES = (type(None), bool, int, float, str, bytes)
+
+class TraceEntry(NamedTuple):
+    offset: int
+    method: str
+    args: tuple
+    kwargs: dict
+    # return value of the call, or the exception class name if raised is True
+    result: object
+    raised: bool = False
+
+class OpaqueResult(NamedTuple):
+    # stands in for a result that is not a plain value, e.g. the context manager of bulk_load or the system
+    # returned by fork, which would be large or impossible to pickle; a replay only checks the result's type
+    type_name: str
+
+class TraceRecorder:
+    # wraps a system and records every public method call made through it, with its result, into a trace file
+    # attribute reads and private methods are passed through without being recorded
+    # options are the keyword arguments system was constructed with, so a replay can construct an equivalent one
+
+    def __init__(self, system, path: str, options=None):
+        self.system = system
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        data = pickle.dumps(options or {}, pickle.HIGHEST_PROTOCOL)
+        self.file.write(RECORD.pack(OPTIONS, 0, 0, len(data)) + data)
+        # method name -> index used in the records
+        self.methods = {}
+        self.start = time.perf_counter_ns()
+
+    def __getattr__(self, name):
+        attribute = getattr(self.system, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        def recorded(*args, **kwargs):
+            offset = time.perf_counter_ns() - self.start
+            arguments = pickle.dumps((args, kwargs), pickle.HIGHEST_PROTOCOL)
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as error:
+                self._write(RAISE, name, offset, (arguments, type(error).__name__))
+                raise
+            recorded_result = result if _is_value(result) else OpaqueResult(type(result).__name__)
+            self._write(CALL, name, offset, (arguments, recorded_result))
+            return result
+        return recorded
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write(self, kind: int, name: str, offset: int, payload):
+        method = self.methods.get(name)
+        if method is None:
+            method = self.methods[name] = len(self.methods)
+            data = name.encode("utf-8")
+            self.file.write(RECORD.pack(DEFINE, method, 0, len(data)) + data)
+        data = pickle.dumps(payload, pickle.HIGHEST_PROTOCOL)
+        self.file.write(RECORD.pack(kind, method, offset, len(data)) + data)
+
+def _is_value(result) -> bool:
+    if isinstance(result, VALUE_TYPES):
+        return True
+    if type(result) in (list, set, frozenset) or isinstance(result, tuple):
+        return all(_is_value(item) for item in result)
+    if type(result) is dict:
+        return all(_is_value(key) and _is_value(value) for key, value in result.items())
+    return False
+
+def read_trace_options(path: str) -> dict:
+    # keyword arguments the system recorded into path was constructed with
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an operation trace")
+        kind, _, _, size = RECORD.unpack(file.read(RECORD.size))
+        if kind != OPTIONS:
+            raise ValueError(f"{path} has no options record")
+        return pickle.loads(file.read(size))
+
+def read_trace(path: str):
+    # yields the TraceEntry of every recorded call, in recording order
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an operation trace")
+        methods = []
+        while True:
+            header = file.read(RECORD.size)
+            if not header:
+                return
+            if len(header) < RECORD.size:
+                raise ValueError(f"{path} ends with a truncated record")
+            kind, method, offset, size = RECORD.unpack(header)
+            data = file.read(size)
+            if kind == OPTIONS:
+                continue
+            if kind == DEFINE:
+                methods.append(data.decode("utf-8"))
+                continue
+            arguments, result = pickle.loads(data)
+            args, kwargs = pickle.loads(arguments)
+            yield TraceEntry(offset, methods[method], args, kwargs, result, kind == RAISE)
+
+def record_test_case(test, path: str) -> bool:
+    # runs a unittest test case whose setUp creates self.system with every system call recorded into path
+    # (the level tests construct their systems with the default options)
+    # returns whether the test passed; the trace holds the calls made up to a failure either way
+    test.setUp()
+    recorder = TraceRecorder(test.system, path)
+    test.system = recorder
+    try:
+        getattr(test, test._testMethodName)()
+        return True
+    except Exception:
+        return False
+    finally:
+        recorder.close()
+
+class ReplayReport:
+    # outcome of replaying a trace: counts, verification failures and per-method latencies in nanoseconds
+
+    def __init__(self):
+        self.operations = 0
+        self.elapsed = 0.0
+        # (entry index, TraceEntry, actual result) for every call whose result differed from the recorded one
+        self.mismatches = []
+        # method name -> latencies of its calls
+        self.latencies = {}
+
+    @property
+    def throughput(self) -> float:
+        # operations per second of wall-clock time, including any pacing delays
+        return self.operations / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, method: str, q: float) -> int:
+        latencies = sorted(self.latencies[method])
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def format(self) -> str:
+        lines = [
+            f"{self.operations} operations in {self.elapsed:.3f} s ({self.throughput:,.0f} ops/s), "
+            f"{len(self.mismatches)} mismatches",
+            f"{'method':>20} {'calls':>9} {'mean us':>9} {'p50 us':>9} {'p99 us':>9} {'max us':>9}",
+        ]
+        for method, latencies in sorted(self.latencies.items()):
+            lines.append(
+                f"{method:>20} {len(latencies):>9} {sum(latencies) / len(latencies) / 1000:>9.2f} "
+                f"{self.percentile(method, 0.5) / 1000:>9.2f} {self.percentile(method, 0.99) / 1000:>9.2f} "
+                f"{max(latencies) / 1000:>9.2f}"
+            )
+        return "\n".join(lines)
+
+def replay_trace(system, entries, paced: bool = False, speed: float = 1.0, verify: bool = True) -> ReplayReport:
+    # re-executes trace entries against system, back to back or, if paced, at the recorded offsets divided by speed
+    # entries should already be in memory (e.g. list(read_trace(path))) so reading the file is not timed
+    report = ReplayReport()
+    perf_counter_ns = time.perf_counter_ns
+    start = perf_counter_ns()
+    for index, entry in enumerate(entries):
+        if paced:
+            delay = start + entry.offset / speed - perf_counter_ns()
+            if delay > 0:
+                time.sleep(delay / 1e9)
+        method = getattr(system, entry.method)
+        call_start = perf_counter_ns()
+        try:
+            result = method(*entry.args, **entry.kwargs)
+            raised = False
+        except Exception as error:
+            result = type(error).__name__
+            raised = True
+        latency = perf_counter_ns() - call_start
+        report.latencies.setdefault(entry.method, []).append(latency)
+        if isinstance(entry.result, OpaqueResult) and not raised:
+            result = OpaqueResult(type(result).__name__)
+        if verify and (raised != entry.raised or result != entry.result):
+            report.mismatches.append((index, entry, result))
+    report.elapsed = (perf_counter_ns() - start) / 1e9
+    report.operations = sum(len(latencies) for latencies in report.latencies.values())
+    return report
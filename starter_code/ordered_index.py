@@ -0,0 +1,63 @@
+import bisect
+
+class OrderedIndex:
+    # sorted multiset of comparable values, stored as a list of sorted buckets of at most 2 * load values
+    # add/remove cost O(log n) to locate the bucket plus a memmove within it, iterating the first k values is O(k)
+
+    def __init__(self, values=(), load: int = 512):
+        self.load = load
+        values = sorted(values)
+        self.buckets = [values[i:i + load] for i in range(0, len(values), load)]
+        # largest value of each bucket, used to locate the bucket of a value
+        self.maxes = [bucket[-1] for bucket in self.buckets]
+        self.size = len(values)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        for bucket in self.buckets:
+            yield from bucket
+
+    def add(self, value):
+        self.size += 1
+        if not self.buckets:
+            self.buckets.append([value])
+            self.maxes.append(value)
+            return
+        i = bisect.bisect_left(self.maxes, value)
+        if i == len(self.buckets):
+            # larger than every value: append to the last bucket
+            i -= 1
+            self.buckets[i].append(value)
+            self.maxes[i] = value
+        else:
+            bisect.insort(self.buckets[i], value)
+        if len(self.buckets[i]) > 2 * self.load:
+            # split an overgrown bucket in half
+            bucket = self.buckets[i]
+            self.buckets[i:i + 1] = [bucket[:self.load], bucket[self.load:]]
+            self.maxes[i:i + 1] = [bucket[self.load - 1], bucket[-1]]
+
+    def remove(self, value):
+        i = bisect.bisect_left(self.maxes, value)
+        bucket = self.buckets[i] if i < len(self.buckets) else None
+        j = bisect.bisect_left(bucket, value) if bucket else 0
+        if bucket is None or j == len(bucket) or bucket[j] != value:
+            raise ValueError(f"{value!r} not in index")
+        del bucket[j]
+        self.size -= 1
+        if not bucket:
+            del self.buckets[i]
+            del self.maxes[i]
+        else:
+            self.maxes[i] = bucket[-1]
+
+    def first(self, k: int) -> list:
+        # the k smallest values in order
+        result = []
+        for bucket in self.buckets:
+            if len(result) >= k:
+                break
+            result.extend(bucket[:k - len(result)])
+        return result
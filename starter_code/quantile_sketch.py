@@ -0,0 +1,87 @@
+import math
+
+class QuantileSketch:
+    # mergeable streaming quantile sketch over integers with a relative-error guarantee
+    # (the logarithmic bucketing of DDSketch): value v > 0 is counted in bucket ceil(log_gamma(v)),
+    # gamma = (1 + alpha) / (1 - alpha), and bucket i reports 2 * gamma**i / (gamma + 1); negative values are
+    # counted the same way by magnitude in a mirrored store (balances can go negative through negative deposits)
+    # error bound: for any q, quantile(q) is within a factor (1 +- alpha) of the exact q-quantile of the values
+    # added (zeros are counted exactly); memory is one counter per occupied bucket, i.e. at most
+    # log_gamma(max / min) + 1 buckets -- about 1100 for alpha = 0.01 across values from 1 to 10**9
+    # unlike rank-based sketches (KLL, t-digest) counts can also be removed, which lets a sketch follow
+    # the current balances of all accounts as they change
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        # bucket index -> number of values in that bucket
+        self.buckets = {}
+        # bucket index of -v -> number of negative values v in that bucket
+        self.negative_buckets = {}
+        # number of zero values, kept outside the logarithmic buckets
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: int, count: int = 1):
+        self.count += count
+        if value == 0:
+            self.zero_count += count
+            return
+        buckets = self.buckets if value > 0 else self.negative_buckets
+        index = math.ceil(math.log(abs(value)) / self.log_gamma)
+        buckets[index] = buckets.get(index, 0) + count
+
+    def remove(self, value: int, count: int = 1):
+        # removes values previously added, e.g. an account's old balance when it changes
+        self.count -= count
+        if value == 0:
+            self.zero_count -= count
+            return
+        buckets = self.buckets if value > 0 else self.negative_buckets
+        index = math.ceil(math.log(abs(value)) / self.log_gamma)
+        remaining = buckets[index] - count
+        if remaining:
+            buckets[index] = remaining
+        else:
+            del buckets[index]
+
+    def merge(self, other: "QuantileSketch"):
+        # folds other into this sketch; both must use the same relative accuracy
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different relative accuracy")
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for buckets, other_buckets in ((self.buckets, other.buckets), (self.negative_buckets, other.negative_buckets)):
+            for index, count in other_buckets.items():
+                buckets[index] = buckets.get(index, 0) + count
+
+    def quantile(self, q: float) -> float | None:
+        # estimated q-quantile (0 <= q <= 1), or None for an empty sketch
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        # negative values in ascending order, i.e. by decreasing magnitude
+        seen = 0
+        for index in sorted(self.negative_buckets, reverse=True):
+            seen += self.negative_buckets[index]
+            if seen > rank:
+                return -2 * self.gamma ** index / (self.gamma + 1)
+        seen += self.zero_count
+        if seen > rank:
+            return 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        # rounding left rank at the very top: the largest value
+        if self.buckets:
+            return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+        if self.zero_count:
+            return 0
+        return -2 * self.gamma ** min(self.negative_buckets) / (self.gamma + 1)
+
+    def quantiles(self, qs) -> dict:
+        return {q: self.quantile(q) for q in qs}
@@ -0,0 +1,210 @@
+from multiprocessing import resource_tracker, shared_memory
+import array
+import bisect
+import multiprocessing
+import os
+
+# a published snapshot is one shared memory block laid out as:
+#   header      HEADER_FIELDS int64 values (see below)
+#   ids         account IDs, UTF-8 encoded and concatenated, padded to a multiple of 8 bytes
+#   per account int64 arrays: balance, total_outgoing, created_at, merged_at, history_offsets (n + 1 entries),
+#               id_offsets (n + 1 entries, account i's ID is ids[id_offsets[i]:id_offsets[i + 1]], so IDs may
+#               contain any character)
+#   history     int64 arrays of timestamps and balances, each account's entries sorted by timestamp
+#   ranking     int64 indexes of valid accounts, sorted like top_spenders
+# merged accounts are published alongside valid ones, with merged_at set to their merge timestamp
+HEADER_FIELDS = 5
+INT_SIZE = 8
+# merged_at value of accounts that are still valid
+NOT_MERGED = 2 ** 63 - 1
+
+def publish_snapshot(system, name=None) -> shared_memory.SharedMemory:
+    # copies the balances, total_outgoing values and balance histories of system into a new shared memory block
+    # the caller owns the returned block and must close() and unlink() it once readers have moved on
+    # the copy is O(accounts + balance history entries) and runs on the calling thread, so the writer pays for
+    # every publish; only the queries are taken off the write path
+    entries = [(account, NOT_MERGED) for account in system.accounts.values()]
+    entries += list(system.merged_accounts.values())
+    num_valid = len(system.accounts)
+
+    encoded_ids = [account.id.encode("utf-8") for account, _ in entries]
+    ids = b"".join(encoded_ids)
+    id_offsets = [0]
+    for encoded_id in encoded_ids:
+        id_offsets.append(id_offsets[-1] + len(encoded_id))
+    ids_size = (len(ids) + INT_SIZE - 1) // INT_SIZE * INT_SIZE
+    histories = [sorted(account.balance_history.items()) for account, _ in entries]
+    num_history = sum(len(history) for history in histories)
+    # valid accounts only, ordered by decreasing total_outgoing, then ascending account ID
+    ranking = sorted(range(num_valid), key=lambda i: (-entries[i][0].total_outgoing, entries[i][0].id))
+
+    num_accounts = len(entries)
+    num_ints = HEADER_FIELDS + 6 * num_accounts + 2 + 2 * num_history + num_valid
+    block = shared_memory.SharedMemory(name=name, create=True, size=max(1, ids_size + num_ints * INT_SIZE))
+    header = [num_accounts, num_valid, num_history, len(ids), ids_size]
+    block.buf[HEADER_FIELDS * INT_SIZE:HEADER_FIELDS * INT_SIZE + len(ids)] = ids
+
+    ints = block.buf[HEADER_FIELDS * INT_SIZE + ids_size:].cast("q")
+    position = 0
+    for column in (
+        [account.balance for account, _ in entries],
+        [account.total_outgoing for account, _ in entries],
+        [account.creation_timestamp for account, _ in entries],
+        [merged_at for _, merged_at in entries],
+    ):
+        ints[position:position + num_accounts] = _int_array(column)
+        position += num_accounts
+    offsets = [0]
+    for history in histories:
+        offsets.append(offsets[-1] + len(history))
+    ints[position:position + num_accounts + 1] = _int_array(offsets)
+    position += num_accounts + 1
+    ints[position:position + num_accounts + 1] = _int_array(id_offsets)
+    position += num_accounts + 1
+    ints[position:position + num_history] = _int_array([timestamp for history in histories for timestamp, _ in history])
+    position += num_history
+    ints[position:position + num_history] = _int_array([balance for history in histories for _, balance in history])
+    position += num_history
+    ints[position:position + num_valid] = _int_array(ranking)
+    ints.release()
+
+    header_view = block.buf[:HEADER_FIELDS * INT_SIZE].cast("q")
+    header_view[:] = _int_array(header)
+    header_view.release()
+    return block
+
+def _int_array(values):
+    # int64 memoryview of values, assignable into slices of a shared block
+    return memoryview(array.array("q", values))
+
+class SnapshotView:
+    # read-only queries answered directly from a published snapshot block
+    # numeric columns are memoryviews over the shared buffer, so no balances or histories are copied;
+    # only the account ID -> index lookup table is built locally
+
+    def __init__(self, block: shared_memory.SharedMemory):
+        self.block = block
+        header = block.buf[:HEADER_FIELDS * INT_SIZE].cast("q")
+        num_accounts, num_valid, num_history, ids_length, ids_size = header.tolist()
+        header.release()
+        self.num_valid = num_valid
+        ids_start = HEADER_FIELDS * INT_SIZE
+        ints = block.buf[ids_start + ids_size:].cast("q")
+        self.views = [ints]
+        position = 0
+        columns = []
+        for length in (num_accounts, num_accounts, num_accounts, num_accounts, num_accounts + 1, num_accounts + 1,
+                       num_history, num_history, num_valid):
+            columns.append(ints[position:position + length])
+            position += length
+        self.views.extend(columns)
+        (self.balance, self.total_outgoing, self.created_at, self.merged_at, self.history_offsets, id_offsets,
+         self.history_times, self.history_balances, self.ranking) = columns
+
+        ids = bytes(block.buf[ids_start:ids_start + ids_length])
+        id_offsets = id_offsets.tolist()
+        self.ids = [ids[id_offsets[i]:id_offsets[i + 1]].decode("utf-8") for i in range(num_accounts)]
+        # valid accounts take precedence over merged accounts that had the same ID, like in get_balance
+        self.index = {}
+        for i in range(num_accounts - 1, -1, -1):
+            self.index[self.ids[i]] = i
+
+    def get_balance(self, account_id: str, time_at: int) -> int | None:
+        # same rules as BankingSystemImpl.get_balance, evaluated against the published state
+        i = self.index.get(account_id)
+        if i is None:
+            return None
+        if self.merged_at[i] <= time_at or self.created_at[i] > time_at:
+            return None
+        start = self.history_offsets[i]
+        end = self.history_offsets[i + 1]
+        position = bisect.bisect_right(self.history_times, time_at, start, end)
+        return self.history_balances[position - 1]
+
+    def top_spenders(self, n: int) -> list[str]:
+        return [f"{self.ids[i]}({self.total_outgoing[i]})" for i in self.ranking[:n].tolist()]
+
+    def release(self):
+        # memoryviews must be released before the underlying block can be closed
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+
+# per-process state of read workers: the snapshot block currently attached to and its view
+_worker_snapshot = {"name": None, "block": None, "view": None}
+
+def _attach(name: str) -> SnapshotView:
+    # (re)attaches a worker process to the named snapshot block, reusing the mapping while it is current
+    if _worker_snapshot["name"] != name:
+        if _worker_snapshot["view"] is not None:
+            _worker_snapshot["view"].release()
+            _worker_snapshot["block"].close()
+        block = shared_memory.SharedMemory(name=name)
+        _worker_snapshot.update(name=name, block=block, view=SnapshotView(block))
+    return _worker_snapshot["view"]
+
+def _worker_get_balances(name: str, queries: list[tuple[str, int]]) -> list:
+    view = _attach(name)
+    return [view.get_balance(account_id, time_at) for account_id, time_at in queries]
+
+def _worker_top_spenders(name: str, n: int) -> list[str]:
+    return _attach(name).top_spenders(n)
+
+class AnalyticsReadPool:
+    # pool of read-only worker processes answering get_balance and top_spenders queries from a shared snapshot
+    # the writer keeps mutating system as usual and calls publish() periodically; queries see the state of the
+    # last publish (cashbacks that fall due after it are not applied)
+    # queries never block the writer, but each publish copies the whole ledger on the writer's thread (see
+    # publish_snapshot), so publishing less often trades freshness for writer throughput
+
+    def __init__(self, system, workers=None, chunk_size=1000):
+        self.system = system
+        self.chunk_size = chunk_size
+        # workers must share the writer's resource tracker: a tracker started inside a worker would unlink the
+        # snapshot blocks it attached to when the worker exits
+        resource_tracker.ensure_running()
+        self.pool = multiprocessing.Pool(workers or os.cpu_count())
+        self.block = None
+        # snapshots replaced by a newer publish, unlinked once no query can still be using them
+        self.retired_blocks = []
+
+    def publish(self, timestamp: int):
+        # settles cashbacks due at timestamp so the snapshot matches what get_balance would see at that time
+        self.system.process_cashbacks(timestamp)
+        if self.block is not None:
+            self.retired_blocks.append(self.block)
+        self.block = publish_snapshot(self.system)
+        # queries are synchronous, so once publish returns no query references older blocks; workers that still
+        # map them keep the memory alive until they re-attach
+        for block in self.retired_blocks:
+            block.close()
+            block.unlink()
+        self.retired_blocks = []
+
+    def get_balances(self, queries: list[tuple[str, int]]) -> list:
+        # answers (account_id, time_at) queries in parallel, results are returned in query order
+        chunks = [queries[i:i + self.chunk_size] for i in range(0, len(queries), self.chunk_size)]
+        results = self.pool.starmap(_worker_get_balances, [(self._block_name(), chunk) for chunk in chunks])
+        return [result for chunk in results for result in chunk]
+
+    def top_spenders(self, n: int) -> list[str]:
+        return self.pool.apply(_worker_top_spenders, (self._block_name(), n))
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _block_name(self) -> str:
+        if self.block is None:
+            raise RuntimeError("publish() must be called before querying")
+        return self.block.name
@@ -0,0 +1,73 @@
+import heapq
+
+class SpaceSaving:
+    # weighted Space-Saving heavy-hitters summary holding at most capacity counters
+    # every tracked key's count overestimates its true total by at most its recorded error, and the error of
+    # any counter is at most total_weight / capacity, so every key whose true total exceeds that bound is tracked
+    # (capacity = ceil(1 / epsilon) gives error <= epsilon * total_weight)
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        # key -> estimated total (an overestimate)
+        self.counts = {}
+        # key -> maximum overestimation of counts[key]
+        self.errors = {}
+        # lazy min-heap of (count, key); entries whose count is stale are skipped when popped
+        self.heap = []
+        # sum of all weights added, bounds the error of every counter
+        self.total_weight = 0
+
+    def add(self, key, weight: int):
+        self.total_weight += weight
+        if key in self.counts:
+            self.counts[key] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = weight
+            self.errors[key] = 0
+        else:
+            # replace the smallest counter: the new key inherits its count as possible overestimation
+            minimum, evicted = self._pop_min()
+            del self.counts[evicted]
+            del self.errors[evicted]
+            self.counts[key] = minimum + weight
+            self.errors[key] = minimum
+        heapq.heappush(self.heap, (self.counts[key], key))
+        # stale heap entries are dropped once they outnumber live counters
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(count, tracked_key) for tracked_key, count in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def remove(self, key):
+        # stops tracking key and returns its (count, error), or None if it was not tracked
+        if key not in self.counts:
+            return None
+        return self.counts.pop(key), self.errors.pop(key)
+
+    def merge_key(self, target, source):
+        # folds the counter of source into target, e.g. when account source is merged into account target
+        removed = self.remove(source)
+        if removed is None:
+            return
+        count, error = removed
+        # the weight was already counted in total_weight when it was first added
+        self.total_weight -= count - error
+        self.add(target, count - error)
+        self.errors[target] += error
+        self.counts[target] += error
+        heapq.heappush(self.heap, (self.counts[target], target))
+
+    def top(self, n: int) -> list[tuple]:
+        # top n (key, estimated count) pairs by decreasing count, ties by ascending key
+        return [(key, -negative_count) for negative_count, key in heapq.nsmallest(n, ((-count, key) for key, count in self.counts.items()))]
+
+    def error_bound(self) -> float:
+        # maximum overestimation of any reported count
+        return self.total_weight / self.capacity
+
+    def _pop_min(self):
+        while True:
+            count, key = heapq.heappop(self.heap)
+            if self.counts.get(key) == count:
+                return count, key
@@ -0,0 +1,69 @@
+import random
+import unittest
+from banking_system_impl import BankingSystemImpl
+from space_saving import SpaceSaving
+
+
+class SpaceSavingTests(unittest.TestCase):
+    """
+    Tests for the weighted Space-Saving summary.
+    """
+
+    failureException = Exception
+
+    def test_counts_are_bounded_overestimates(self):
+        rng = random.Random(11)
+        summary = SpaceSaving(20)
+        totals = {}
+        for _ in range(5000):
+            key = f'k{int(rng.paretovariate(1.2)) % 500}'
+            weight = rng.randint(1, 100)
+            summary.add(key, weight)
+            totals[key] = totals.get(key, 0) + weight
+        bound = summary.error_bound()
+        self.assertEqual(summary.total_weight, sum(totals.values()))
+        self.assertLessEqual(len(summary.counts), 20)
+        for key, count in summary.counts.items():
+            self.assertGreaterEqual(count, totals[key])
+            self.assertLessEqual(count - totals[key], bound)
+        # every key heavier than the error bound is tracked
+        for key, total in totals.items():
+            if total > bound:
+                self.assertIn(key, summary.counts)
+
+    def test_merge_key_folds_counts(self):
+        summary = SpaceSaving(3)
+        summary.add('a', 10)
+        summary.add('b', 5)
+        summary.merge_key('a', 'b')
+        self.assertEqual(summary.top(2), [('a', 15)])
+        self.assertEqual(summary.total_weight, 15)
+        summary.merge_key('a', 'missing')
+        self.assertEqual(summary.top(2), [('a', 15)])
+
+
+class ApproximateTopSpendersTests(unittest.TestCase):
+    """
+    Tests for the opt-in approximate `top_spenders` mode.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl(approximate_top_spenders_capacity=10)
+
+    def test_matches_exact_ranking_within_capacity(self):
+        exact = BankingSystemImpl()
+        for system in (self.system, exact):
+            for i in range(1, 6):
+                system.create_account(i, f'account{i}')
+                system.deposit(10 + i, f'account{i}', 1000)
+            system.transfer(20, 'account1', 'account2', 300)
+            system.pay(21, 'account3', 500)
+            system.pay(22, 'account4', 100)
+            system.merge_accounts(23, 'account4', 'account1')
+        self.assertEqual(self.system.top_spenders(24, 2), exact.top_spenders(24, 2))
+        # accounts without outgoing money are not tracked by the summary
+        self.assertEqual(self.system.top_spenders(25, 3), ['account3(500)', 'account4(400)'])
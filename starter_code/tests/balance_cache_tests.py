@@ -0,0 +1,73 @@
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class BalanceCacheTests(unittest.TestCase):
+    """
+    Tests for the LRU cache of historical `get_balance` queries.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+
+    def test_repeated_query_is_a_hit(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertEqual(self.system.deposit(2, 'account1', 1000), 1000)
+        self.assertEqual(self.system.get_balance(3, 'account1', 2), 1000)
+        self.assertEqual(self.system.get_balance(4, 'account1', 2), 1000)
+        info = self.system.balance_cache_info()
+        self.assertEqual(info['hits'], 1)
+        self.assertEqual(info['misses'], 1)
+
+    def test_later_write_keeps_earlier_entries(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertEqual(self.system.deposit(2, 'account1', 1000), 1000)
+        self.assertEqual(self.system.get_balance(3, 'account1', 2), 1000)
+        self.assertEqual(self.system.deposit(4, 'account1', 500), 1500)
+        self.assertEqual(self.system.get_balance(5, 'account1', 2), 1000)
+        self.assertEqual(self.system.balance_cache_info()['hits'], 1)
+
+    def test_cashback_settlement_invalidates(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account1', 100), 100)
+        self.assertEqual(self.system.deposit(4, 'account2', 1000), 1000)
+        self.assertEqual(self.system.get_balance(5, 'account1', 86400010), 100)
+        self.assertEqual(self.system.pay(6, 'account2', 500), 'payment1')
+        # the pending cashback is re-owned by account1 and only settled by the next get_balance
+        self.assertTrue(self.system.merge_accounts(86400011, 'account1', 'account2'))
+        self.assertEqual(self.system.get_balance(86400012, 'account1', 86400010), 610)
+
+    def test_merge_invalidates_both_accounts(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account1', 100), 100)
+        self.assertEqual(self.system.deposit(4, 'account2', 200), 200)
+        self.assertEqual(self.system.get_balance(5, 'account1', 10), 100)
+        self.assertEqual(self.system.get_balance(6, 'account2', 10), 200)
+        self.assertTrue(self.system.merge_accounts(7, 'account1', 'account2'))
+        self.assertEqual(self.system.get_balance(8, 'account1', 10), 300)
+        self.assertIsNone(self.system.get_balance(9, 'account2', 10))
+        self.assertEqual(self.system.get_balance(10, 'account2', 5), 200)
+
+    def test_recreated_account_drops_merged_history(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account2', 200), 200)
+        self.assertEqual(self.system.get_balance(4, 'account2', 3), 200)
+        self.assertTrue(self.system.merge_accounts(5, 'account1', 'account2'))
+        self.assertTrue(self.system.create_account(6, 'account2'))
+        self.assertIsNone(self.system.get_balance(7, 'account2', 3))
+
+    def test_cache_is_bounded(self):
+        system = BankingSystemImpl(balance_cache_size=2)
+        self.assertTrue(system.create_account(1, 'account1'))
+        for time_at in range(1, 6):
+            self.assertEqual(system.get_balance(10, 'account1', time_at), 0)
+        self.assertEqual(system.balance_cache_info()['size'], 2)
+        self.assertEqual(system.get_balance(11, 'account1', 5), 0)
+        self.assertEqual(system.balance_cache_info()['hits'], 1)
@@ -0,0 +1,63 @@
+import random
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class BulkBalancesTests(unittest.TestCase):
+    """
+    Tests for answering many get_balance queries with get_balances_bulk.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+
+    def test_matches_get_balance(self):
+        rng = random.Random(5)
+        account_ids = [f'account{i}' for i in range(20)]
+        for i, account_id in enumerate(account_ids):
+            self.system.create_account(i + 1, account_id)
+        timestamp = 100
+        for _ in range(2000):
+            timestamp += rng.randint(1, 5000)
+            source, target = rng.sample(account_ids, 2)
+            action = rng.random()
+            if action < 0.4:
+                self.system.deposit(timestamp, source, rng.randint(1, 1000))
+            elif action < 0.7:
+                self.system.transfer(timestamp, source, target, rng.randint(1, 500))
+            elif action < 0.95:
+                self.system.pay(timestamp, source, rng.randint(1, 500))
+            elif self.system.merge_accounts(timestamp, target, source):
+                # merged IDs are re-created so queries hit both the old and the new account
+                self.system.create_account(timestamp + 1, source)
+        self.system.process_cashbacks(timestamp + 86400000)
+
+        queries = [(rng.choice(account_ids + ['missing']), rng.randint(0, timestamp)) for _ in range(3000)]
+        expected = [self.system.get_balance(timestamp, account_id, time_at) for account_id, time_at in queries]
+        self.assertEqual(self.system.get_balances_bulk(timestamp, queries), expected)
+        self.assertTrue(any(result is None for result in expected))
+
+    def test_processes_cashbacks_due_by_the_latest_query(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertEqual(self.system.deposit(2, 'account1', 1000), 1000)
+        self.assertEqual(self.system.pay(3, 'account1', 500), 'payment1')
+        self.assertEqual(
+            self.system.get_balances_bulk(4, [('account1', 86400003), ('account1', 2), ('account1', 0)]),
+            [510, 1000, None],
+        )
+        self.assertEqual(self.system.get_payment_status(5, 'account1', 'payment1'), 'CASHBACK_RECEIVED')
+
+    def test_merged_accounts(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account2', 100), 100)
+        self.assertTrue(self.system.merge_accounts(4, 'account1', 'account2'))
+        self.assertEqual(
+            self.system.get_balances_bulk(5, [('account2', 3), ('account2', 4), ('account1', 4), ('account3', 4)]),
+            [100, None, 100, None],
+        )
+        self.assertEqual(self.system.get_balances_bulk(6, []), [])
@@ -0,0 +1,80 @@
+import gc
+import unittest
+import weakref
+from banking_system_impl import BankingSystemImpl
+
+
+class BulkLoadTests(unittest.TestCase):
+    """
+    Tests for the bulk_load context.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+        cls.reference = BankingSystemImpl()
+
+    def tearDown(self):
+        gc.unfreeze()
+
+    def restore(self, system):
+        for i in range(100):
+            system.create_account(i, f'account{i}')
+        for i in range(100):
+            system.deposit(100 + i, f'account{i}', 1000 + i)
+            system.pay(200 + i, f'account{i}', 100)
+        system.transfer(86400250, 'account1', 'account2', 50)
+
+    def test_results_match_plain_restore(self):
+        with self.system.bulk_load():
+            self.restore(self.system)
+        self.restore(self.reference)
+        self.assertEqual(self.system.top_spenders(86400300, 5), self.reference.top_spenders(86400300, 5))
+        for i in range(100):
+            self.assertEqual(
+                self.system.get_balance(86400300, f'account{i}', 86400300),
+                self.reference.get_balance(86400300, f'account{i}', 86400300),
+            )
+        self.assertEqual(
+            self.system.get_payment_status(86400300, 'account99', 'payment100'),
+            self.reference.get_payment_status(86400300, 'account99', 'payment100'),
+        )
+
+    def test_gc_is_suspended_and_restored(self):
+        self.assertTrue(gc.isenabled())
+        with self.system.bulk_load():
+            self.assertFalse(gc.isenabled())
+            self.system.create_account(1, 'account1')
+        self.assertTrue(gc.isenabled())
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+        gc.disable()
+        try:
+            with self.system.bulk_load():
+                pass
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
+    def test_gc_is_restored_on_error(self):
+        with self.assertRaises(KeyError):
+            with self.system.bulk_load():
+                raise KeyError('account1')
+        self.assertTrue(gc.isenabled())
+        self.assertEqual(gc.get_freeze_count(), 0)
+
+    def test_garbage_is_collected_before_freezing(self):
+        class Node:
+            pass
+
+        with self.system.bulk_load():
+            self.system.create_account(1, 'account1')
+            cycle = Node()
+            cycle.next = cycle
+            reference = weakref.ref(cycle)
+            del cycle
+        # frozen garbage would stay alive for the rest of the process
+        self.assertIsNone(reference())
@@ -0,0 +1,79 @@
+import unittest
+from banking_system_impl import BankingSystemImpl
+from change_stream import ChangeEvent, ChangeStream, SubscriberOverrun
+
+
+class ChangeStreamTests(unittest.TestCase):
+    """
+    Tests for the change-data-capture stream of balance changes.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+
+    def test_events_for_every_kind_of_change(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        subscriber = self.system.subscribe_changes(3)
+        self.assertEqual(self.system.deposit(4, 'account1', 1000), 1000)
+        self.assertEqual(self.system.transfer(5, 'account1', 'account2', 200), 800)
+        self.assertEqual(self.system.pay(6, 'account2', 100), 'payment1')
+        self.assertTrue(self.system.merge_accounts(7, 'account1', 'account2'))
+        changes = self.system.read_changes(86400006, subscriber)
+        self.assertEqual([(event.kind, event.account_id, event.amount, event.balance) for event in changes], [
+            ('deposit', 'account1', 1000, 1000),
+            ('transfer_in', 'account2', 200, 200),
+            ('transfer_out', 'account1', 200, 800),
+            ('payment', 'account2', 100, 100),
+            ('merge_in', 'account1', 100, 900),
+            ('cashback', 'account1', 2, 902),
+        ])
+        self.assertEqual(changes[3].payment_id, 'payment1')
+        self.assertEqual(changes[5].payment_id, 'payment1')
+        self.assertEqual(changes[4].counterparty, 'account2')
+        self.assertEqual([event.position for event in changes], list(range(6)))
+        self.assertEqual(self.system.read_changes(86400007, subscriber), [])
+
+    def test_subscribers_read_independently(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        first = self.system.subscribe_changes(2)
+        self.system.deposit(3, 'account1', 10)
+        second = self.system.subscribe_changes(4)
+        self.system.deposit(5, 'account1', 20)
+        self.system.deposit(6, 'account1', 30)
+        self.assertEqual([event.amount for event in self.system.read_changes(7, first, limit=2)], [10, 20])
+        self.assertEqual([event.amount for event in self.system.read_changes(8, second)], [20, 30])
+        self.assertEqual([event.amount for event in self.system.read_changes(9, first)], [30])
+        self.assertTrue(self.system.unsubscribe_changes(10, first))
+        self.assertFalse(self.system.unsubscribe_changes(11, first))
+        self.assertIsNone(self.system.read_changes(12, first))
+
+    def test_slow_subscriber_overrun(self):
+        system = BankingSystemImpl(change_stream_capacity=4)
+        self.assertTrue(system.create_account(1, 'account1'))
+        subscriber = system.subscribe_changes(2)
+        for i in range(10):
+            system.deposit(3 + i, 'account1', i)
+        with self.assertRaises(SubscriberOverrun) as raised:
+            system.read_changes(20, subscriber)
+        self.assertEqual(raised.exception.missed, 6)
+        self.assertEqual([event.amount for event in system.read_changes(21, subscriber)], [6, 7, 8, 9])
+        self.assertEqual(len(system.change_stream.buffer), 4)
+
+    def test_nothing_published_without_subscribers(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.system.deposit(2, 'account1', 10)
+        self.assertEqual(self.system.change_stream.next_position, 0)
+
+    def test_stream_lag(self):
+        stream = ChangeStream(2)
+        subscriber = stream.subscribe()
+        for position in range(3):
+            stream.publish(ChangeEvent(position, position, 'deposit', 'account1', 1, position + 1))
+        self.assertEqual(stream.lag(subscriber), 3)
+        with self.assertRaises(ValueError):
+            ChangeStream(0)
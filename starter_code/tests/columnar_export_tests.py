@@ -0,0 +1,86 @@
+import random
+import tempfile
+import unittest
+from banking_system_impl import BankingSystemImpl
+from columnar_export import NOT_MERGED, export_ledger, load_ledger
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipUnless(numpy, 'numpy is not installed')
+class ColumnarExportTests(unittest.TestCase):
+    """
+    Tests for exporting the ledger as columnar .npy files and memory-mapping them back.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+        cls.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_columns(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account2', 1000), 1000)
+        self.assertEqual(self.system.pay(4, 'account2', 100), 'payment1')
+        self.assertTrue(self.system.merge_accounts(5, 'account1', 'account2'))
+        self.assertEqual(self.system.pay(6, 'account1', 200), 'payment2')
+        self.system.process_cashbacks(86400004)
+
+        manifest = export_ledger(self.system, self.directory.name)
+        self.assertEqual(manifest['num_valid_accounts'], 1)
+        ledger = load_ledger(self.directory.name)
+        self.assertIsInstance(ledger.balance, numpy.memmap)
+        self.assertEqual(ledger.account_id.tolist(), ['account1', 'account2'])
+        self.assertEqual(ledger.balance.tolist(), [702, 900])
+        self.assertEqual(ledger.merged_at.tolist(), [NOT_MERGED, 5])
+        self.assertEqual(ledger.history_offsets.tolist(), [0, 4, 7])
+        self.assertEqual(ledger.payment_id.tolist(), ['payment1', 'payment2'])
+        self.assertEqual(ledger.payment_account.tolist(), ['account1', 'account1'])
+        self.assertEqual(ledger.cashback_received.tolist(), [True, False])
+        self.assertEqual(ledger.cashback_amount.tolist(), [2, 4])
+        self.assertEqual(
+            list(zip(ledger.merge_target.tolist(), ledger.merge_source.tolist(), ledger.merge_timestamp.tolist())),
+            [(0, 1, 5)],
+        )
+
+    def test_balances_match_get_balance(self):
+        rng = random.Random(2)
+        account_ids = [f'account{i}' for i in range(15)]
+        for i, account_id in enumerate(account_ids):
+            self.system.create_account(i + 1, account_id)
+        timestamp = 100
+        for _ in range(1500):
+            timestamp += rng.randint(1, 5000)
+            source, target = rng.sample(account_ids, 2)
+            action = rng.random()
+            if action < 0.4:
+                self.system.deposit(timestamp, source, rng.randint(1, 1000))
+            elif action < 0.7:
+                self.system.transfer(timestamp, source, target, rng.randint(1, 500))
+            elif action < 0.95:
+                self.system.pay(timestamp, source, rng.randint(1, 500))
+            elif self.system.merge_accounts(timestamp, target, source):
+                self.system.create_account(timestamp + 1, source)
+        self.system.process_cashbacks(timestamp)
+        export_ledger(self.system, self.directory.name)
+        ledger = load_ledger(self.directory.name)
+        for _ in range(2000):
+            account_id = rng.choice(account_ids + ['missing'])
+            time_at = rng.randint(0, timestamp)
+            self.assertEqual(ledger.get_balance(account_id, time_at), self.system.get_balance(timestamp, account_id, time_at))
+
+    def test_empty_ledger(self):
+        export_ledger(self.system, self.directory.name)
+        ledger = load_ledger(self.directory.name)
+        self.assertEqual(len(ledger.account_id), 0)
+        self.assertIsNone(ledger.get_balance('account1', 1))
@@ -0,0 +1,131 @@
+import gc
+import math
+import os
+import random
+import time
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+# state sizes the operations are measured at, each 4x the previous one
+SIZES = (2000, 8000, 32000)
+# declared complexity budget of each operation, as the largest acceptable growth exponent of its per-call time
+# in the state size: operations meant to be O(1) or O(log n) get 0.5, which a linear scan (exponent ~1) exceeds
+# even with timing noise, and top_spenders, which ranks every account, gets a linear budget
+BUDGETS = {
+    'create_account': 0.5,
+    'deposit': 0.5,
+    'transfer': 0.5,
+    'pay': 0.5,
+    'get_balance': 0.5,
+    'get_payment_status': 0.5,
+    'merge_accounts': 0.5,
+    'top_spenders': 1.3,
+}
+# calls timed per operation and size
+CALLS = {'top_spenders': 20}
+DEFAULT_CALLS = 500
+# each operation's calls are timed in this many chunks and the fastest chunk's per-call time is used, so a
+# scheduler hiccup or GC pause on a loaded machine only slows down one chunk
+CHUNKS = 5
+
+
+def build_system(n):
+    # n accounts with one payment each, plus account0 with a balance history of n entries
+    system = BankingSystemImpl()
+    for i in range(n):
+        system.create_account(i + 1, f'account{i}')
+    timestamp = n + 1
+    for i in range(n):
+        system.deposit(timestamp, f'account{i}', 1000)
+        system.pay(timestamp + 1, f'account{i}', 100)
+        system.deposit(timestamp + 2, 'account0', 1)
+        timestamp += 3
+    return system, timestamp
+
+
+def make_calls(operation, n, count, timestamp, rng):
+    # count (method_name, args) calls of operation against the state built by build_system(n), starting at timestamp;
+    # every call hits a different key so the balance cache cannot answer repeated queries
+    accounts = rng.sample(range(1, n), 2 * count)
+    calls = []
+    for i in range(count):
+        timestamp += 1
+        source, target = f'account{accounts[2 * i]}', f'account{accounts[2 * i + 1]}'
+        if operation == 'create_account':
+            args = (timestamp, f'new{i}')
+        elif operation == 'deposit':
+            args = (timestamp, source, 10)
+        elif operation == 'transfer':
+            args = (timestamp, source, target, 10)
+        elif operation == 'pay':
+            args = (timestamp, source, 10)
+        elif operation == 'get_balance':
+            args = (timestamp, 'account0', rng.randint(n + 1, 4 * n))
+        elif operation == 'get_payment_status':
+            args = (timestamp, source, f'payment{accounts[2 * i] + 1}')
+        elif operation == 'merge_accounts':
+            args = (timestamp, source, target)
+        else:
+            args = (timestamp, 10)
+        calls.append((operation, args))
+    return calls
+
+
+def growth_exponent(sizes, seconds):
+    # least squares slope of log(seconds) against log(size)
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(value, 1e-9)) for value in seconds]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sum((x - x_mean) ** 2 for x in xs)
+
+
+class ComplexityTests(unittest.TestCase):
+    """
+    Scaling tests: every operation is timed at geometrically increasing state sizes and the empirical growth
+    exponent of its per-call time is checked against the operation's declared budget.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.rng = random.Random(0)
+
+    # wall-clock scaling measurements are too noisy for every run of the suite, so they only run on request:
+    # RUN_COMPLEXITY_TESTS=1 python3 -m unittest discover -s tests -p complexity_tests.py
+    @unittest.skipUnless(os.environ.get('RUN_COMPLEXITY_TESTS'), 'set RUN_COMPLEXITY_TESTS=1 to run timing tests')
+    def test_operations_stay_within_complexity_budgets(self):
+        timings = {operation: [] for operation in BUDGETS}
+        for n in SIZES:
+            system, timestamp = build_system(n)
+            # read-only operations first, so the mutating ones do not change the state they are measured on
+            for operation in sorted(BUDGETS, key=lambda operation: operation.startswith(('get', 'top')), reverse=True):
+                calls = make_calls(operation, n, CALLS.get(operation, DEFAULT_CALLS), timestamp, self.rng)
+                timestamp += len(calls)
+                chunk_size = math.ceil(len(calls) / CHUNKS)
+                fastest = math.inf
+                gc.disable()
+                try:
+                    for chunk_start in range(0, len(calls), chunk_size):
+                        chunk = calls[chunk_start:chunk_start + chunk_size]
+                        start = time.perf_counter()
+                        for method_name, args in chunk:
+                            getattr(system, method_name)(*args)
+                        fastest = min(fastest, (time.perf_counter() - start) / len(chunk))
+                finally:
+                    gc.enable()
+                timings[operation].append(fastest)
+
+        exponents = {operation: growth_exponent(SIZES, seconds) for operation, seconds in timings.items()}
+        over_budget = {
+            operation: round(exponent, 2) for operation, exponent in exponents.items() if exponent > BUDGETS[operation]
+        }
+        self.assertEqual(over_budget, {}, f'growth exponents over budget (all exponents: {exponents})')
+
+    def test_growth_exponent_fit(self):
+        self.assertAlmostEqual(growth_exponent([10, 100, 1000], [1, 1, 1]), 0.0)
+        self.assertAlmostEqual(growth_exponent([10, 100, 1000], [1, 10, 100]), 1.0)
+        self.assertAlmostEqual(growth_exponent([10, 100, 1000], [1, 100, 10000]), 2.0)
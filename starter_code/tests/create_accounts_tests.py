@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class CreateAccountsTests(unittest.TestCase):
+    """
+    Tests for creating many accounts at once with create_accounts.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+        cls.reference = BankingSystemImpl()
+
+    def test_matches_create_account_loop(self):
+        for system in (self.system, self.reference):
+            self.assertTrue(system.create_account(1, 'account2'))
+            self.assertEqual(system.deposit(2, 'account2', 500), 500)
+            self.assertEqual(system.top_balances(3, 5), ['account2(500)'])
+        account_ids = ['account1', 'account2', 'account3', 'account1', 'account4', 'account3']
+        expected = [self.reference.create_account(4, account_id) for account_id in account_ids]
+        self.assertEqual(self.system.create_accounts(4, account_ids), expected)
+        self.assertEqual(expected, [True, False, True, False, True, False])
+        self.assertEqual(len(self.system.accounts), 4)
+        # the leaderboard built before the batch includes the new accounts
+        self.assertEqual(self.system.top_balances(5, 4), self.reference.top_balances(5, 4))
+        self.assertEqual(self.system.balance_quantiles(5), self.reference.balance_quantiles(5))
+        self.assertEqual(self.system.get_balance(6, 'account4', 4), 0)
+        self.assertEqual(self.system.get_balance(6, 'account4', 3), None)
+
+    def test_recreated_ids_drop_cached_balances(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account2', 100), 100)
+        # caches a result for a time_at after the ID is re-created
+        self.assertEqual(self.system.get_balance(3, 'account2', 10), 100)
+        self.assertTrue(self.system.merge_accounts(4, 'account1', 'account2'))
+        self.assertEqual(self.system.get_balance(5, 'account2', 10), None)
+        self.assertEqual(self.system.create_accounts(6, ['account2', 'account1']), [True, False])
+        self.assertEqual(self.system.get_balance(7, 'account2', 10), 0)
+        self.assertEqual(self.system.get_balance(7, 'account2', 5), None)
+
+    def test_idempotency_key(self):
+        self.assertEqual(self.system.create_accounts(1, ['account1', 'account2'], idempotency_key='onboarding'), [True, True])
+        self.assertEqual(self.system.create_accounts(2, ['account1', 'account2'], idempotency_key='onboarding'), [True, True])
+        self.assertEqual(self.system.create_accounts(3, ['account1', 'account3']), [False, True])
+
+    def test_tiered_storage(self):
+        with tempfile.TemporaryDirectory() as directory:
+            system = BankingSystemImpl(tiered_storage_path=os.path.join(directory, 'cold.db'), hot_account_capacity=10)
+            account_ids = [f'account{i}' for i in range(50)]
+            self.assertEqual(system.create_accounts(1, account_ids + ['account0']), [True] * 50 + [False])
+            self.assertEqual(len(system.accounts), 50)
+            self.assertEqual(system.deposit(2, 'account0', 10), 10)
+            system.accounts.close()
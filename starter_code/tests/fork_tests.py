@@ -0,0 +1,186 @@
+import random
+import tempfile
+import os
+import unittest
+from banking_system_impl import BankingSystemImpl
+from copy_on_write import CHUNK_SIZE, CopyOnWriteMap
+
+
+class ForkTests(unittest.TestCase):
+    """
+    Tests for forking a ledger into an independent copy-on-write copy.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+        cls.account_ids = [f'account{i}' for i in range(12)]
+
+    def random_operations(self, seed, start, count):
+        rng = random.Random(seed)
+        operations = []
+        timestamp = start
+        for _ in range(count):
+            timestamp += rng.randint(1, 3000000)
+            source, target = rng.sample(self.account_ids, 2)
+            action = rng.random()
+            if action < 0.3:
+                operations.append(('deposit', (timestamp, source, rng.randint(1, 1000))))
+            elif action < 0.55:
+                operations.append(('transfer', (timestamp, source, target, rng.randint(1, 500))))
+            elif action < 0.85:
+                operations.append(('pay', (timestamp, source, rng.randint(1, 500))))
+            elif action < 0.9:
+                operations.append(('merge_accounts', (timestamp, target, source)))
+            else:
+                operations.append(('create_account', (timestamp, source)))
+        return operations
+
+    def run_operations(self, system, operations):
+        return [getattr(system, method_name)(*args) for method_name, args in operations]
+
+    def replay(self, *operation_lists):
+        system = BankingSystemImpl()
+        for operations in operation_lists:
+            self.run_operations(system, operations)
+        return system
+
+    def assert_same_ledger(self, system, reference, timestamp):
+        self.assertEqual(system.top_spenders(timestamp, 20), reference.top_spenders(timestamp, 20))
+        self.assertEqual(system.top_balances(timestamp, 20), reference.top_balances(timestamp, 20))
+        for account_id in self.account_ids:
+            for time_at in range(0, timestamp, timestamp // 50):
+                self.assertEqual(system.get_balance(timestamp, account_id, time_at), reference.get_balance(timestamp, account_id, time_at))
+            self.assertEqual(system.get_transactions(timestamp, account_id, limit=1000), reference.get_transactions(timestamp, account_id, limit=1000))
+        for payment_number in range(1, reference.num_withdraws):
+            payment_id = f'payment{payment_number}'
+            owner = reference.payments[payment_id][0]
+            self.assertEqual(system.get_payment_status(timestamp, owner, payment_id), reference.get_payment_status(timestamp, owner, payment_id))
+        self.assertEqual(system.num_withdraws, reference.num_withdraws)
+        self.assertTrue(system.verify_ledger(timestamp).ok)
+
+    def test_fork_and_parent_diverge_independently(self):
+        setup = [('create_account', (i + 1, account_id)) for i, account_id in enumerate(self.account_ids)]
+        prefix = setup + self.random_operations(1, 100, 400)
+        self.run_operations(self.system, prefix)
+        start = prefix[-1][1][0]
+        forked = self.system.fork()
+        # nothing is copied up front
+        self.assertEqual(len(forked.accounts.local), 0)
+        self.assertEqual(len(forked.accounts), len(self.system.accounts))
+        parent_suffix = self.random_operations(2, start, 300)
+        fork_suffix = self.random_operations(3, start, 300)
+        self.assertEqual(self.run_operations(self.system, parent_suffix), self.run_operations(self.replay(prefix), parent_suffix))
+        self.assertEqual(self.run_operations(forked, fork_suffix), self.run_operations(self.replay(prefix), fork_suffix))
+        end = max(parent_suffix[-1][1][0], fork_suffix[-1][1][0]) + 1
+        self.assert_same_ledger(self.system, self.replay(prefix, parent_suffix), end)
+        self.assert_same_ledger(forked, self.replay(prefix, fork_suffix), end)
+
+    def test_forks_of_forks(self):
+        setup = [('create_account', (i + 1, account_id)) for i, account_id in enumerate(self.account_ids)]
+        first = setup + self.random_operations(4, 100, 200)
+        self.run_operations(self.system, first)
+        forked = self.system.fork()
+        second = self.random_operations(5, first[-1][1][0], 200)
+        self.run_operations(forked, second)
+        grandchild = forked.fork()
+        third = self.random_operations(6, second[-1][1][0], 200)
+        self.run_operations(grandchild, third)
+        end = third[-1][1][0] + 1
+        self.assert_same_ledger(grandchild, self.replay(first, second, third), end)
+        self.assert_same_ledger(forked, self.replay(first, second), end)
+        self.assert_same_ledger(self.system, self.replay(first), end)
+
+    def test_untouched_accounts_are_shared(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account1', 100), 100)
+        forked = self.system.fork()
+        self.assertEqual(forked.deposit(4, 'account2', 50), 50)
+        self.assertIs(forked.accounts.peek('account1'), self.system.accounts.peek('account1'))
+        self.assertIsNot(forked.accounts.peek('account2'), self.system.accounts.peek('account2'))
+        self.assertEqual(self.system.get_balance(5, 'account2', 5), 0)
+        self.assertTrue(forked.merge_accounts(6, 'account2', 'account1'))
+        self.assertEqual(len(forked.accounts), 1)
+        self.assertEqual(len(self.system.accounts), 2)
+        self.assertEqual(self.system.get_balance(7, 'account1', 7), 100)
+        self.assertEqual(forked.get_balance(7, 'account1', 7), None)
+
+    def test_repeated_forks_do_not_nest(self):
+        for i, account_id in enumerate(self.account_ids):
+            self.system.create_account(i + 1, account_id)
+        forks = []
+        for i in range(50):
+            self.system.deposit(100 + i, self.account_ids[i % 12], 10)
+            forks.append((i, self.system.fork()))
+        # every map is still a single layer over a plain dict, however many forks share it
+        for system in [self.system] + [forked for _, forked in forks]:
+            for mapping in (system.accounts, system.merged_accounts, system.payments, system.account_payments):
+                self.assertIs(type(mapping.base), dict)
+                self.assertIs(type(mapping.overlay), dict)
+                self.assertLessEqual(len(mapping.overlay), len(mapping.base) // 8)
+        for i, forked in forks:
+            self.assertEqual(sum(forked.get_balance(200, account_id, 200) for account_id in self.account_ids), 10 * (i + 1))
+            self.assertEqual(forked.deposit(300, 'account0', 1), forked.get_balance(300, 'account0', 299) + 1)
+        self.assertEqual(self.system.get_balance(400, 'account0', 400), 50)
+
+    def test_copy_on_write_map_matches_dict(self):
+        rng = random.Random(7)
+        maps = [({}, CopyOnWriteMap({}, list))]
+        for _ in range(3000):
+            reference, mapping = rng.choice(maps)
+            key = rng.randrange(40)
+            action = rng.random()
+            if action < 0.4:
+                value = rng.random()
+                reference[key], mapping[key] = [value], [value]
+            elif action < 0.6:
+                if key in reference:
+                    reference[key].append(1)
+                    mapping[key].append(1)
+            elif action < 0.8:
+                if key in reference:
+                    del reference[key]
+                    del mapping[key]
+            elif action < 0.85:
+                maps.append(({key: list(value) for key, value in reference.items()}, mapping.fork()))
+            self.assertEqual(mapping.peek(key), reference.get(key))
+            self.assertEqual(len(mapping), len(reference))
+        for reference, mapping in maps:
+            self.assertEqual(dict(mapping.items()), reference)
+            self.assertEqual(sorted(mapping), sorted(reference))
+            self.assertEqual(sorted(mapping.values()), sorted(reference.values()))
+
+    def test_fork_shares_cashback_log_and_velocity_windows(self):
+        system = BankingSystemImpl(velocity_limit=10 ** 9)
+        system.create_account(1, 'account1')
+        system.create_account(2, 'account2')
+        system.deposit(2, 'account1', 10 ** 9)
+        for i in range(3 * CHUNK_SIZE):
+            system.pay(3 + i, 'account1', 100)
+        system.get_balance(86400000 + 3 * CHUNK_SIZE + 3, 'account1', 86400000 + 3 * CHUNK_SIZE + 3)
+        self.assertTrue(system.schedule_payment(86400000 + 4 * CHUNK_SIZE, 86400000 + 10 ** 6, 'account1', 5))
+        forked = system.fork()
+        # the settled cashbacks are shared, not copied
+        self.assertIs(forked.completed_cashbacks.chunks[0], system.completed_cashbacks.chunks[0])
+        self.assertEqual(len(forked.completed_cashbacks), 3 * CHUNK_SIZE)
+        self.assertEqual(len(forked.velocity_limiter.windows.local), 0)
+        grandchild = forked.fork()
+        self.assertIs(grandchild.completed_cashbacks.chunks[0], system.completed_cashbacks.chunks[0])
+        self.assertEqual(forked.pay(86400000 + 5 * CHUNK_SIZE, 'account1', 100), f'payment{3 * CHUNK_SIZE + 1}')
+        self.assertEqual(system.get_velocity_headroom(86400000 + 5 * CHUNK_SIZE, 'account1'), 10 ** 9)
+        self.assertEqual(forked.get_velocity_headroom(86400000 + 5 * CHUNK_SIZE, 'account1'), 10 ** 9 - 100)
+        self.assertTrue(forked.cancel_scheduled(86400000 + 5 * CHUNK_SIZE, 'scheduled1'))
+        self.assertEqual(len(system.scheduler), 1)
+        for ledger in (system, forked, grandchild):
+            self.assertTrue(ledger.verify_ledger(86400000 + 6 * CHUNK_SIZE).ok)
+
+    def test_tiered_storage_is_not_supported(self):
+        with tempfile.TemporaryDirectory() as directory:
+            system = BankingSystemImpl(tiered_storage_path=os.path.join(directory, 'cold.db'))
+            with self.assertRaises(ValueError):
+                system.fork()
+            system.accounts.close()
@@ -0,0 +1,51 @@
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class IdempotencyTests(unittest.TestCase):
+    """
+    Tests for idempotency keys on mutating operations.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+
+    def test_retried_pay_is_not_executed_twice(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertEqual(self.system.deposit(2, 'account1', 1000), 1000)
+        self.assertEqual(self.system.pay(3, 'account1', 100, idempotency_key='req-1'), 'payment1')
+        self.assertEqual(self.system.pay(4, 'account1', 100, idempotency_key='req-1'), 'payment1')
+        self.assertEqual(self.system.pay(5, 'account1', 100, idempotency_key='req-2'), 'payment2')
+        self.assertEqual(self.system.deposit(6, 'account1', 0), 800)
+
+    def test_retried_transfer_returns_original_balance(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account1', 1000), 1000)
+        self.assertEqual(self.system.transfer(4, 'account1', 'account2', 300, idempotency_key='t'), 700)
+        self.assertEqual(self.system.deposit(5, 'account1', 50), 750)
+        self.assertEqual(self.system.transfer(6, 'account1', 'account2', 300, idempotency_key='t'), 700)
+        self.assertEqual(self.system.deposit(7, 'account2', 0), 300)
+
+    def test_keys_are_scoped_per_operation(self):
+        self.assertTrue(self.system.create_account(1, 'account1', idempotency_key='k'))
+        self.assertEqual(self.system.deposit(2, 'account1', 10, idempotency_key='k'), 10)
+
+    def test_keys_expire_after_ttl(self):
+        system = BankingSystemImpl(idempotency_ttl=10)
+        self.assertTrue(system.create_account(1, 'account1'))
+        self.assertEqual(system.deposit(2, 'account1', 10, idempotency_key='k'), 10)
+        self.assertEqual(system.deposit(12, 'account1', 10, idempotency_key='k'), 10)
+        self.assertEqual(system.deposit(13, 'account1', 10, idempotency_key='k'), 20)
+        self.assertEqual(len(system.idempotency_cache.entries), 1)
+
+    def test_number_of_keys_is_bounded(self):
+        system = BankingSystemImpl(idempotency_max_keys=3)
+        self.assertTrue(system.create_account(1, 'account1'))
+        for i in range(10):
+            self.assertEqual(system.deposit(2 + i, 'account1', 1, idempotency_key=i), i + 1)
+        self.assertEqual(len(system.idempotency_cache.entries), 3)
@@ -0,0 +1,71 @@
+import random
+import unittest
+from banking_system_impl import BankingSystemImpl
+from ordered_index import OrderedIndex
+
+
+class OrderedIndexTests(unittest.TestCase):
+    """
+    Tests for the bucketed sorted index behind the leaderboards.
+    """
+
+    failureException = Exception
+
+    def test_matches_sorted_list(self):
+        rng = random.Random(3)
+        index = OrderedIndex(load=4)
+        reference = []
+        for _ in range(2000):
+            value = rng.randint(0, 200)
+            if reference and rng.random() < 0.4:
+                value = rng.choice(reference)
+                index.remove(value)
+                reference.remove(value)
+            else:
+                index.add(value)
+                reference.append(value)
+            reference.sort()
+        self.assertEqual(list(index), reference)
+        self.assertEqual(index.first(10), reference[:10])
+        self.assertEqual(len(index), len(reference))
+        with self.assertRaises(ValueError):
+            index.remove(1000)
+
+
+class LeaderboardsTests(unittest.TestCase):
+    """
+    Tests for `top_balances` and `top_receivers`.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+        cls.system.create_account(1, 'account1')
+        cls.system.create_account(2, 'account2')
+        cls.system.create_account(3, 'account3')
+        cls.system.deposit(4, 'account1', 1000)
+        cls.system.deposit(5, 'account2', 500)
+
+    def test_rankings_follow_balance_changes(self):
+        self.assertEqual(self.system.top_balances(6, 3), ['account1(1000)', 'account2(500)', 'account3(0)'])
+        self.assertEqual(self.system.transfer(7, 'account1', 'account3', 700), 300)
+        self.assertEqual(self.system.top_balances(8, 2), ['account3(700)', 'account2(500)'])
+        self.assertEqual(self.system.top_receivers(9, 3), ['account1(1000)', 'account3(700)', 'account2(500)'])
+        self.assertTrue(self.system.create_account(10, 'account0'))
+        self.assertEqual(self.system.top_balances(11, 4)[-1], 'account0(0)')
+
+    def test_cashbacks_count_as_balance_and_incoming(self):
+        self.assertEqual(self.system.top_receivers(6, 1), ['account1(1000)'])
+        self.assertEqual(self.system.pay(7, 'account1', 600), 'payment1')
+        self.assertEqual(self.system.top_balances(8, 2), ['account2(500)', 'account1(400)'])
+        self.assertEqual(self.system.top_balances(86400007, 2), ['account2(500)', 'account1(412)'])
+        self.assertEqual(self.system.top_receivers(86400008, 1), ['account1(1012)'])
+
+    def test_merge_combines_and_removes_entries(self):
+        self.assertEqual(self.system.top_receivers(6, 3), ['account1(1000)', 'account2(500)', 'account3(0)'])
+        self.assertTrue(self.system.merge_accounts(7, 'account3', 'account2'))
+        self.assertEqual(self.system.top_balances(8, 3), ['account1(1000)', 'account3(500)'])
+        self.assertEqual(self.system.top_receivers(9, 3), ['account1(1000)', 'account3(500)'])
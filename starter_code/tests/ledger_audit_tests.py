@@ -0,0 +1,75 @@
+import random
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class LedgerAuditTests(unittest.TestCase):
+    """
+    Tests for the running-total ledger auditor and the full-scan verifier.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+
+    def test_running_totals(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account1', 1000), 1000)
+        self.assertEqual(self.system.transfer(4, 'account1', 'account2', 300), 700)
+        self.assertEqual(self.system.pay(5, 'account2', 200), 'payment1')
+        result = self.system.audit(6)
+        self.assertTrue(result.ok)
+        self.assertEqual(
+            (result.balance_total, result.deposited, result.paid, result.cashback_paid, result.cashback_liability),
+            (800, 1000, 200, 0, 4),
+        )
+        self.assertTrue(self.system.merge_accounts(7, 'account1', 'account2'))
+        result = self.system.audit(86400005)
+        self.assertTrue(result.ok)
+        self.assertEqual((result.balance_total, result.cashback_paid, result.cashback_liability), (804, 4, 0))
+        self.assertTrue(self.system.verify_ledger(86400006).ok)
+
+    def test_random_workload_stays_consistent(self):
+        rng = random.Random(11)
+        account_ids = [f'account{i}' for i in range(15)]
+        for i, account_id in enumerate(account_ids):
+            self.system.create_account(i + 1, account_id)
+        self.system.schedule_transfer(20, 5000000, 'account0', 'account1', 50, interval=7000000)
+        timestamp = 100
+        for _ in range(3000):
+            timestamp += rng.randint(1, 200000)
+            source, target = rng.sample(account_ids, 2)
+            action = rng.random()
+            if action < 0.35:
+                self.system.deposit(timestamp, source, rng.randint(1, 1000))
+            elif action < 0.6:
+                self.system.transfer(timestamp, source, target, rng.randint(1, 500))
+            elif action < 0.9:
+                self.system.pay(timestamp, source, rng.randint(1, 500))
+            elif action < 0.93:
+                self.system.merge_many(timestamp, target, [source, rng.choice(account_ids)])
+            elif action < 0.96 and self.system.merge_accounts(timestamp, target, source):
+                self.system.create_account(timestamp + 1, source)
+            else:
+                self.assertTrue(self.system.audit(timestamp).ok)
+        self.assertEqual(self.system.verify_ledger(timestamp).problems, [])
+        self.assertEqual(self.system.verify_ledger(timestamp + 86400000).problems, [])
+
+    def test_detects_corruption(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertEqual(self.system.deposit(2, 'account1', 1000), 1000)
+        self.assertEqual(self.system.pay(3, 'account1', 500), 'payment1')
+        # a balance changed behind the ledger's back is only visible to the full scan
+        self.system.accounts['account1'].balance += 1
+        self.assertTrue(self.system.audit(4).ok)
+        self.assertFalse(self.system.verify_ledger(4).ok)
+        self.system.accounts['account1'].balance -= 1
+        # a lost cashback is caught by the O(1) audit
+        self.system.pending_cashbacks.pop()
+        result = self.system.audit(5)
+        self.assertFalse(result.ok)
+        self.assertIn('0 cashbacks pending, 1 expected', result.problems)
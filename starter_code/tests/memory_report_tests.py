@@ -0,0 +1,48 @@
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class MemoryReportTests(unittest.TestCase):
+    """
+    Tests for `BankingSystemImpl.memory_report`.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+
+    def test_reports_element_counts(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertTrue(self.system.create_account(3, 'account3'))
+        self.assertEqual(self.system.deposit(4, 'account1', 1000), 1000)
+        self.assertEqual(self.system.pay(5, 'account1', 100), 'payment1')
+        self.assertTrue(self.system.merge_accounts(6, 'account2', 'account3'))
+        report = self.system.memory_report()
+        self.assertEqual(report['accounts']['elements'], 2)
+        self.assertEqual(report['merged_accounts']['elements'], 1)
+        self.assertEqual(report['balance_history']['elements'], 6)
+        self.assertEqual(report['pending_cashbacks']['elements'], 1)
+        self.assertEqual(report['completed_cashbacks']['elements'], 0)
+        self.assertGreater(report['accounts']['bytes'], report['balance_history']['bytes'] // 2)
+        self.assertFalse(report['accounts']['estimated'])
+
+    def test_top_accounts_by_history(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        for timestamp in range(3, 8):
+            self.assertIsNotNone(self.system.deposit(timestamp, 'account2', 10))
+        report = self.system.memory_report(top_n=1)
+        self.assertEqual(report['top_accounts_by_history'], [('account2', 6)])
+
+    def test_sampling_estimates_large_structures(self):
+        for i in range(200):
+            self.assertTrue(self.system.create_account(i, f'account{i}'))
+        exact = self.system.memory_report()
+        sampled = self.system.memory_report(sample_size=20)
+        self.assertTrue(sampled['accounts']['estimated'])
+        self.assertEqual(sampled['accounts']['elements'], 200)
+        self.assertAlmostEqual(sampled['accounts']['bytes'], exact['accounts']['bytes'], delta=exact['accounts']['bytes'] * 0.2)
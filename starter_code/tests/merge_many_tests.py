@@ -0,0 +1,62 @@
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class MergeManyTests(unittest.TestCase):
+    """
+    Tests for merging several accounts into one in a single call.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+        cls.reference = BankingSystemImpl()
+
+    def populate(self, system):
+        for i in range(1, 6):
+            system.create_account(i, f'account{i}')
+            system.deposit(10 + i, f'account{i}', 1000 * i)
+        system.pay(20, 'account2', 500)
+        system.pay(21, 'account3', 300)
+        system.pay(22, 'account4', 200)
+        system.transfer(23, 'account5', 'account1', 100)
+
+    def test_results_match_sequential_merges(self):
+        self.populate(self.system)
+        self.populate(self.reference)
+        sources = ['account2', 'account1', 'account3', 'missing', 'account3', 'account4']
+        expected = [self.reference.merge_accounts(30, 'account1', source) for source in sources]
+        self.assertEqual(self.system.merge_many(30, 'account1', sources), expected)
+        self.assertEqual(expected, [True, False, True, False, False, True])
+
+        for system in (self.system, self.reference):
+            system.process_cashbacks(30 + 86400000)
+        self.assertEqual(self.system.pending_cashbacks, self.reference.pending_cashbacks)
+        self.assertEqual(self.system.top_spenders(86400031, 5), self.reference.top_spenders(86400031, 5))
+        for payment in ('payment1', 'payment2', 'payment3'):
+            self.assertEqual(
+                self.system.get_payment_status(86400032, 'account1', payment),
+                self.reference.get_payment_status(86400032, 'account1', payment),
+            )
+            self.assertEqual(self.system.get_payment_status(86400032, 'account1', payment), 'CASHBACK_RECEIVED')
+        for account_id in ('account1', 'account2', 'account5'):
+            for time_at in (25, 30, 86400050):
+                self.assertEqual(
+                    self.system.get_balance(86400060, account_id, time_at),
+                    self.reference.get_balance(86400060, account_id, time_at),
+                )
+
+    def test_pending_cashbacks_are_reowned(self):
+        self.populate(self.system)
+        self.assertEqual(self.system.merge_many(30, 'account5', ['account2', 'account3']), [True, True])
+        self.assertEqual(self.system.get_payment_status(31, 'account5', 'payment1'), 'IN_PROGRESS')
+        self.assertIsNone(self.system.get_payment_status(31, 'account2', 'payment1'))
+        self.assertEqual(self.system.deposit(86400040, 'account5', 0), 4900 + 1500 + 2700 + 10 + 6)
+
+    def test_invalid_target(self):
+        self.populate(self.system)
+        self.assertEqual(self.system.merge_many(30, 'missing', ['account1', 'account2']), [False, False])
+        self.assertEqual(self.system.merge_many(31, 'account1', []), [])
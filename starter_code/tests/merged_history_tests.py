@@ -0,0 +1,89 @@
+import random
+import unittest
+from banking_system_impl import BankingSystemImpl
+from merged_history import family_components
+
+
+def combined_balance(account, time_at):
+    # brute-force combined balance of account's merged family at time_at
+    total = None
+    for component, merge_timestamp in family_components(account):
+        if component.creation_timestamp <= time_at and (merge_timestamp is None or time_at < merge_timestamp):
+            total = (total or 0) + component.balance_at(time_at)
+    return total
+
+
+class MergedHistoryTests(unittest.TestCase):
+    """
+    Tests for lazily merged balance histories of merged account families.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+
+    def test_combined_history(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertTrue(self.system.create_account(3, 'account3'))
+        self.assertEqual(self.system.deposit(4, 'account1', 100), 100)
+        self.assertEqual(self.system.deposit(5, 'account2', 200), 200)
+        self.assertEqual(self.system.deposit(6, 'account3', 300), 300)
+        self.assertTrue(self.system.merge_accounts(7, 'account2', 'account3'))
+        self.assertEqual(self.system.deposit(8, 'account2', 10), 510)
+        self.assertTrue(self.system.merge_accounts(9, 'account1', 'account2'))
+        self.assertEqual(self.system.get_merged_history(10, 'account1'), [
+            (1, 0), (4, 100), (5, 300), (6, 600), (8, 610),
+        ])
+        self.assertEqual(self.system.get_merged_balance(11, 'account1', 3), 0)
+        self.assertEqual(self.system.get_merged_balance(11, 'account1', 0), None)
+        self.assertEqual(self.system.get_merged_balance(11, 'account1', 9), 610)
+        # the surviving account's own history only has the merged balances as deposits
+        self.assertEqual(self.system.get_balance(11, 'account1', 6), 100)
+        self.assertIsNone(self.system.get_merged_history(12, 'account2'))
+        self.assertEqual(self.system.get_merged_history(12, 'account1', since=5, until=6), [(5, 300), (6, 600)])
+
+    def test_matches_brute_force_with_later_changes(self):
+        rng = random.Random(11)
+        account_ids = [f'account{i}' for i in range(8)]
+        for i, account_id in enumerate(account_ids):
+            self.system.create_account(i + 1, account_id)
+        timestamp = 10
+        for _ in range(600):
+            timestamp += rng.randint(1, 3)
+            source, target = rng.sample(account_ids, 2)
+            action = rng.random()
+            if action < 0.5:
+                self.system.deposit(timestamp, source, rng.randint(1, 100))
+            elif action < 0.8:
+                self.system.transfer(timestamp, source, target, rng.randint(1, 50))
+            elif action < 0.9:
+                self.system.pay(timestamp, source, rng.randint(1, 50))
+            elif self.system.merge_accounts(timestamp, target, source):
+                self.system.create_account(timestamp, source)
+            # query the cached views in between changes
+            queried = rng.choice(account_ids)
+            time_at = rng.randint(0, timestamp)
+            self.assertEqual(
+                self.system.get_merged_balance(timestamp, queried, time_at),
+                combined_balance(self.system.accounts[queried], time_at),
+            )
+        for account_id in account_ids:
+            account = self.system.accounts[account_id]
+            for time_at in range(0, timestamp + 1, 7):
+                self.assertEqual(self.system.get_merged_balance(timestamp, account_id, time_at), combined_balance(account, time_at))
+
+    def test_tiered_storage_rebuilds_views(self):
+        system = BankingSystemImpl(tiered_storage_path=':memory:', hot_account_capacity=2)
+        self.assertTrue(system.create_account(1, 'account1'))
+        self.assertTrue(system.create_account(2, 'account2'))
+        self.assertEqual(system.deposit(3, 'account2', 50), 50)
+        self.assertTrue(system.merge_accounts(4, 'account1', 'account2'))
+        self.assertEqual(system.get_merged_balance(5, 'account1', 3), 50)
+        for i in range(3, 6):
+            self.assertTrue(system.create_account(5, f'account{i}'))
+        self.assertEqual(system.deposit(6, 'account1', 5), 55)
+        self.assertEqual(system.get_merged_history(7, 'account1'), [(1, 0), (3, 50), (6, 55)])
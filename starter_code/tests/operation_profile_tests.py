@@ -0,0 +1,58 @@
+import unittest
+from banking_system_impl import BankingSystemImpl
+from operation_profile import CpuProfile, MemoryProfile
+
+
+class OperationProfileTests(unittest.TestCase):
+    """
+    Tests for attributing profiled CPU time and allocations to BankingSystemImpl methods.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.operations = [('create_account', (1, 'account1')), ('create_account', (2, 'account2'))]
+        cls.operations += [('deposit', (3 + i, 'account1', 1000)) for i in range(50)]
+        cls.operations += [('pay', (100 + i, 'account1', 10), {'idempotency_key': f'key{i}'}) for i in range(20)]
+        cls.operations += [('transfer', (200, 'account1', 'account1', 10)), ('get_balance', (86400300, 'account1', 86400200))]
+
+    def test_cpu_time_per_method(self):
+        profile = CpuProfile(BankingSystemImpl(), self.operations)
+        methods = profile.methods()
+        self.assertEqual(methods['deposit'].calls, 50)
+        # idempotent methods are counted once per call, not once more for the decorator's wrapper
+        self.assertEqual(methods['pay'].calls, 20)
+        self.assertEqual(methods['_settle_cashbacks'].calls, 1)
+        self.assertEqual(methods['process_cashbacks'].calls, 74)
+        self.assertTrue(methods['deposit'].total_time >= methods['_apply_deposit'].total_time)
+        self.assertIn('get_balance', profile.format())
+
+    def test_collapsed_stacks(self):
+        stacks = CpuProfile(BankingSystemImpl(), self.operations).collapsed_stacks(min_time=0)
+        self.assertIn('operation_profile.py:run_operations;banking_system_impl.py:get_balance;'
+                      'banking_system_impl.py:process_cashbacks;banking_system_impl.py:_settle_cashbacks', stacks)
+        self.assertTrue(all(seconds >= 0 for seconds in stacks.values()))
+
+    def test_allocations_per_method(self):
+        profile = MemoryProfile(BankingSystemImpl(), self.operations)
+        self.assertEqual(profile.calls['deposit'][0], 50)
+        self.assertEqual(profile.calls['transfer'][0], 1)
+        retained = profile.retained_by_method()
+        self.assertTrue(retained['_apply_payment'][0] > 0)
+        self.assertTrue(retained['create_account'][0] > 0)
+        self.assertEqual(sum(profile.collapsed_stacks().values()), sum(trace.size for trace in profile.snapshot.traces))
+        self.assertIn('retained at the end of the run', profile.format())
+
+    def test_failures_are_counted(self):
+        operations = self.operations + [('get_transactions', (300, 'account1', 0, 50, 'bad cursor'))] * 3
+        for profile in (CpuProfile(BankingSystemImpl(), operations), MemoryProfile(BankingSystemImpl(), operations)):
+            self.assertEqual(list(profile.failures), ['get_transactions'])
+            self.assertEqual(profile.failures['get_transactions'][0], 3)
+            self.assertIn('warning: 3 calls raised', profile.format())
+        self.assertEqual(CpuProfile(BankingSystemImpl(), self.operations).failures, {})
+
+    def test_unknown_methods_raise(self):
+        with self.assertRaises(AttributeError):
+            CpuProfile(BankingSystemImpl(), self.operations + [('depsoit', (300, 'account1', 10))])
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from banking_system_impl import BankingSystemImpl
+from operation_trace import (OpaqueResult, TraceRecorder, read_trace, read_trace_options, record_test_case,
+                             replay_trace)
+import level_3_tests
+
+
+class OperationTraceTests(unittest.TestCase):
+    """
+    Tests for recording operation traces and replaying them.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'test.trace')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record_scenario(self):
+        with TraceRecorder(BankingSystemImpl(), self.path) as system:
+            self.assertTrue(system.create_account(1, 'account1'))
+            self.assertEqual(system.deposit(2, 'account1', 1000), 1000)
+            self.assertEqual(system.pay(3, 'account1', 100, idempotency_key='p'), 'payment1')
+            self.assertEqual(system.get_balance(86400004, 'account1', 86400004), 902)
+            with self.assertRaises(TypeError):
+                system.deposit(5, 'account1')
+            # attribute reads are not recorded
+            self.assertEqual(len(system.accounts), 1)
+
+    def test_trace_round_trip(self):
+        self.record_scenario()
+        entries = list(read_trace(self.path))
+        self.assertEqual([entry.method for entry in entries],
+                         ['create_account', 'deposit', 'pay', 'get_balance', 'deposit'])
+        self.assertEqual(entries[2].args, (3, 'account1', 100))
+        self.assertEqual(entries[2].kwargs, {'idempotency_key': 'p'})
+        self.assertEqual(entries[2].result, 'payment1')
+        self.assertEqual((entries[4].result, entries[4].raised), ('TypeError', True))
+        self.assertEqual([entry.offset for entry in entries], sorted(entry.offset for entry in entries))
+
+    def test_replay_verifies_results(self):
+        self.record_scenario()
+        entries = list(read_trace(self.path))
+        report = replay_trace(BankingSystemImpl(), entries)
+        self.assertEqual(report.operations, 5)
+        self.assertEqual(report.mismatches, [])
+        self.assertEqual(len(report.latencies['deposit']), 2)
+        self.assertIn('get_balance', report.format())
+
+        entries[3] = entries[3]._replace(result=0)
+        report = replay_trace(BankingSystemImpl(), entries, paced=True, speed=1000)
+        self.assertEqual([(index, result) for index, _, result in report.mismatches], [(3, 902)])
+
+    def test_non_value_results_are_recorded_as_markers(self):
+        options = {'velocity_limit': 500, 'quantile_accuracy': 0.05}
+        with TraceRecorder(BankingSystemImpl(**options), self.path, options) as system:
+            self.assertTrue(system.create_account(1, 'account1'))
+            with system.bulk_load():
+                system.deposit(2, 'account1', 1000)
+            self.assertEqual(system.fork().get_balance(3, 'account1', 2), 1000)
+            self.assertIsNone(system.pay(4, 'account1', 600))
+            self.assertEqual(system.audit(5).problems, [])
+        entries = list(read_trace(self.path))
+        self.assertEqual([entry.method for entry in entries],
+                         ['create_account', 'bulk_load', 'deposit', 'fork', 'pay', 'audit'])
+        self.assertEqual(entries[1].result, OpaqueResult('_GeneratorContextManager'))
+        self.assertEqual(entries[3].result, OpaqueResult('BankingSystemImpl'))
+        self.assertEqual(read_trace_options(self.path), options)
+        # the payment over the velocity limit is only rejected again by a system constructed with the same options
+        self.assertEqual(replay_trace(BankingSystemImpl(**read_trace_options(self.path)), entries).mismatches, [])
+        self.assertEqual(replay_trace(BankingSystemImpl(), entries).mismatches[0][0], 4)
+
+    def test_level_tests_convert_to_traces(self):
+        test = level_3_tests.Level3Tests('test_level_3_case_02_basic_pay_cashback')
+        self.assertTrue(record_test_case(test, self.path))
+        entries = list(read_trace(self.path))
+        self.assertEqual(len(entries), 12)
+        self.assertEqual(replay_trace(BankingSystemImpl(), entries).mismatches, [])
@@ -0,0 +1,107 @@
+import random
+import unittest
+from banking_system_impl import BankingSystemImpl
+from quantile_sketch import QuantileSketch
+
+
+def exact_quantile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+class QuantileSketchTests(unittest.TestCase):
+    """
+    Tests for the relative-error quantile sketch.
+    """
+
+    failureException = Exception
+
+    def test_relative_error_bound(self):
+        rng = random.Random(5)
+        values = [int(rng.lognormvariate(8, 2)) for _ in range(20000)]
+        sketch = QuantileSketch(0.01)
+        for value in values:
+            sketch.add(value)
+        for q in (0.01, 0.25, 0.5, 0.9, 0.99, 1.0):
+            exact = exact_quantile(values, q)
+            self.assertLessEqual(abs(sketch.quantile(q) - exact), 0.01 * exact + 1e-9)
+
+    def test_merge_and_remove(self):
+        left = QuantileSketch()
+        right = QuantileSketch()
+        for value in range(1, 501):
+            left.add(value)
+        for value in range(501, 1001):
+            right.add(value)
+        left.merge(right)
+        self.assertAlmostEqual(left.quantile(0.5), 500, delta=5)
+        for value in range(1, 501):
+            left.remove(value)
+        self.assertAlmostEqual(left.quantile(0.5), 750, delta=8)
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+        with self.assertRaises(ValueError):
+            left.merge(QuantileSketch(0.05))
+
+    def test_negative_values(self):
+        sketch = QuantileSketch()
+        for value in range(-500, 501):
+            sketch.add(value)
+        self.assertAlmostEqual(sketch.quantile(0.0), -500, delta=5)
+        self.assertAlmostEqual(sketch.quantile(0.25), -250, delta=3)
+        self.assertEqual(sketch.quantile(0.5), 0)
+        self.assertAlmostEqual(sketch.quantile(0.75), 250, delta=3)
+        for value in range(1, 501):
+            sketch.remove(value)
+        self.assertAlmostEqual(sketch.quantile(1.0), 0, delta=1)
+        merged = QuantileSketch()
+        merged.merge(sketch)
+        self.assertAlmostEqual(merged.quantile(0.5), -250, delta=3)
+
+
+class LedgerQuantilesTests(unittest.TestCase):
+    """
+    Tests for `balance_quantiles` and `payment_size_quantiles`.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+
+    def test_balance_quantiles_follow_all_operations(self):
+        for i in range(1, 101):
+            self.assertTrue(self.system.create_account(i, f'account{i}'))
+            self.assertEqual(self.system.deposit(100 + i, f'account{i}', i * 100), i * 100)
+        quantiles = self.system.balance_quantiles(300, qs=(0.0, 0.5, 1.0))
+        self.assertAlmostEqual(quantiles[0.0], 100, delta=1)
+        self.assertAlmostEqual(quantiles[0.5], 5000, delta=50)
+        self.assertAlmostEqual(quantiles[1.0], 10000, delta=100)
+        self.assertEqual(self.system.pay(301, 'account100', 10000), 'payment1')
+        self.assertEqual(self.system.transfer(302, 'account99', 'account1', 9900), 0)
+        self.assertTrue(self.system.merge_accounts(303, 'account98', 'account97'))
+        balances = [account.balance for account in self.system.accounts.values()]
+        self.assertEqual(self.system.balance_sketch.count, len(balances))
+        self.assertAlmostEqual(self.system.balance_quantiles(304, qs=(1.0,))[1.0], max(balances), delta=max(balances) * 0.01)
+        # the 2% cashback moves account100 from 0 to 200
+        self.assertEqual(self.system.balance_quantiles(86400301, qs=(0.0,))[0.0], 0)
+        self.assertEqual(self.system.balance_sketch.zero_count, 1)
+
+    def test_negative_balances(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account1', -10), -10)
+        self.assertAlmostEqual(self.system.balance_quantiles(4, qs=(0.0,))[0.0], -10, delta=0.1)
+        self.assertEqual(self.system.deposit(5, 'account1', 30), 20)
+        self.assertEqual(self.system.balance_quantiles(6, qs=(0.0,))[0.0], 0)
+
+    def test_payment_size_quantiles(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertEqual(self.system.deposit(2, 'account1', 100000), 100000)
+        for i in range(1, 101):
+            self.assertEqual(self.system.pay(2 + i, 'account1', i * 10), f'payment{i}')
+        self.assertIsNone(self.system.pay(200, 'account1', 10 ** 9))
+        quantiles = self.system.payment_size_quantiles(201)
+        self.assertAlmostEqual(quantiles[0.5], 500, delta=5)
+        self.assertAlmostEqual(quantiles[0.99], 990, delta=10)
@@ -0,0 +1,111 @@
+import heapq
+import random
+import unittest
+from banking_system_impl import BankingSystemImpl
+from timing_wheel import ScheduledJob, TimingWheel
+
+
+class TimingWheelTests(unittest.TestCase):
+    """
+    Tests for the hierarchical timing wheel against a heap reference.
+    """
+
+    failureException = Exception
+
+    def test_fires_in_timestamp_order_like_a_heap(self):
+        rng = random.Random(7)
+        wheel = TimingWheel()
+        heap = []
+        live = set()
+        fired = []
+        expected = []
+        now = 0
+        for seq in range(3000):
+            choice = rng.random()
+            if choice < 0.5:
+                time = now + rng.choice([1, 63, 64, 4096, 86400000, rng.randint(1, 10 ** 9)])
+                wheel.schedule(ScheduledJob(f'job{seq}', time, seq, None))
+                heapq.heappush(heap, (time, seq))
+                live.add(seq)
+            elif choice < 0.6 and live:
+                seq = rng.choice(sorted(live))
+                self.assertTrue(wheel.cancel(f'job{seq}'))
+                live.discard(seq)
+            else:
+                now += rng.choice([0, 1, 100, 10 ** 6, 10 ** 8])
+                jobs = wheel.pop_due(now)
+                while jobs:
+                    fired.extend((job.time, job.seq) for job in jobs)
+                    jobs = wheel.pop_due(now)
+                while heap and heap[0][0] <= now:
+                    time, seq = heapq.heappop(heap)
+                    if seq in live:
+                        expected.append((time, seq))
+                        live.discard(seq)
+                self.assertEqual(fired, expected)
+        self.assertEqual(len(wheel), len(live))
+
+
+class SchedulerTests(unittest.TestCase):
+    """
+    Tests for scheduled and recurring transfers and payments.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+        cls.system.create_account(1, 'account1')
+        cls.system.create_account(2, 'account2')
+        cls.system.deposit(3, 'account1', 1000)
+
+    def test_scheduled_transfer_runs_before_operations_at_its_timestamp(self):
+        self.assertEqual(self.system.schedule_transfer(4, 10, 'account1', 'account2', 300), 'scheduled1')
+        self.assertEqual(self.system.deposit(9, 'account2', 0), 0)
+        self.assertEqual(self.system.deposit(10, 'account2', 0), 300)
+        self.assertEqual(self.system.get_balance(11, 'account1', 10), 700)
+
+    def test_recurring_payment_and_cancel(self):
+        job_id = self.system.schedule_payment(4, 100, 'account1', 100, interval=100)
+        self.assertEqual(self.system.deposit(350, 'account1', 0), 700)
+        self.assertEqual(self.system.get_payment_status(351, 'account1', 'payment3'), 'IN_PROGRESS')
+        self.assertTrue(self.system.cancel_scheduled(352, job_id))
+        self.assertFalse(self.system.cancel_scheduled(353, job_id))
+        self.assertEqual(self.system.deposit(1000, 'account1', 0), 700)
+
+    def test_cashbacks_settle_before_jobs_at_the_same_timestamp(self):
+        self.assertEqual(self.system.pay(4, 'account1', 1000), 'payment1')
+        # the transfer only succeeds if the 20 cashback has been refunded first
+        self.system.schedule_transfer(5, 86400004, 'account1', 'account2', 20)
+        self.assertEqual(self.system.deposit(86400005, 'account2', 0), 20)
+
+    def test_rejects_past_timestamps(self):
+        self.assertIsNone(self.system.schedule_transfer(10, 10, 'account1', 'account2', 1))
+        self.assertIsNone(self.system.schedule_payment(10, 20, 'account1', 1, interval=0))
+
+    def test_due_jobs_run_before_reads_and_merges(self):
+        self.system.schedule_payment(4, 10, 'account1', 100)
+        self.assertEqual(self.system.top_spenders(20, 1), ['account1(100)'])
+        self.assertTrue(self.system.merge_accounts(25, 'account2', 'account1'))
+        self.assertEqual(self.system.deposit(30, 'account2', 0), 900)
+        self.assertEqual(self.system.get_payment_status(31, 'account2', 'payment1'), 'IN_PROGRESS')
+
+    def test_job_of_a_merged_away_account_is_reported(self):
+        job_id = self.system.schedule_payment(4, 30, 'account1', 100, interval=10)
+        self.assertEqual(self.system.get_scheduled_status(5, job_id), 'SCHEDULED')
+        self.assertTrue(self.system.merge_accounts(25, 'account2', 'account1'))
+        self.assertEqual(self.system.deposit(30, 'account2', 0), 1000)
+        self.assertEqual(self.system.get_scheduled_status(31, job_id), 'ACCOUNT_INVALID')
+        self.assertFalse(self.system.cancel_scheduled(32, job_id))
+
+    def test_scheduled_status(self):
+        transfer_id = self.system.schedule_transfer(4, 10, 'account1', 'account2', 300)
+        payment_id = self.system.schedule_payment(4, 10, 'account2', 5000)
+        cancelled_id = self.system.schedule_payment(4, 10, 'account1', 1)
+        self.assertTrue(self.system.cancel_scheduled(5, cancelled_id))
+        self.assertEqual(self.system.get_scheduled_status(10, transfer_id), 'COMPLETED')
+        self.assertEqual(self.system.get_scheduled_status(10, payment_id), 'FAILED')
+        self.assertEqual(self.system.get_scheduled_status(10, cancelled_id), 'CANCELLED')
+        self.assertIsNone(self.system.get_scheduled_status(10, 'scheduled99'))
@@ -0,0 +1,64 @@
+import unittest
+from banking_system_impl import BankingSystemImpl
+from shared_memory_readers import AnalyticsReadPool, SnapshotView, publish_snapshot
+
+
+class SharedMemoryReadersTests(unittest.TestCase):
+    """
+    Tests for snapshot publishing and the read-only worker pool.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+        cls.system.create_account(1, 'account1')
+        cls.system.create_account(2, 'account2')
+        cls.system.create_account(3, 'account3')
+        cls.system.deposit(4, 'account1', 1000)
+        cls.system.deposit(5, 'account2', 2000)
+        cls.system.pay(6, 'account2', 500)
+        cls.system.transfer(7, 'account1', 'account3', 300)
+        cls.system.merge_accounts(8, 'account3', 'account1')
+
+    def test_snapshot_matches_get_balance(self):
+        block = publish_snapshot(self.system)
+        view = SnapshotView(block)
+        try:
+            for account_id in ('account1', 'account2', 'account3', 'account4'):
+                for time_at in range(0, 10):
+                    self.assertEqual(view.get_balance(account_id, time_at), self.system.get_balance(10, account_id, time_at))
+            self.assertEqual(view.top_spenders(3), self.system.top_spenders(11, 3))
+        finally:
+            view.release()
+            block.close()
+            block.unlink()
+
+    def test_ids_may_contain_any_character(self):
+        account_ids = ['line\nbreak', '', 'caf\u00e9', 'tab\tid', 'account2\n']
+        for i, account_id in enumerate(account_ids):
+            self.assertTrue(self.system.create_account(20 + i, account_id))
+            self.assertEqual(self.system.deposit(30 + i, account_id, 100 + i), 100 + i)
+        block = publish_snapshot(self.system)
+        view = SnapshotView(block)
+        try:
+            for account_id in account_ids + ['account1', 'account2', 'account3']:
+                self.assertEqual(view.get_balance(account_id, 40), self.system.get_balance(40, account_id, 40))
+            self.assertEqual(view.top_spenders(8), self.system.top_spenders(41, 8))
+        finally:
+            view.release()
+            block.close()
+            block.unlink()
+
+    def test_worker_pool_answers_from_latest_publish(self):
+        with AnalyticsReadPool(self.system, workers=2, chunk_size=2) as pool:
+            pool.publish(10)
+            queries = [('account1', 7), ('account1', 8), ('account2', 6), ('account3', 8), ('account4', 1)]
+            self.assertEqual(pool.get_balances(queries), [700, None, 1500, 1000, None])
+            self.assertEqual(pool.top_spenders(2), ['account2(500)', 'account3(300)'])
+            self.system.deposit(11, 'account3', 5)
+            self.assertEqual(pool.get_balances([('account3', 11)]), [1000])
+            pool.publish(12)
+            self.assertEqual(pool.get_balances([('account3', 11)]), [1005])
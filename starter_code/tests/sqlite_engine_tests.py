@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from banking_system_impl import BankingSystemImpl
+from banking_system_sqlite import BankingSystemSqlite
+import level_1_tests
+import level_2_tests
+import level_3_tests
+import level_4_tests
+
+
+class SqliteLevel1Tests(level_1_tests.Level1Tests):
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemSqlite()
+
+
+class SqliteLevel2Tests(level_2_tests.Level2Tests):
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemSqlite()
+
+
+class SqliteLevel3Tests(level_3_tests.Level3Tests):
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemSqlite()
+
+
+class SqliteLevel4Tests(level_4_tests.Level4Tests):
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemSqlite()
+
+
+class SqliteEngineTests(unittest.TestCase):
+    """
+    Tests for the SQLite-backed engine beyond the level 1-4 behaviour.
+    """
+
+    failureException = Exception
+
+    def test_state_survives_reopening(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ledger.db')
+            system = BankingSystemSqlite(path)
+            self.assertTrue(system.create_account(1, 'account1'))
+            self.assertEqual(system.deposit(2, 'account1', 1000), 1000)
+            self.assertEqual(system.pay(3, 'account1', 100), 'payment1')
+            system.close()
+
+            system = BankingSystemSqlite(path)
+            self.assertFalse(system.create_account(4, 'account1'))
+            self.assertEqual(system.pay(5, 'account1', 100), 'payment2')
+            self.assertEqual(system.get_payment_status(86400003, 'account1', 'payment1'), 'CASHBACK_RECEIVED')
+            self.assertEqual(system.get_balance(86400004, 'account1', 86400003), 802)
+            system.close()
+
+    def test_batch_rolls_back_on_error(self):
+        system = BankingSystemSqlite()
+        self.assertTrue(system.create_account(1, 'account1'))
+        with self.assertRaises(ZeroDivisionError):
+            with system.batch():
+                self.assertEqual(system.deposit(2, 'account1', 1000), 1000)
+                1 / 0
+        self.assertEqual(system.deposit(3, 'account1', 1), 1)
+
+    def test_unknown_payment_identifiers(self):
+        system = BankingSystemSqlite()
+        self.assertTrue(system.create_account(1, 'account1'))
+        self.assertIsNone(system.get_payment_status(2, 'account1', 'payment1'))
+        self.assertIsNone(system.get_payment_status(3, 'account1', 'refund1'))
+
+    def test_payment_identifiers_match_in_memory_engine(self):
+        for system in (BankingSystemSqlite(), BankingSystemImpl()):
+            self.assertTrue(system.create_account(1, 'account1'))
+            self.assertEqual(system.deposit(2, 'account1', 1000), 1000)
+            self.assertEqual(system.pay(3, 'account1', 100), 'payment1')
+            self.assertEqual(system.get_payment_status(4, 'account1', 'payment1'), 'IN_PROGRESS')
+            for payment in ('payment01', 'payment+1', 'payment 1', 'payment١', 'payment'):
+                self.assertIsNone(system.get_payment_status(5, 'account1', payment))
@@ -0,0 +1,99 @@
+import unittest
+from banking_system_impl import BankingSystemImpl
+import level_1_tests
+import level_2_tests
+import level_3_tests
+import level_4_tests
+
+
+def tiered_system():
+    # the smallest hot set, so almost every operation pages accounts in and out of SQLite
+    return BankingSystemImpl(tiered_storage_path=':memory:', hot_account_capacity=2)
+
+
+class TieredLevel1Tests(level_1_tests.Level1Tests):
+
+    @classmethod
+    def setUp(cls):
+        cls.system = tiered_system()
+
+
+class TieredLevel2Tests(level_2_tests.Level2Tests):
+
+    @classmethod
+    def setUp(cls):
+        cls.system = tiered_system()
+
+
+class TieredLevel3Tests(level_3_tests.Level3Tests):
+
+    @classmethod
+    def setUp(cls):
+        cls.system = tiered_system()
+
+
+class TieredLevel4Tests(level_4_tests.Level4Tests):
+
+    @classmethod
+    def setUp(cls):
+        cls.system = tiered_system()
+
+
+class TieredStorageTests(unittest.TestCase):
+    """
+    Tests for the hot/cold account tiers.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = tiered_system()
+
+    def test_inactive_accounts_are_evicted(self):
+        for i in range(1, 6):
+            self.assertTrue(self.system.create_account(i, f'account{i}'))
+        self.assertEqual(len(self.system.accounts.hot), 2)
+        self.assertEqual(len(self.system.accounts), 5)
+        self.assertEqual(list(self.system.accounts.hot), ['account4', 'account5'])
+        self.assertEqual(self.system.deposit(6, 'account1', 100), 100)
+        self.assertEqual(list(self.system.accounts.hot), ['account5', 'account1'])
+        self.assertFalse(self.system.create_account(7, 'account2'))
+
+    def test_top_spenders_ranks_cold_accounts(self):
+        for i in range(1, 5):
+            self.assertTrue(self.system.create_account(i, f'account{i}'))
+            self.assertEqual(self.system.deposit(10 + i, f'account{i}', 1000), 1000)
+            self.assertEqual(self.system.pay(20 + i, f'account{i}', 100 * i), f'payment{i}')
+        self.assertEqual(self.system.transfer(30, 'account1', 'account2', 700), 200)
+        expected = ['account1(800)', 'account4(400)', 'account3(300)', 'account2(200)']
+        self.assertEqual(self.system.top_spenders(31, 4), expected)
+        self.assertEqual(self.system.top_spenders(32, 2), expected[:2])
+
+    def test_get_balance_of_cold_account(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertEqual(self.system.deposit(2, 'account1', 500), 500)
+        for i in range(2, 6):
+            self.assertTrue(self.system.create_account(i + 1, f'account{i}'))
+        self.assertNotIn('account1', self.system.accounts.hot)
+        self.assertEqual(self.system.get_balance(10, 'account1', 3), 500)
+
+    def test_merge_sources_are_referenced_not_copied(self):
+        for i in range(1, 4):
+            self.assertTrue(self.system.create_account(i, f'account{i}'))
+            self.assertEqual(self.system.deposit(10 + i, f'account{i}', 1000), 1000)
+        for i in range(200):
+            self.assertEqual(self.system.deposit(20 + i, 'account2', 1), 1001 + i)
+        self.assertTrue(self.system.merge_accounts(300, 'account1', 'account2'))
+        for i in range(4, 7):
+            self.assertTrue(self.system.create_account(300 + i, f'account{i}'))
+        self.assertNotIn('account1', self.system.accounts.hot)
+        # the evicted account1 refers to account2 instead of carrying a pickled copy of its 201-entry journal
+        data = self.system.accounts.connection.execute(
+            "SELECT data FROM cold_accounts WHERE id = 'account1'").fetchone()[0]
+        self.assertLess(len(data), 1000)
+        account = self.system.accounts['account1']
+        self.assertIs(account.merged_journal_sources[0], self.system.merged_accounts['account2'][0])
+        transactions, _ = self.system.get_transactions(400, 'account1', limit=1000)
+        self.assertEqual(len(transactions), 203)
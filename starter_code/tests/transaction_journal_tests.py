@@ -0,0 +1,64 @@
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class TransactionJournalTests(unittest.TestCase):
+    """
+    Tests for the per-account transaction journal and `get_transactions`.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl()
+
+    def test_records_kind_amount_and_counterparty(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account1', 1000), 1000)
+        self.assertEqual(self.system.transfer(4, 'account1', 'account2', 300), 700)
+        self.assertEqual(self.system.pay(5, 'account1', 100), 'payment1')
+        transactions, cursor = self.system.get_transactions(86400005, 'account1')
+        self.assertIsNone(cursor)
+        summary = [(t.timestamp, t.kind, t.amount, t.counterparty, t.payment_id) for t in transactions]
+        self.assertEqual(summary, [
+            (86400005, 'cashback', 2, None, 'payment1'),
+            (5, 'payment', 100, None, 'payment1'),
+            (4, 'transfer_out', 300, 'account2', None),
+            (3, 'deposit', 1000, None, None),
+        ])
+        transactions, _ = self.system.get_transactions(86400006, 'account2')
+        self.assertEqual([(t.kind, t.counterparty) for t in transactions], [('transfer_in', 'account1')])
+
+    def test_pagination_with_since_and_cursor(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        for timestamp in range(2, 12):
+            self.assertIsNotNone(self.system.deposit(timestamp, 'account1', timestamp))
+        page, cursor = self.system.get_transactions(20, 'account1', since=4, limit=3)
+        self.assertEqual([t.timestamp for t in page], [11, 10, 9])
+        page, cursor = self.system.get_transactions(20, 'account1', since=4, limit=3, cursor=cursor)
+        self.assertEqual([t.timestamp for t in page], [8, 7, 6])
+        page, cursor = self.system.get_transactions(20, 'account1', since=4, limit=3, cursor=cursor)
+        self.assertEqual([t.timestamp for t in page], [5, 4])
+        self.assertIsNone(cursor)
+
+    def test_merged_accounts_inherit_entries(self):
+        self.assertTrue(self.system.create_account(1, 'account1'))
+        self.assertTrue(self.system.create_account(2, 'account2'))
+        self.assertEqual(self.system.deposit(3, 'account1', 100), 100)
+        self.assertEqual(self.system.deposit(4, 'account2', 200), 200)
+        self.assertEqual(self.system.deposit(5, 'account1', 300), 400)
+        self.assertTrue(self.system.merge_accounts(6, 'account1', 'account2'))
+        page, cursor = self.system.get_transactions(7, 'account1', limit=2)
+        self.assertEqual([(t.timestamp, t.kind) for t in page], [(6, 'merge_in'), (5, 'deposit')])
+        page, cursor = self.system.get_transactions(7, 'account1', limit=2, cursor=cursor)
+        self.assertEqual([t.timestamp for t in page], [4, 3])
+        self.assertIsNone(cursor)
+        self.assertIs(self.system.accounts['account1'].merged_journal_sources[0], self.system.merged_accounts['account2'][0])
+        page, _ = self.system.get_transactions(8, 'account2')
+        self.assertEqual([t.timestamp for t in page], [4])
+
+    def test_unknown_account(self):
+        self.assertIsNone(self.system.get_transactions(1, 'account1'))
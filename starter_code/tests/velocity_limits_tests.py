@@ -0,0 +1,85 @@
+import random
+import unittest
+from banking_system_impl import BankingSystemImpl
+from velocity_limits import VelocityLimiter
+
+
+class VelocityLimitsTests(unittest.TestCase):
+    """
+    Tests for sliding-window spending velocity limits.
+    """
+
+    failureException = Exception
+
+
+    @classmethod
+    def setUp(cls):
+        cls.system = BankingSystemImpl(velocity_limit=1000, velocity_window=100)
+        cls.system.create_account(1, 'account1')
+        cls.system.create_account(2, 'account2')
+        cls.system.deposit(3, 'account1', 10000)
+
+    def test_pay_and_transfer_share_the_window(self):
+        self.assertEqual(self.system.pay(10, 'account1', 600), 'payment1')
+        self.assertIsNone(self.system.transfer(20, 'account1', 'account2', 500))
+        self.assertEqual(self.system.transfer(30, 'account1', 'account2', 400), 9000)
+        self.assertIsNone(self.system.pay(40, 'account1', 1))
+        self.assertEqual(self.system.get_velocity_headroom(40, 'account1'), 0)
+        # the payment at 10 leaves the window at 110
+        self.assertIsNone(self.system.pay(109, 'account1', 600))
+        self.assertEqual(self.system.get_velocity_headroom(110, 'account1'), 600)
+        self.assertEqual(self.system.pay(110, 'account1', 600), 'payment2')
+        # rejected calls are not counted
+        self.assertEqual(self.system.get_velocity_headroom(111, 'account1'), 0)
+        self.assertEqual(self.system.get_velocity_headroom(131, 'account1'), 400)
+
+    def test_per_account_limits(self):
+        self.assertTrue(self.system.set_velocity_limit(5, 'account1', None))
+        self.assertIsNone(self.system.get_velocity_headroom(5, 'account1'))
+        self.assertEqual(self.system.pay(10, 'account1', 5000), 'payment1')
+        self.assertTrue(self.system.set_velocity_limit(11, 'account1', 6000))
+        self.assertEqual(self.system.get_velocity_headroom(12, 'account1'), 1000)
+        self.assertFalse(self.system.set_velocity_limit(13, 'missing', 10))
+
+    def test_merged_spending_counts_towards_target(self):
+        self.system.deposit(4, 'account2', 1000)
+        self.assertEqual(self.system.pay(10, 'account2', 700), 'payment1')
+        self.assertEqual(self.system.pay(11, 'account1', 200), 'payment2')
+        self.assertTrue(self.system.merge_accounts(12, 'account1', 'account2'))
+        self.assertEqual(self.system.get_velocity_headroom(13, 'account1'), 100)
+        self.assertIsNone(self.system.pay(14, 'account1', 101))
+
+    def test_limits_can_be_enabled_later(self):
+        system = BankingSystemImpl()
+        system.create_account(1, 'account1')
+        system.deposit(2, 'account1', 100)
+        self.assertIsNone(system.velocity_limiter)
+        self.assertTrue(system.set_velocity_limit(3, 'account1', 50))
+        self.assertIsNone(system.pay(4, 'account1', 60))
+        self.assertEqual(system.pay(5, 'account1', 50), 'payment1')
+
+    def test_unlimited_accounts_keep_only_their_window(self):
+        system = BankingSystemImpl(velocity_window=86400000)
+        system.create_account(1, 'account1')
+        system.create_account(2, 'account2')
+        system.deposit(3, 'account1', 10 ** 9)
+        self.assertTrue(system.set_velocity_limit(4, 'account2', 100))
+        for day in range(1, 1001):
+            self.assertIsNotNone(system.pay(day * 86400000, 'account1', 10))
+        # account1 has no limit, so spent() never runs for it; recording expires its old withdrawals instead
+        self.assertEqual(len(system.velocity_limiter.windows['account1'].entries), 1)
+        self.assertTrue(system.set_velocity_limit(86400000001, 'account1', 15))
+        self.assertEqual(system.get_velocity_headroom(86400000001, 'account1'), 5)
+
+    def test_matches_brute_force(self):
+        rng = random.Random(4)
+        limiter = VelocityLimiter(500, 50)
+        history = []
+        for timestamp in range(1, 2000):
+            amount = rng.randint(1, 200)
+            expected = sum(spent for time, spent in history if time > timestamp - 50) + amount <= 500
+            self.assertEqual(limiter.allows('account1', timestamp, amount), expected)
+            if expected:
+                limiter.record('account1', timestamp, amount)
+                history.append((timestamp, amount))
+        self.assertLessEqual(len(limiter.windows['account1'].entries), 50)
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import heapq
+import io
+import pickle
+import sqlite3
+
+class TieredAccountStore(MutableMapping):
+    # dict-like store of Account objects keyed on account ID
+    # the hot_capacity most recently used accounts stay in memory, the rest are pickled into a local SQLite file
+    # and paged back in on access, so the memory held by valid accounts (their balance histories and journals)
+    # follows the active set rather than the total account count
+    # only valid accounts are tiered: merged accounts (and their journals), the payment index and the cashback
+    # queues stay resident; an account's merge sources are pickled as references to the resident merged Account
+    # objects (see merged_sources), so paging an account in returns the same objects merged_accounts holds and
+    # eviction does not re-serialize its merged family
+    # the SQLite file is a spill area for this process, not a durable copy of the ledger
+
+    def __init__(self, path: str = ":memory:", hot_capacity: int = 10000):
+        # at least two accounts must stay resident, since transfer and merge_accounts hold two accounts at once
+        if hot_capacity < 2:
+            raise ValueError("hot_capacity must be at least 2")
+        self.hot_capacity = hot_capacity
+        # resident accounts, ordered from least to most recently used
+        self.hot = OrderedDict()
+        # number of accounts currently stored in SQLite
+        self.cold_count = 0
+        # id() of a merged Account -> the Account, for the merge sources referenced by pickled accounts
+        # (holding them here also keeps their id() from being reused while the reference is stored)
+        self.merged_sources = {}
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        # durability is not needed for a spill file, so skip the journal and fsyncs
+        self.connection.execute("PRAGMA journal_mode=OFF")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute("DROP TABLE IF EXISTS cold_accounts")
+        # total_outgoing is kept next to the pickled account so top_spenders can rank cold accounts without loading them
+        self.connection.execute(
+            "CREATE TABLE cold_accounts (id TEXT PRIMARY KEY, total_outgoing INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX cold_accounts_ranking ON cold_accounts (total_outgoing DESC, id ASC)")
+
+    def __getitem__(self, account_id: str):
+        account = self.hot.get(account_id)
+        if account is not None:
+            # mark account as most recently active
+            self.hot.move_to_end(account_id)
+            return account
+        # page the account in from SQLite, it is removed from the cold tier while it is resident
+        row = self.connection.execute("SELECT data FROM cold_accounts WHERE id = ?", (account_id,)).fetchone()
+        if row is None:
+            raise KeyError(account_id)
+        account = self._loads(row[0])
+        self.connection.execute("DELETE FROM cold_accounts WHERE id = ?", (account_id,))
+        self.cold_count -= 1
+        self.hot[account_id] = account
+        self._evict()
+        return account
+
+    def __setitem__(self, account_id: str, account):
+        if account_id not in self.hot and self._in_cold(account_id):
+            self.connection.execute("DELETE FROM cold_accounts WHERE id = ?", (account_id,))
+            self.cold_count -= 1
+        self.hot[account_id] = account
+        self.hot.move_to_end(account_id)
+        self._evict()
+
+    def __delitem__(self, account_id: str):
+        if account_id in self.hot:
+            del self.hot[account_id]
+        elif self._in_cold(account_id):
+            self.connection.execute("DELETE FROM cold_accounts WHERE id = ?", (account_id,))
+            self.cold_count -= 1
+        else:
+            raise KeyError(account_id)
+
+    def __contains__(self, account_id) -> bool:
+        # membership checks do not page accounts in or change their recency
+        return account_id in self.hot or self._in_cold(account_id)
+
+    def __len__(self) -> int:
+        return len(self.hot) + self.cold_count
+
+    def __iter__(self):
+        yield from list(self.hot)
+        for (account_id,) in self.connection.execute("SELECT id FROM cold_accounts"):
+            yield account_id
+
+    def values(self):
+        # read-only iteration over every account: cold accounts are unpickled on the fly but not made resident,
+        # so scanning the ledger does not flush the hot set (mutating a yielded cold account has no effect)
+        yield from list(self.hot.values())
+        for (data,) in self.connection.execute("SELECT data FROM cold_accounts"):
+            yield self._loads(data)
+
+    def items(self):
+        for account in self.values():
+            yield account.id, account
+
+    def top_spenders(self, n: int) -> list[tuple[str, int]]:
+        # top n (account_id, total_outgoing) pairs, by decreasing total_outgoing then ascending account ID
+        # resident accounts are ranked in memory, cold accounts through the persisted (total_outgoing, id) index
+        hot_ranking = heapq.nsmallest(n, ((-account.total_outgoing, account.id) for account in self.hot.values()))
+        cold_ranking = self.connection.execute(
+            "SELECT -total_outgoing, id FROM cold_accounts ORDER BY total_outgoing DESC, id ASC LIMIT ?", (n,)
+        ).fetchall()
+        return [(account_id, -negative_outgoing) for negative_outgoing, account_id in heapq.merge(hot_ranking, cold_ranking)][:n]
+
+    def close(self):
+        self.connection.close()
+
+    def _in_cold(self, account_id: str) -> bool:
+        return self.connection.execute("SELECT 1 FROM cold_accounts WHERE id = ?", (account_id,)).fetchone() is not None
+
+    def _evict(self):
+        # spill least recently active accounts until the hot set is back within capacity
+        while len(self.hot) > self.hot_capacity:
+            account_id, account = self.hot.popitem(last=False)
+            self.connection.execute(
+                "INSERT INTO cold_accounts (id, total_outgoing, data) VALUES (?, ?, ?)",
+                (account_id, account.total_outgoing, self._dumps(account)),
+            )
+            self.cold_count += 1
+
+    def _dumps(self, account) -> bytes:
+        file = io.BytesIO()
+        _AccountPickler(file, self, account).dump(account)
+        return file.getvalue()
+
+    def _loads(self, data: bytes):
+        return _AccountUnpickler(io.BytesIO(data), self).load()
+
+class _AccountPickler(pickle.Pickler):
+    # pickles an account with its merge sources replaced by their key in the store's merged_sources
+
+    def __init__(self, file, store: TieredAccountStore, account):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.store = store
+        self.sources = {id(source) for source in account.merged_journal_sources}
+
+    def persistent_id(self, obj):
+        if id(obj) not in self.sources:
+            return None
+        self.store.merged_sources[id(obj)] = obj
+        return id(obj)
+
+class _AccountUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, store: TieredAccountStore):
+        super().__init__(file)
+        self.store = store
+
+    def persistent_load(self, key):
+        return self.store.merged_sources[key]
@@ -0,0 +1,126 @@
+class ScheduledJob:
+    __slots__ = ("id", "time", "seq", "action", "interval", "cancelled", "last_result", "status")
+
+    def __init__(self, id, time, seq, action, interval=None):
+        # job identifier, e.g. "scheduled1"
+        self.id = id
+        # timestamp the job fires at
+        self.time = time
+        # scheduling order, breaks ties between jobs firing at the same timestamp
+        self.seq = seq
+        # (method_name, args) to run at time, the method receives time as its timestamp argument
+        self.action = action
+        # for recurring jobs, milliseconds between consecutive firings
+        self.interval = interval
+        # cancelled jobs stay in their slot until the wheel reaches it and are then dropped
+        self.cancelled = False
+        # result of the most recent firing
+        self.last_result = None
+        # outcome of the most recent firing, see BankingSystemImpl.get_scheduled_status
+        self.status = "SCHEDULED"
+
+class TimingWheel:
+    # hierarchical timing wheel of ScheduledJobs keyed on integer timestamps
+    # level l has 2**slot_bits slots, each covering 2**(l * slot_bits) timestamps; a job lives at the lowest level
+    # whose slot range separates it from the current time, and moves down a level each time the wheel reaches its slot
+    # schedule and cancel are O(1); finding the next due slot is O(levels) using per-level occupancy bitmaps
+
+    def __init__(self, start: int = 0, slot_bits: int = 6, levels: int = 11):
+        self.slot_bits = slot_bits
+        self.slot_mask = (1 << slot_bits) - 1
+        # 11 levels of 64 slots span 66 bits, enough for any non-negative 64-bit timestamp
+        self.levels = levels
+        # current time of the wheel, only moves forward
+        self.now = start
+        self.slots = [[None] * (1 << slot_bits) for _ in range(levels)]
+        # bit i of occupied[level] is set when slots[level][i] holds jobs
+        self.occupied = [0] * levels
+        # job ID -> job, for jobs that are scheduled and not cancelled
+        self.jobs = {}
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def schedule(self, job: ScheduledJob):
+        self.jobs[job.id] = job
+        self._place(job)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        return True
+
+    def next_due(self, until: int) -> int | None:
+        # earliest firing time of a scheduled job if it is at or before until, otherwise None
+        if not self.jobs:
+            return None
+        jobs = self._next_slot(until)
+        return None if jobs is None else min(job.time for job in jobs)
+
+    def pop_due(self, until: int) -> list[ScheduledJob]:
+        # removes and returns the jobs firing at the earliest due timestamp (at or before until),
+        # ordered by scheduling order; recurring jobs must be rescheduled by the caller
+        jobs = self._next_slot(until)
+        if jobs is None:
+            return []
+        index = self.now & self.slot_mask
+        self.slots[0][index] = None
+        self.occupied[0] &= ~(1 << index)
+        due = jobs if len(jobs) == 1 else sorted(jobs, key=lambda job: (job.time, job.seq))
+        for job in due:
+            del self.jobs[job.id]
+        return due
+
+    def _place(self, job: ScheduledJob):
+        # jobs already due (time before the wheel's current time) go into the current slot
+        time = max(job.time, self.now)
+        difference = time ^ self.now
+        level = min((difference.bit_length() - 1) // self.slot_bits, self.levels - 1) if difference else 0
+        index = (time >> (level * self.slot_bits)) & self.slot_mask
+        slot = self.slots[level][index]
+        if slot is None:
+            self.slots[level][index] = [job]
+            self.occupied[level] |= 1 << index
+        else:
+            slot.append(job)
+
+    def _next_slot(self, until: int):
+        # moves the wheel forward to the earliest non-empty level 0 slot at or before until and returns its jobs,
+        # or None (leaving the wheel's time unchanged) if no job is due by then
+        while True:
+            for level in range(self.levels):
+                shift = level * self.slot_bits
+                current = (self.now >> shift) & self.slot_mask
+                # slots before the current one at this level are already in the past
+                candidates = self.occupied[level] >> current
+                if candidates:
+                    break
+            else:
+                return None
+            index = current + ((candidates & -candidates).bit_length() - 1)
+            if level == 0:
+                # level 0 slots hold a single timestamp (plus any jobs scheduled in the past)
+                slot_time = (self.now & ~self.slot_mask) | index
+                if slot_time > until:
+                    return None
+                live = [job for job in self.slots[0][index] if not job.cancelled]
+                if not live:
+                    self.slots[0][index] = None
+                    self.occupied[0] &= ~(1 << index)
+                    continue
+                self.now = max(self.now, slot_time)
+                return live
+            # start of the slot's range: the current time's higher digits followed by this slot's digit
+            start = ((self.now >> (shift + self.slot_bits)) << (shift + self.slot_bits)) | (index << shift)
+            if start > until:
+                return None
+            # cascade the slot's jobs down to the levels matching their distance from the new current time
+            jobs = self.slots[level][index]
+            self.slots[level][index] = None
+            self.occupied[level] &= ~(1 << index)
+            self.now = max(self.now, start)
+            for job in jobs:
+                if not job.cancelled:
+                    self._place(job)
@@ -0,0 +1,62 @@
+from typing import NamedTuple
+import bisect
+import heapq
+
+class Transaction(NamedTuple):
+    # global ordinal of the journal entry, breaks ties between entries with the same timestamp
+    seq: int
+    timestamp: int
+    # "deposit", "transfer_in", "transfer_out", "payment", "cashback" or "merge_in"
+    kind: str
+    amount: int
+    # other account of a transfer, or the account absorbed by a merge
+    counterparty: str | None = None
+    # payment the entry belongs to, for payments and their cashbacks
+    payment_id: str | None = None
+
+def journal_key(entry: Transaction) -> tuple[int, int]:
+    # journals are kept sorted on (timestamp, seq), which is also the pagination cursor
+    return (entry.timestamp, entry.seq)
+
+def record_transaction(journal: list, entry: Transaction):
+    # entries almost always arrive in order; cashbacks settled late for an earlier timestamp are inserted in place
+    if not journal or journal_key(journal[-1]) < journal_key(entry):
+        journal.append(entry)
+    else:
+        bisect.insort(journal, entry, key=journal_key)
+
+def family_journals(account) -> list[list]:
+    # journals of account and of every account merged into it, directly or through earlier merges
+    journals = []
+    stack = [account]
+    while stack:
+        current = stack.pop()
+        journals.append(current.journal)
+        stack.extend(current.merged_journal_sources)
+    return journals
+
+def page_transactions(journals: list[list], since: int, limit: int, cursor=None) -> tuple[list[Transaction], tuple | None]:
+    # newest-first page of at most limit entries with timestamp >= since across journals,
+    # starting strictly before cursor (the cursor returned by the previous page)
+    # each journal is located by binary search and then merged lazily, so the cost is
+    # O(k log n + limit log k) for k journals of up to n entries, independent of how much history precedes the page
+    heap = []
+    lower_key = (since, -1)
+    for index, journal in enumerate(journals):
+        low = bisect.bisect_left(journal, lower_key, key=journal_key)
+        high = len(journal) if cursor is None else bisect.bisect_left(journal, tuple(cursor), key=journal_key)
+        if high > low:
+            entry = journal[high - 1]
+            heap.append((-entry.timestamp, -entry.seq, index, high - 1, low))
+    heapq.heapify(heap)
+
+    page = []
+    while heap and len(page) < limit:
+        _, _, index, position, low = heapq.heappop(heap)
+        page.append(journals[index][position])
+        if position > low:
+            entry = journals[index][position - 1]
+            heapq.heappush(heap, (-entry.timestamp, -entry.seq, index, position - 1, low))
+    # a cursor is only returned when more entries remain
+    next_cursor = journal_key(page[-1]) if heap else None
+    return page, next_cursor
@@ -0,0 +1,87 @@
+from collections import deque
+import heapq
+
+class SlidingWindow:
+    # amounts spent by one account over the trailing window milliseconds, with their running total
+    # withdrawals arrive in timestamp order, so the deque stays sorted and expiry pops from the left:
+    # every withdrawal is appended and popped once, O(1) amortised
+
+    def __init__(self):
+        # (timestamp, amount) of withdrawals still inside the window, oldest first
+        self.entries = deque()
+        self.total = 0
+
+    def expire(self, cutoff: int):
+        # drops withdrawals at or before cutoff
+        entries = self.entries
+        while entries and entries[0][0] <= cutoff:
+            self.total -= entries.popleft()[1]
+
+    def add(self, timestamp: int, amount: int):
+        self.entries.append((timestamp, amount))
+        self.total += amount
+
+    def copy(self):
+        window = SlidingWindow()
+        window.entries = self.entries.copy()
+        window.total = self.total
+        return window
+
+class VelocityLimiter:
+    # per-account spending limits over a trailing window: an account may withdraw at most its limit in total
+    # within any window milliseconds, i.e. over (timestamp - window, timestamp]
+    # default_limit applies to every account without an override, None means unlimited
+
+    def __init__(self, default_limit=None, window: int = 86400000):
+        self.default_limit = default_limit
+        self.window = window
+        # account ID -> limit overriding default_limit (None for an unlimited account)
+        self.limits = {}
+        # account ID -> SlidingWindow of its recent withdrawals
+        self.windows = {}
+
+    def limit(self, account_id: str):
+        return self.limits.get(account_id, self.default_limit)
+
+    def spent(self, account_id: str, timestamp: int) -> int:
+        # total withdrawn by account_id within the window ending at timestamp
+        window = self.windows.get(account_id)
+        if window is None:
+            return 0
+        window.expire(timestamp - self.window)
+        if not window.entries:
+            # idle accounts do not keep an empty window around
+            del self.windows[account_id]
+            return 0
+        return window.total
+
+    def allows(self, account_id: str, timestamp: int, amount: int) -> bool:
+        limit = self.limit(account_id)
+        return limit is None or self.spent(account_id, timestamp) + amount <= limit
+
+    def record(self, account_id: str, timestamp: int, amount: int):
+        # every withdrawal is recorded (a limit set later counts the window leading up to it), so the window is
+        # expired here too: spent only runs for limited accounts, and unlimited ones would otherwise grow forever
+        window = self.windows.get(account_id)
+        if window is None:
+            window = self.windows[account_id] = SlidingWindow()
+        else:
+            window.expire(timestamp - self.window)
+        window.add(timestamp, amount)
+
+    def merge(self, account_id: str, merged_account_id: str, timestamp: int):
+        # after a merge the merged account's recent withdrawals count towards the account it was merged into
+        self.limits.pop(merged_account_id, None)
+        source = self.windows.pop(merged_account_id, None)
+        if source is None:
+            return
+        source.expire(timestamp - self.window)
+        target = self.windows.get(account_id)
+        if target is None:
+            self.windows[account_id] = source
+            return
+        target.expire(timestamp - self.window)
+        merged = SlidingWindow()
+        merged.entries.extend(heapq.merge(target.entries, source.entries))
+        merged.total = target.total + source.total
+        self.windows[account_id] = merged